@@ -0,0 +1,332 @@
+import argparse
+import datetime
+import json
+import os
+import re
+import sqlite3
+
+import numpy as np
+
+from ballots import BallotStore, store_arrays, store_from_arrays
+from classes import Election
+from registry import CandidateRegistry
+
+ARCHIVE_DIR = "Archive"
+INDEX_FILE = "archive.sqlite"
+# fields results can be broken down by, and their tallies columns
+GROUPS = {"school": "school", "grad_year": "grad_year"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS elections (
+    id INTEGER PRIMARY KEY,
+    year INTEGER NOT NULL,
+    office TEXT NOT NULL,
+    certified TEXT NOT NULL,
+    ballots INTEGER NOT NULL,
+    winner TEXT,
+    last_round INTEGER NOT NULL,
+    no_confidence_last INTEGER NOT NULL,
+    candidates TEXT NOT NULL,
+    rounds TEXT NOT NULL,
+    registry TEXT,
+    store TEXT NOT NULL,
+    store_hash TEXT NOT NULL,
+    UNIQUE (year, office)
+);
+CREATE TABLE IF NOT EXISTS tallies (
+    election INTEGER NOT NULL REFERENCES elections (id),
+    round INTEGER NOT NULL,
+    school TEXT NOT NULL,
+    grad_year INTEGER NOT NULL,
+    candidate TEXT,
+    votes INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS elections_by_office ON elections (office, year);
+CREATE INDEX IF NOT EXISTS tallies_by_election ON tallies (election, round);
+CREATE INDEX IF NOT EXISTS tallies_by_school ON tallies (school, round);
+CREATE INDEX IF NOT EXISTS tallies_by_grad_year ON tallies (grad_year, round);
+"""
+
+class ArchivedElection:
+    """
+    One election read back from the archive: its ballots, candidates, per-round results and candidate registry.
+    """
+    def __init__(self, year: int, office: str, certified: str, store: BallotStore, candidates: list[str], rounds: list[dict],
+                 winner: str, no_confidence_last: bool, registry: CandidateRegistry = None):
+        self.year = year
+        self.office = office
+        self.certified = certified
+        self.store = store
+        self.candidates = candidates
+        self.rounds = rounds
+        self.winner = winner
+        self.no_confidence_last = no_confidence_last
+        self.registry = registry
+
+    def __str__(self):
+        return f"Archived Election: {self.year} {self.office}, {len(self.store)} ballots, winner {self.winner}"
+
+    def to_election(self):
+        """
+        Rebuilds an Election from the archived ballots, e.g. to recount it with other options.
+
+        :return: The election (not yet run)
+        :rtype: Election
+        """
+        from checkpoint import voters_from_store
+        return Election(voters_from_store(self.store), self.candidates, self.no_confidence_last)
+
+class ElectionArchive:
+    """
+    Archive of certified elections across years. Each election's ballots are kept in their compact form in an .npz file, and an SQLite index holds the candidates, round results and registry of every election together with precomputed tallies: the number of ballots counting for each candidate (NULL when exhausted) in every round, by school and graduation year. Cross-year questions such as first-choice share by school over the last five elections are answered from the tallies without reading any ballots.
+    """
+    def __init__(self, directory: str = ARCHIVE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(os.path.join(directory, INDEX_FILE))
+        self.connection.executescript(SCHEMA)
+
+    def __str__(self):
+        return f"Election Archive: {self.directory}, {len(self)} elections"
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM elections").fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """
+        Closes the index.
+        """
+        self.connection.close()
+
+    def add(self, election: Election, year: int, office: str, registry: CandidateRegistry = None, certified: str = None, replace: bool = False):
+        """
+        Archives a certified election: writes its ballot store and indexes its round results and tallies.
+
+        :param election: Election object after run_election()
+        :type election: Election
+        :param year: Year the election was held
+        :type year: int
+        :param office: The office elected
+        :type office: str
+        :param registry: Candidate registry of the election (optional)
+        :type registry: CandidateRegistry or None
+        :param certified: Date the results were certified (defaults to today)
+        :type certified: str or None
+        :param replace: If True, replace an archived election of the same year and office instead of raising ValueError
+        :type replace: bool
+        :return: The archive id of the election
+        :rtype: int
+        """
+        from server import election_rounds
+
+        if election.last_round == 0:
+            raise ValueError("Election has not been run yet. Please call run_election() first.")
+        existing = self.connection.execute("SELECT id, store FROM elections WHERE year = ? AND office = ?", (year, office)).fetchone()
+        if existing is not None and not replace:
+            raise ValueError(f"The {year} {office} election is already archived.")
+
+        # a replacement goes to a new file, so the archived one stays intact until the index points at its replacement
+        store = election.get_ballot_store()
+        stem = f"{year}_{re.sub(r'[^A-Za-z0-9]+', '_', office).strip('_')}"
+        filename = f"{stem}.npz"
+        version = 1
+        while os.path.exists(os.path.join(self.directory, filename)):
+            version += 1
+            filename = f"{stem}_{version}.npz"
+        temporary = os.path.join(self.directory, filename + ".tmp")
+        with open(temporary, "wb") as f:
+            np.savez_compressed(f, **store_arrays(store))
+        os.replace(temporary, os.path.join(self.directory, filename))
+
+        try:
+            with self.connection:
+                if existing is not None:
+                    self.connection.execute("DELETE FROM tallies WHERE election = ?", existing[:1])
+                    self.connection.execute("DELETE FROM elections WHERE id = ?", existing[:1])
+                cursor = self.connection.execute(
+                    "INSERT INTO elections (year, office, certified, ballots, winner, last_round, no_confidence_last, candidates, rounds, registry, store, store_hash)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (year, office, certified or datetime.date.today().isoformat(), len(store), election.winner, election.last_round,
+                     int(election.no_confidence_last), json.dumps(election.candidates), json.dumps(election_rounds(election)),
+                     json.dumps(registry.to_dict()) if registry is not None else None, filename, store.digest()))
+                election_id = cursor.lastrowid
+                self.connection.executemany("INSERT INTO tallies VALUES (?, ?, ?, ?, ?, ?)",
+                                            ((election_id,) + row for row in _group_tallies(election, store)))
+        except BaseException:
+            os.remove(os.path.join(self.directory, filename))
+            raise
+        if existing is not None and os.path.exists(os.path.join(self.directory, existing[1])):
+            os.remove(os.path.join(self.directory, existing[1]))
+        return election_id
+
+    def elections(self, office: str = None):
+        """
+        Returns the archived elections, most recent first.
+
+        :param office: Only list elections for this office (optional)
+        :type office: str or None
+        :return: Year, office, certification date, ballots, winner and number of rounds of each election
+        :rtype: list[dict]
+        """
+        query = "SELECT year, office, certified, ballots, winner, last_round FROM elections"
+        rows = self.connection.execute(query + " WHERE office = ? ORDER BY year DESC, office" if office else query + " ORDER BY year DESC, office",
+                                       (office,) if office else ())
+        return [dict(zip(["year", "office", "certified", "ballots", "winner", "rounds"], row)) for row in rows]
+
+    def load(self, year: int, office: str):
+        """
+        Reads an archived election back, checking its ballots against the digest taken when it was archived.
+
+        :param year: Year the election was held
+        :type year: int
+        :param office: The office elected
+        :type office: str
+        :return: The archived election
+        :rtype: ArchivedElection
+        """
+        row = self.connection.execute("SELECT certified, winner, no_confidence_last, candidates, rounds, registry, store, store_hash FROM elections"
+                                      " WHERE year = ? AND office = ?", (year, office)).fetchone()
+        if row is None:
+            raise KeyError(f"No {year} {office} election in the archive.")
+        certified, winner, no_confidence_last, candidates, rounds, registry, filename, store_hash = row
+        with np.load(os.path.join(self.directory, filename), allow_pickle=False) as data:
+            store = store_from_arrays(data)
+        if store.digest() != store_hash:
+            raise ValueError(f"The archived ballots of the {year} {office} election do not match their digest.")
+        return ArchivedElection(year, office, certified, store, json.loads(candidates), json.loads(rounds), winner, bool(no_confidence_last),
+                                CandidateRegistry.from_dict(json.loads(registry)) if registry else None)
+
+    def tallies(self, office: str = None, years: list[int] = None, last: int = None, round: int = 1, by: list[str] = ("school",)):
+        """
+        Returns the number of ballots counting for each candidate, from the precomputed tallies.
+
+        :param office: Only include elections for this office (optional)
+        :type office: str or None
+        :param years: Only include elections held in these years (optional)
+        :type years: list[int] or None
+        :param last: Only include the elections of the last `last` years in the archive (optional)
+        :type last: int or None
+        :param round: The round to count (1 for first choices), or None for each election's final round
+        :type round: int or None
+        :param by: Fields to break the tallies down by ('school' and/or 'grad_year')
+        :type by: list[str]
+        :return: A dataframe with a row per election (year, office) and group, and a column per candidate
+        :rtype: pd.DataFrame
+        """
+        import pandas as pd
+
+        by = [by] if isinstance(by, str) else list(by)
+        for field in by:
+            if field not in GROUPS:
+                raise ValueError(f"Cannot break tallies down by '{field}' (expected one of {', '.join(GROUPS)}).")
+        columns = ["e.year", "e.office"] + [f"t.{GROUPS[field]}" for field in by]
+        conditions, parameters = ["t.candidate IS NOT NULL"], []
+        if round is None:
+            conditions.append("t.round = e.last_round")
+        else:
+            conditions.append("t.round = ?")
+            parameters.append(round)
+        if office is not None:
+            conditions.append("e.office = ?")
+            parameters.append(office)
+        if years is not None:
+            conditions.append(f"e.year IN ({', '.join('?' * len(years))})")
+            parameters.extend(years)
+        if last is not None:
+            recent = "SELECT DISTINCT year FROM elections" + (" WHERE office = ?" if office is not None else "") + " ORDER BY year DESC LIMIT ?"
+            conditions.append(f"e.year IN ({recent})")
+            parameters.extend(([office] if office is not None else []) + [last])
+        query = (f"SELECT {', '.join(columns)}, t.candidate, SUM(t.votes) FROM tallies t JOIN elections e ON e.id = t.election"
+                 f" WHERE {' AND '.join(conditions)} GROUP BY {', '.join(columns)}, t.candidate")
+        rows = self.connection.execute(query, parameters).fetchall()
+        index = ["year", "office"] + by
+        frame = pd.DataFrame(rows, columns=index + ["candidate", "votes"])
+        return frame.pivot_table(index=index, columns="candidate", values="votes", aggfunc="sum", fill_value=0).sort_index()
+
+    def shares(self, office: str = None, years: list[int] = None, last: int = None, round: int = 1, by: list[str] = ("school",)):
+        """
+        Returns each candidate's share of the votes for candidates (exhausted ballots are left out), from the precomputed tallies. With the defaults this is the first-choice share by school; see tallies() for the parameters.
+
+        :return: A dataframe with a row per election (year, office) and group, and a column per candidate, rows summing to 1
+        :rtype: pd.DataFrame
+        """
+        tallies = self.tallies(office, years, last, round, by)
+        return tallies.div(tallies.sum(axis=1).replace(0, 1), axis=0)
+
+def _group_tallies(election: Election, store: BallotStore):
+    # rows of (round, school, graduation year, candidate or None, ballots) for every round of the count
+    schools, school_index = np.unique(store.schools.astype(str), return_inverse=True)
+    years, year_index = np.unique(store.years, return_inverse=True)
+    n_candidates = len(election.candidates)
+    candidate_index = np.full(len(store.names), n_candidates, dtype=np.int64)
+    for i, candidate in enumerate(election.candidates):
+        if candidate in store.codes:
+            candidate_index[store.codes[candidate]] = i
+    group = (school_index.astype(np.int64) * len(years) + year_index) * (n_candidates + 1)
+    rows = []
+    for round in range(1, election.last_round + 1):
+        first = store.first_choices(store.eliminated_array(election.eliminated_before(round)), election.no_confidence_last)
+        counts = np.bincount(group + candidate_index[first], minlength=len(schools) * len(years) * (n_candidates + 1))
+        for key in np.flatnonzero(counts).tolist():
+            cell, candidate = divmod(key, n_candidates + 1)
+            school, year = divmod(cell, len(years))
+            rows.append((round, str(schools[school]), int(years[year]), election.candidates[candidate] if candidate < n_candidates else None, int(counts[key])))
+    return rows
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="Archive certified elections and compare results across years.")
+    parser.add_argument("-d", "--archive-dir", default=ARCHIVE_DIR, help=f"archive directory (default: {ARCHIVE_DIR})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="count a CSV export and archive the election")
+    add.add_argument("file", help="CSV export of the election")
+    add.add_argument("--year", type=int, required=True, help="year the election was held")
+    add.add_argument("--office", required=True, help="the office elected")
+    add.add_argument("--no-asg", dest="asg", action="store_false", help="do not read the file with the ASG schema")
+    add.add_argument("--no-confidence-last", action="store_true", help="ignore choices ranked after 'No Confidence'")
+    add.add_argument("--bulk-elimination", action="store_true", help="eliminate all candidates who can no longer win in the same round")
+    add.add_argument("--replace", action="store_true", help="replace an archived election of the same year and office")
+    listing = commands.add_parser("list", help="list the archived elections")
+    listing.add_argument("--office", help="only list elections for this office")
+    shares = commands.add_parser("shares", help="print vote shares across elections")
+    shares.add_argument("--office", help="only include elections for this office")
+    shares.add_argument("--years", type=int, nargs="+", help="only include elections held in these years")
+    shares.add_argument("--last", type=int, help="only include the elections of the last N years")
+    shares.add_argument("--round", default="1", help="round to compare, or 'final' (default: 1)")
+    shares.add_argument("--by", action="append", choices=list(GROUPS), help="break shares down by school or graduation year (repeatable, default: school)")
+    shares.add_argument("--votes", action="store_true", help="print vote counts instead of shares")
+    args = parser.parse_args(argv)
+
+    with ElectionArchive(args.archive_dir) as archive:
+        if args.command == "add":
+            from reader import read_election_data
+            from registry import NAMES_FILE
+            registry = CandidateRegistry.load(names_file=NAMES_FILE if args.asg else None)
+            voters, candidates = read_election_data(args.file, args.asg, registry=registry)
+            if voters is None:
+                print(f"{args.file}: could not read file")
+                return 1
+            election = Election(voters, candidates, args.no_confidence_last, args.bulk_elimination)
+            election.run_election()
+            try:
+                archive.add(election, args.year, args.office, registry, replace=args.replace)
+            except ValueError as e:
+                print(e)
+                return 1
+            print(f"Archived the {args.year} {args.office} election: {len(voters)} ballots, winner {election.winner}")
+        elif args.command == "list":
+            for entry in archive.elections(args.office):
+                print(f"{entry['year']} {entry['office']}: {entry['ballots']} ballots, winner {entry['winner']} in {entry['rounds']} rounds (certified {entry['certified']})")
+        else:
+            round = None if args.round == "final" else int(args.round)
+            query = archive.tallies if args.votes else archive.shares
+            print(query(args.office, args.years, args.last, round, args.by or ["school"]).to_string())
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,111 @@
+import os
+import threading
+
+import pygame
+
+FONT_FAMILY = 'Segoe UI'
+# name: (size, bold)
+FONTS = {
+    "header": (48, True),
+    "round": (36, True),
+    "name": (32, False),
+    "count": (32, False),
+    "percent": (32, True),
+    "debug": (18, False),
+}
+# name: (path, scale)
+IMAGES = {
+    "logo": (os.path.join("Assets", "Images", "logo.png"), 0.16),
+}
+MUSIC_PATH = os.path.join("Assets", "Music", "cnn.mp3")
+
+class AssetManager:
+    """
+    Loads the show's fonts, images and music on a background thread, so the files are read, decoded and scaled while the window is already up (e.g. during the OBS start delay) instead of on the render thread. Images are converted to the display format once, on first use, and are then ready to blit; fade them with set_alpha() rather than blending a copy every frame.
+    """
+    def __init__(self, font_family: str = FONT_FAMILY, fonts: dict = None, images: dict = None, music_path: str = MUSIC_PATH):
+        self.font_family = font_family
+        self.font_specs = FONTS if fonts is None else fonts
+        self.image_specs = IMAGES if images is None else images
+        self.music_path = music_path
+        self._fonts = {}
+        self._loaded_images = {}
+        self._images = {}
+        self._error = None
+        self._thread = None
+
+    def __str__(self):
+        return f"Asset Manager: {len(self.font_specs)} fonts, {len(self.image_specs)} images, {'ready' if self.ready else 'loading'}"
+
+    @property
+    def ready(self):
+        return self._thread is not None and not self._thread.is_alive()
+
+    def start(self):
+        """
+        Starts loading the assets in the background. pygame must be initialized first.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._load, daemon=True)
+            self._thread.start()
+
+    def wait(self):
+        """
+        Blocks until the assets are loaded, starting the loading if needed, and raises any error it hit.
+        """
+        self.start()
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def font(self, name: str):
+        """
+        Returns a loaded font, waiting for the loading to finish if needed.
+
+        :param name: Name of the font (see FONTS)
+        :type name: str
+        :return: The font
+        :rtype: pygame.font.Font
+        """
+        if name not in self._fonts:
+            self.wait()
+        return self._fonts[name]
+
+    def image(self, name: str):
+        """
+        Returns a scaled image in the display format, waiting for the loading to finish if needed. The display mode must be set.
+
+        :param name: Name of the image (see IMAGES)
+        :type name: str
+        :return: The image
+        :rtype: pygame.Surface
+        """
+        if name not in self._images:
+            self.wait()
+            self._images[name] = self._loaded_images[name].convert_alpha()
+        return self._images[name]
+
+    def play_music(self, loops: int = -1):
+        """
+        Plays the music, waiting for the loading to finish if needed.
+
+        :param loops: Number of repeats, -1 to loop forever
+        :type loops: int
+        """
+        self.wait()
+        if self.music_path is not None:
+            pygame.mixer.music.play(loops)
+
+    def _load(self):
+        try:
+            for name, (size, bold) in self.font_specs.items():
+                self._fonts[name] = pygame.font.SysFont(self.font_family, size, bold=bold)
+            for name, (path, scale) in self.image_specs.items():
+                image = pygame.image.load(path)
+                w, h = image.get_size()
+                self._loaded_images[name] = pygame.transform.smoothscale(image, (int(w * scale), int(h * scale))) if scale != 1 else image
+            if self.music_path is not None:
+                pygame.mixer.init()
+                pygame.mixer.music.load(self.music_path)
+        except Exception as e:
+            self._error = e
@@ -0,0 +1,245 @@
+import argparse
+import json
+
+import numpy as np
+
+from ballots import BallotStore
+
+class AuditTranscript:
+    """
+    Append-only record of how an election was counted: the ballot store hash, the tallies of each round, every tiebreak comparison with the rule that decided it, eliminations, transfers and the result. Records are written as JSON lines as they are added when a path is given.
+    """
+    def __init__(self, path: str = None):
+        self.path = path
+        self.records = []
+        self._file = open(path, "w", encoding="utf-8") if path is not None else None
+
+    def __str__(self):
+        return f"Audit Transcript: {len(self.records)} records"
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, type: str, **fields):
+        """
+        Appends a record to the transcript.
+
+        :param type: The record type ('header', 'round', 'tiebreak', 'elimination', 'transfer' or 'result')
+        :type type: str
+        :param fields: The record's fields; values must be JSON-serializable
+        """
+        record = {"type": type, **fields}
+        self.records.append(record)
+        if self._file is not None:
+            self._file.write(json.dumps(record, sort_keys=True, separators=(",", ":")) + "\n")
+            self._file.flush()
+
+    def close(self):
+        """
+        Closes the transcript file, if any.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        Reads a transcript written by a previous count.
+
+        :param path: Path to the JSON-lines transcript
+        :type path: str
+        :return: The transcript (not open for writing)
+        :rtype: AuditTranscript
+        """
+        transcript = cls()
+        with open(path, "r", encoding="utf-8") as f:
+            transcript.records = [json.loads(line) for line in f if line.strip()]
+        return transcript
+
+def verify_transcript(transcript, store: BallotStore):
+    """
+    Re-verifies a transcript against a ballot store. The first round is counted in full; after that only the ballots of the candidates eliminated in each round are moved to their next choice, so every recorded tally, transfer, tiebreak count, elimination and the result are checked without recounting every round.
+
+    :param transcript: The transcript, or its records
+    :type transcript: AuditTranscript or list[dict]
+    :param store: The ballots the count is claimed to be based on
+    :type store: BallotStore
+    :return: A description of each problem found; empty if the transcript is verified
+    :rtype: list[str]
+    """
+    records = list(transcript)
+    if not records or records[0].get("type") != "header":
+        return ["Transcript does not start with a header record."]
+    header = records[0]
+    problems = []
+    if header["store_hash"] != store.digest():
+        problems.append("Ballot store hash does not match the transcript.")
+    if header["ballots"] != len(store):
+        problems.append(f"Transcript counts {header['ballots']} ballots, the store has {len(store)}.")
+    if problems:
+        return problems
+
+    candidates = header["candidates"]
+    no_confidence_last = header["no_confidence_last"]
+    codes = {candidate: store.codes.get(candidate) for candidate in candidates}
+    eliminated = []
+    choices = np.array(store.first_choices(store.eliminated_array(eliminated), no_confidence_last), dtype=np.int64)
+    tally = np.bincount(choices, minlength=len(store.names))
+    tallies = {}
+    transfers = {}
+    steps = []
+    rank_counts = {}
+    before_round = {}
+    # (round, eliminated) of each tiebreak comparison, checked against the elimination order with the result
+    compared = []
+    groups = []
+    # eliminations of the current round, applied when the next record after them is reached
+    pending = []
+
+    def continuing():
+        return {c: int(tally[codes[c]]) if codes[c] is not None else 0 for c in candidates if c not in eliminated}
+
+    def check_eliminations():
+        round = pending[0]["round"]
+        group = [record["candidate"] for record in pending]
+        rules = {record["rule"] for record in pending}
+        lowest = min(tallies.values()) if tallies else 0
+        at_lowest = [c for c, votes in tallies.items() if votes == lowest]
+        if rules == {"defeated"}:
+            others = [votes for c, votes in tallies.items() if c not in group]
+            if len(group) < 2 or any(c not in tallies for c in group) or not others or sum(tallies[c] for c in group) >= min(others):
+                problems.append(f"Round {round}: {', '.join(group)} are not defeated by the next-lowest candidate.")
+        elif len(pending) > 1:
+            problems.append(f"Round {round}: {', '.join(group)} were eliminated in one round without the 'defeated' rule.")
+        elif pending[0]["rule"] == "fewest_votes":
+            if at_lowest != group:
+                problems.append(f"Round {round}: {group[0]} does not have the fewest votes alone ({at_lowest}).")
+        elif not steps or group[0] not in at_lowest:
+            problems.append(f"Round {round}: {group[0]} was eliminated by {pending[0]['rule']} without a recorded tie for fewest votes.")
+        else:
+            counts = steps[-1]["counts"]
+            if [c for c, votes in counts.items() if votes == min(counts.values())] != group:
+                problems.append(f"Round {round}: the last tiebreak comparison does not single out {group[0]}.")
+        if any(votes > sum(tallies.values()) / 2 for votes in tallies.values()):
+            problems.append(f"Round {round}: a candidate had a majority, but the count continued.")
+
+        # move only the eliminated candidates' ballots, all at once
+        eliminated.extend(group)
+        groups.append(group)
+        flags = store.eliminated_array(eliminated)
+        for candidate in group:
+            rows = np.flatnonzero(choices == codes[candidate]) if codes[candidate] is not None else np.array([], dtype=np.int64)
+            moved = store.first_choices(flags, no_confidence_last, rows).astype(np.int64)
+            choices[rows] = moved
+            received = np.bincount(moved, minlength=len(store.names))
+            tally[:] += received
+            if codes[candidate] is not None:
+                tally[codes[candidate]] -= len(rows)
+            transfer = {c: int(received[codes[c]]) for c in candidates if codes[c] is not None and received[codes[c]]}
+            exhausted = len(rows) - sum(transfer.values())
+            if exhausted:
+                transfer["Exhausted"] = exhausted
+            transfers[candidate] = transfer
+        pending.clear()
+
+    for record in records[1:]:
+        kind = record.get("type")
+        if kind == "elimination":
+            if pending and record["round"] != pending[0]["round"]:
+                check_eliminations()
+            pending.append(record)
+            continue
+        if pending:
+            check_eliminations()
+
+        if kind == "round":
+            tallies = continuing()
+            if record["round"] != len(groups) + 1:
+                problems.append(f"Round {record['round']} recorded after {len(groups)} rounds of eliminations.")
+            before_round[record["round"]] = list(eliminated)
+            if record["tallies"] != tallies:
+                problems.append(f"Round {record['round']}: tallies {record['tallies']} do not match the ballots {tallies}.")
+            if record["exhausted"] != len(store) - sum(tallies.values()):
+                problems.append(f"Round {record['round']}: {record['exhausted']} exhausted ballots recorded, {len(store) - sum(tallies.values())} found.")
+            steps = []
+
+        elif kind == "tiebreak":
+            # tiebreaks compare rank counts without the 'No Confidence' cutoff, like VoteCounter.eliminate_candidate
+            round = record["round"]
+            before = record["eliminated"] if "eliminated" in record else before_round.get(round, eliminated[:round - 1])
+            compared.append((round, before))
+            if tuple(before) not in rank_counts:
+                rank_counts[tuple(before)] = store.rank_counts(store.eliminated_array(before), False)
+            by_code = rank_counts[tuple(before)]
+            rank = record["rank"]
+            found = {c: int(by_code[codes[c], rank - 1]) if codes[c] is not None and rank <= by_code.shape[1] else 0 for c in record["counts"]}
+            if found != record["counts"]:
+                problems.append(f"Tiebreak on rank {rank} of round {round}: counts {record['counts']} do not match the ballots {found}.")
+            steps.append(record)
+
+        elif kind == "transfer":
+            transfer = transfers.pop(record["from"], None)
+            if transfer is None or record["to"] != transfer:
+                problems.append(f"Round {record['round']}: transfer from {record['from']} {record['to']} does not match the ballots {transfer}.")
+
+        elif kind == "result":
+            winner = record["winner"]
+            if record["eliminated"] != eliminated:
+                problems.append(f"Result lists eliminations {record['eliminated']}, the transcript records {eliminated}.")
+            for round, before in compared:
+                if eliminated[:len(before)] != before:
+                    problems.append(f"Tiebreak in round {round} compares counts after eliminating {before}, which is not a point in the elimination order.")
+            if record["reason"] == "majority":
+                if winner not in tallies or tallies[winner] <= sum(tallies.values()) / 2:
+                    problems.append(f"{winner} is declared the winner without a majority.")
+            elif record["reason"] == "last_remaining":
+                if [c for c in candidates if c not in eliminated] != [winner]:
+                    problems.append(f"{winner} is declared the winner but is not the last remaining candidate.")
+            return problems
+
+        else:
+            problems.append(f"Unknown record type {kind!r}.")
+
+    problems.append("Transcript has no result record.")
+    return problems
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="Verify an audit transcript against a 'Cats on Campus export.")
+    parser.add_argument("transcript", help="JSON-lines transcript written by tabulate_cli.py --transcript")
+    parser.add_argument("file", help="CSV export the count was made from")
+    parser.add_argument("--no-asg", dest="asg", action="store_false", help="do not read the file with the ASG schema")
+    parser.add_argument("--no-validate", dest="validate", action="store_false", help="read the export without validation (if the count was made that way)")
+    parser.add_argument("--compact-skipped", action="store_true", help="move choices up over skipped ranks (if the count was made that way)")
+    parser.add_argument("--start", help="only count ballots submitted at or after this time")
+    parser.add_argument("--end", help="only count ballots submitted at or before this time")
+    args = parser.parse_args(argv)
+
+    from reader import read_election_data, filter_by_time
+
+    transcript = AuditTranscript.load(args.transcript)
+    voters, _ = read_election_data(args.file, args.asg, validate=args.validate, compact_skipped=args.compact_skipped)
+    if voters is None:
+        return 1
+    voters = filter_by_time(voters, args.start, args.end)
+    header = transcript.records[0] if transcript.records else {}
+    store = BallotStore.from_voters(voters, header.get("candidates", []))
+
+    problems = verify_transcript(transcript, store)
+    for problem in problems:
+        print(problem)
+    if not problems:
+        print(f"Verified: {transcript.records[-1]['winner']} wins after {transcript.records[-1]['rounds']} rounds.")
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,650 @@
+import hashlib
+import itertools
+import json
+import numpy as np
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from classes import Voter
+
+EMPTY = 0   # code for an unranked slot
+
+# from_voters stores ballots in the ragged layout when there are at least this many ranks and at most this share of them are filled
+RAGGED_MIN_RANKS = 8
+RAGGED_MAX_FILL = 0.5
+
+# Process-wide table of candidate names; a name's code is its index
+CANDIDATE_NAMES = [None]
+CANDIDATE_CODES = {None: EMPTY}
+NO_CONFIDENCE_CODES = set()
+
+# Bumped whenever the choices of a Voter already copied into a store change, so stores built before the change can be detected
+_ballot_version = 0
+_store_ids = itertools.count(1)
+
+def candidate_code(name: str):
+    """
+    Returns the integer code for a candidate name, assigning a new code the first time a name is seen. Codes are never released, so only ballot ingest should assign them; lookups use CANDIDATE_CODES.get().
+
+    :param name: The candidate name, or None for an empty slot
+    :type name: str or None
+    :return: The candidate code
+    :rtype: int
+    """
+    code = CANDIDATE_CODES.get(name)
+    if code is None:
+        code = len(CANDIDATE_NAMES)
+        CANDIDATE_NAMES.append(name)
+        CANDIDATE_CODES[name] = code
+        if name.lower() == 'no confidence':
+            NO_CONFIDENCE_CODES.add(code)
+    return code
+
+def ballots_changed():
+    """
+    Records that ballots already copied into a ballot store were modified (e.g. by reader.remove_candidate). Ballot stores built before the change report is_current() == False; filling in the choices of new Voters does not count as a change.
+    """
+    global _ballot_version
+    _ballot_version += 1
+
+def eliminated_mask(eliminated):
+    """
+    Returns a bitmask with bit `code` set for every eliminated candidate. Names without a code are on no ballot and are skipped rather than registered. A bitmask passed in is returned unchanged, so callers can build it once per round.
+
+    :param eliminated: Eliminated candidate names, or a bitmask from a previous call
+    :type eliminated: list[str] or set[str] or frozenset[str] or int
+    :return: Bitmask of eliminated candidate codes
+    :rtype: int
+    """
+    if isinstance(eliminated, int):
+        return eliminated
+    mask = 0
+    for name in eliminated:
+        code = CANDIDATE_CODES.get(name)
+        if code is not None and code != EMPTY:
+            mask |= 1 << code
+    return mask
+
+class BallotStore:
+    """
+    Compact, integer-coded copy of a list of Voter objects. Choice slots are stored in a single rank matrix so that counts can be computed with NumPy instead of per-ballot Python loops.
+    """
+    def __init__(self, ranks: np.ndarray, names: list[str], schools: np.ndarray, years: np.ndarray, nc_cutoff: np.ndarray, key: tuple = None):
+        self.ranks = ranks
+        self.names = names
+        self.codes = {name: code for code, name in enumerate(names) if name is not None}
+        self.schools = schools
+        self.years = years
+        self.nc_cutoff = nc_cutoff
+        self._unique_ranks = None
+        # identifies this ballot set (and filter) in tally caches; None means "do not cache"
+        self.key = key
+        self.version = _ballot_version
+        self._filtered = {}
+
+    def __len__(self):
+        return self.ranks.shape[0]
+
+    def __str__(self):
+        return f"BallotStore: {len(self)} ballots, {self.ranks.shape[1]} ranks, {len(self.names) - 1} names"
+
+    @property
+    def n_ranks(self):
+        return self.ranks.shape[1]
+
+    @classmethod
+    def from_voters(cls, voters: list['Voter'], candidates: list[str], layout: str = "auto"):
+        """
+        Builds a ballot store from a list of Voter objects. Ballots keep the same candidate codes as the Voter objects. With layout 'auto', the ballots are kept in a RaggedBallotStore when most ballots rank only a few of many candidates (see RAGGED_MIN_RANKS and RAGGED_MAX_FILL).
+
+        :param voters: List of Voter objects
+        :type voters: list[Voter]
+        :param candidates: List of candidates
+        :type candidates: list[str]
+        :param layout: 'auto', 'dense' (rank matrix) or 'ragged' (flat choices and row offsets)
+        :type layout: str
+        :return: A ballot store holding the same ballots
+        :rtype: BallotStore
+        """
+        if layout not in ("auto", "dense", "ragged"):
+            raise ValueError(f"Unknown ballot layout '{layout}'.")
+        for candidate in candidates:
+            candidate_code(candidate)
+        n_ranks = max((voter.n_candidates for voter in voters), default=0)
+
+        if all(voter.n_candidates == n_ranks for voter in voters):
+            buffer = b''.join([voter.choices.tobytes() for voter in voters])
+            ranks = np.frombuffer(buffer, dtype=np.uint16).reshape(len(voters), n_ranks).copy()
+        else:
+            ranks = np.zeros((len(voters), n_ranks), dtype=np.uint16)
+            for row, voter in enumerate(voters):
+                ranks[row, :voter.n_candidates] = voter.choices
+
+        is_nc = np.isin(ranks, list(NO_CONFIDENCE_CODES))
+        nc_cutoff = np.where(is_nc.any(axis=1), is_nc.argmax(axis=1) + 1, n_ranks).astype(np.int16)
+        schools = np.array([voter.school for voter in voters], dtype=object)
+        years = np.array([voter.year for voter in voters], dtype=np.int32)
+        for voter in voters:
+            voter.stored = True
+
+        store = BallotStore(ranks, list(CANDIDATE_NAMES), schools, years, nc_cutoff, key=(next(_store_ids), None, None))
+        if layout == "ragged" or (layout == "auto" and n_ranks >= RAGGED_MIN_RANKS and _ranking_lengths(ranks).sum() <= RAGGED_MAX_FILL * ranks.size):
+            return store.to_ragged()
+        return store
+
+    @classmethod
+    def from_rankings(cls, rankings: list[list[str]], n_ranks: int = None):
+        """
+        Builds a ballot store directly from rankings of candidate names, e.g. ballots transcribed during an audit. None is an empty rank.
+
+        :param rankings: One list of candidate names per ballot, most preferred first
+        :type rankings: list[list[str]]
+        :param n_ranks: Number of ranks to keep (defaults to the longest ranking)
+        :type n_ranks: int or None
+        :return: A ballot store holding the rankings
+        :rtype: BallotStore
+        """
+        if n_ranks is None:
+            n_ranks = max((len(ranking) for ranking in rankings), default=0)
+        ranks = np.zeros((len(rankings), n_ranks), dtype=np.uint16)
+        for row, ranking in enumerate(rankings):
+            codes = [candidate_code(name) for name in ranking[:n_ranks]]
+            ranks[row, :len(codes)] = codes
+        is_nc = np.isin(ranks, list(NO_CONFIDENCE_CODES))
+        nc_cutoff = np.where(is_nc.any(axis=1), is_nc.argmax(axis=1) + 1, n_ranks).astype(np.int16)
+        schools = np.full(len(rankings), "N/A", dtype=object)
+        years = np.zeros(len(rankings), dtype=np.int32)
+        return cls(ranks, list(CANDIDATE_NAMES), schools, years, nc_cutoff, key=(next(_store_ids), None, None))
+
+    def is_current(self):
+        """
+        Returns False if the choices of any Voter copied into a ballot store have changed since this store was built.
+
+        :return: Whether the store still matches the ballots it was built from
+        :rtype: bool
+        """
+        return self.version == _ballot_version
+
+    def digest(self):
+        """
+        Returns a SHA-256 hex digest of the ballots that does not depend on the process-wide candidate codes, so the same export gives the same digest in any session.
+
+        :return: The digest
+        :rtype: str
+        """
+        used = np.unique(self.ranks)
+        used_names = sorted(self.names[code] for code in used.tolist() if code != EMPTY)
+        # recode by sorted name so the digest only depends on names and rank order
+        recode = np.zeros(len(self.names), dtype=np.uint16)
+        for i, name in enumerate(used_names, start=1):
+            recode[self.codes[name]] = i
+        h = hashlib.sha256()
+        h.update(json.dumps([list(self.ranks.shape), used_names]).encode("utf-8"))
+        h.update(np.ascontiguousarray(recode[self.ranks]).astype('<u2').tobytes())
+        return h.hexdigest()
+
+    def ballot(self, row: int):
+        """
+        Returns the codes ranked on one ballot, most preferred first. Trailing empty ranks may be left out.
+
+        :param row: The row of the ballot
+        :type row: int
+        :return: Candidate codes, EMPTY for an unranked slot
+        :rtype: np.ndarray
+        """
+        return self.ranks[row]
+
+    def to_ragged(self):
+        """
+        Returns the same ballots in the ragged layout, with the same key so cached tallies stay valid.
+
+        :return: The ragged ballot store
+        :rtype: RaggedBallotStore
+        """
+        lengths = _ranking_lengths(self.ranks)
+        choices = self.ranks[np.arange(self.n_ranks)[None, :] < lengths[:, None]]
+        offsets = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        store = RaggedBallotStore(choices, offsets, self.n_ranks, self.names, self.schools, self.years, self.nc_cutoff, key=self.key)
+        store.version = self.version
+        return store
+
+    def extend(self, other: 'BallotStore'):
+        """
+        Returns a new ballot store holding this store's ballots followed by another store's. The new store gets a new key, so cached tallies for either store are not reused.
+
+        :param other: The ballots to append
+        :type other: BallotStore
+        :return: The combined ballot store
+        :rtype: BallotStore
+        """
+        if isinstance(other, RaggedBallotStore):
+            return self.to_ragged().extend(other)
+        n_ranks = max(self.ranks.shape[1], other.ranks.shape[1])
+        ranks = np.zeros((len(self) + len(other), n_ranks), dtype=np.uint16)
+        ranks[:len(self), :self.ranks.shape[1]] = self.ranks
+        ranks[len(self):, :other.ranks.shape[1]] = other.ranks
+        # both name lists are snapshots of the same table, so the longer one covers both
+        names = max(self.names, other.names, key=len)
+        store = BallotStore(ranks, names, np.concatenate([self.schools, other.schools]), np.concatenate([self.years, other.years]),
+                            np.concatenate([self.nc_cutoff, other.nc_cutoff]), key=(next(_store_ids), None, None))
+        store.version = min(self.version, other.version)
+        return store
+
+    def filter_rows(self, school: str = None, year: int = None):
+        """
+        Returns the row indexes of ballots matching the given school and/or year.
+
+        :param school: The school to filter by (optional)
+        :type school: str or None
+        :param year: The year to filter by (optional)
+        :type year: int or None
+        :return: Row indexes of the matching ballots, or None if no filter is given
+        :rtype: np.ndarray or None
+        """
+        if school is None and year is None:
+            return None
+        mask = np.ones(len(self), dtype=bool)
+        if school is not None:
+            mask &= self.schools == school
+        if year is not None:
+            mask &= self.years == year
+        return np.flatnonzero(mask)
+
+    def subset(self, rows: np.ndarray):
+        """
+        Returns a ballot store holding only the given rows.
+
+        :param rows: Row indexes (or a boolean mask) of the ballots to keep
+        :type rows: np.ndarray
+        :return: A ballot store with the selected ballots
+        :rtype: BallotStore
+        """
+        return BallotStore(self.ranks[rows], self.names, self.schools[rows], self.years[rows], self.nc_cutoff[rows])
+
+    def filter(self, school: str = None, year: int = None):
+        """
+        Returns a ballot store holding only the ballots matching the given school and/or year.
+
+        :param school: The school to filter by (optional)
+        :type school: str or None
+        :param year: The year to filter by (optional)
+        :type year: int or None
+        :return: This store if no filter is given, otherwise a filtered copy (kept for reuse)
+        :rtype: BallotStore
+        """
+        if school is None and year is None:
+            return self
+        filtered = self._filtered.get((school, year))
+        if filtered is None:
+            filtered = self.subset(self.filter_rows(school, year))
+            if self.key is not None:
+                filtered.key = (self.key[0], school, year)
+            filtered.version = self.version
+            self._filtered[(school, year)] = filtered
+        return filtered
+
+    def eliminated_array(self, eliminated):
+        """
+        Returns a boolean array indexed by candidate code that is True for eliminated candidates.
+
+        :param eliminated: Eliminated candidate names
+        :type eliminated: list[str] or frozenset[str]
+        :return: Eliminated flag for every code in this store
+        :rtype: np.ndarray
+        """
+        flags = np.zeros(len(self.names), dtype=bool)
+        for name in eliminated:
+            code = self.codes.get(name)
+            if code is not None:
+                flags[code] = True
+        return flags
+
+    def unique_ranks(self):
+        """
+        Returns the rank matrix with repeated candidates blanked out, keeping each candidate's highest rank.
+
+        :return: Rank matrix of shape (ballots, ranks)
+        :rtype: np.ndarray
+        """
+        if self._unique_ranks is None:
+            ranks = self.ranks.copy()
+            for i in range(1, ranks.shape[1]):
+                repeated = (ranks[:, :i] == ranks[:, i:i+1]).any(axis=1)
+                ranks[repeated, i] = EMPTY
+            self._unique_ranks = ranks
+        return self._unique_ranks
+
+    def considered_ranks(self, no_confidence_last: bool = False):
+        """
+        Returns the rank matrix with repeated candidates and (if no_confidence_last is True) choices after 'No Confidence' blanked out.
+
+        :param no_confidence_last: If True, no choices after 'No Confidence' will be considered
+        :type no_confidence_last: bool
+        :return: Rank matrix of shape (ballots, ranks)
+        :rtype: np.ndarray
+        """
+        ranks = self.unique_ranks()
+        if no_confidence_last:
+            ranks = np.where(np.arange(ranks.shape[1])[None, :] < self.nc_cutoff[:, None], ranks, EMPTY).astype(ranks.dtype)
+        return ranks
+
+    def first_choices(self, eliminated: np.ndarray, no_confidence_last: bool = False, rows: np.ndarray = None):
+        """
+        Returns the code each ballot counts for, following Voter.count_vote: the first choice that is not eliminated, where an empty rank ends the ballot. Exhausted ballots get EMPTY.
+
+        :param eliminated: Eliminated flag for every code (see eliminated_array)
+        :type eliminated: np.ndarray
+        :param no_confidence_last: If True, no choices after 'No Confidence' will be considered
+        :type no_confidence_last: bool
+        :param rows: Only resolve these ballots, e.g. the ballots of a candidate who was just eliminated (optional)
+        :type rows: np.ndarray or None
+        :return: One code per ballot (per row in rows if given)
+        :rtype: np.ndarray
+        """
+        ranks = self.ranks if rows is None else self.ranks[rows]
+        nc_cutoff = self.nc_cutoff if rows is None else self.nc_cutoff[rows]
+        # EMPTY is never flagged as eliminated, so it stops the search like in count_vote
+        active = ~eliminated[ranks]
+        if no_confidence_last:
+            active &= np.arange(ranks.shape[1])[None, :] < nc_cutoff[:, None]
+        first = active.argmax(axis=1)
+        index = np.arange(len(ranks))
+        return np.where(active[index, first], ranks[index, first], EMPTY)
+
+    def tally(self, codes: np.ndarray):
+        """
+        Returns the number of ballots counting for each code.
+
+        :param codes: One code per ballot (see first_choices)
+        :type codes: np.ndarray
+        :return: Counts indexed by code
+        :rtype: np.ndarray
+        """
+        return np.bincount(codes, minlength=len(self.names))
+
+    def rank_counts(self, eliminated: np.ndarray, no_confidence_last: bool = False):
+        """
+        Returns how many ballots list each code at each rank after removing eliminated, repeated and empty choices, following Voter.count_choices.
+
+        :param eliminated: Eliminated flag for every code (see eliminated_array)
+        :type eliminated: np.ndarray
+        :param no_confidence_last: If True, no choices after 'No Confidence' will be included
+        :type no_confidence_last: bool
+        :return: Counts of shape (len(names), ranks) indexed by code and rank
+        :rtype: np.ndarray
+        """
+        ranks = self.considered_ranks(no_confidence_last)
+        n_ranks = ranks.shape[1]
+        keep = (ranks != EMPTY) & ~eliminated[ranks]
+        position = np.cumsum(keep, axis=1) - 1
+        flat = ranks[keep].astype(np.int64) * n_ranks + position[keep]
+        return np.bincount(flat, minlength=len(self.names) * n_ranks).reshape(len(self.names), n_ranks)
+
+    def ranking_depths(self, no_confidence_last: bool = False):
+        """
+        Returns the number of distinct candidates ranked on each ballot.
+
+        :param no_confidence_last: If True, no choices after 'No Confidence' will be counted
+        :type no_confidence_last: bool
+        :return: One depth per ballot
+        :rtype: np.ndarray
+        """
+        return (self.considered_ranks(no_confidence_last) != EMPTY).sum(axis=1)
+
+    def rank_positions(self, no_confidence_last: bool = False):
+        """
+        Returns a matrix giving the (0-based) rank at which each ballot placed each name. Unranked names get a position below every ranked one.
+
+        :param no_confidence_last: If True, no choices after 'No Confidence' will be considered
+        :type no_confidence_last: bool
+        :return: Position matrix of shape (ballots, len(names)); column 0 is unused
+        :rtype: np.ndarray
+        """
+        ranks = self.considered_ranks(no_confidence_last)
+        n_ballots, n_ranks = ranks.shape
+        positions = np.full((n_ballots, len(self.names)), n_ranks, dtype=np.int16)
+        ballot_idx = np.arange(n_ballots)
+        # walk ranks from last to first so the earliest rank wins
+        for i in range(n_ranks - 1, -1, -1):
+            positions[ballot_idx, ranks[:, i]] = i
+        positions[:, EMPTY] = n_ranks
+        return positions
+
+    def pairwise_counts(self, codes: list[int], no_confidence_last: bool = False, chunk_size: int = None):
+        """
+        Returns a matrix where entry [a, b] is the number of ballots ranking codes[a] above codes[b]. Unranked candidates are treated as ranked below every ranked candidate.
+
+        :param codes: Codes of the candidates to compare
+        :type codes: list[int]
+        :param no_confidence_last: If True, no choices after 'No Confidence' will be considered
+        :type no_confidence_last: bool
+        :param chunk_size: Number of ballots compared at once (optional)
+        :type chunk_size: int or None
+        :return: Matrix of shape (len(codes), len(codes))
+        :rtype: np.ndarray
+        """
+        positions = self.rank_positions(no_confidence_last)[:, codes]
+        n = len(codes)
+        if chunk_size is None:
+            # keep each broadcast block around 16M comparisons
+            chunk_size = max(1, (1 << 24) // max(1, n * n))
+
+        counts = np.zeros((n, n), dtype=np.int64)
+        for start in range(0, positions.shape[0], chunk_size):
+            block = positions[start:start + chunk_size]
+            counts += (block[:, :, None] < block[:, None, :]).sum(axis=0)
+        return counts
+
+class RaggedBallotStore(BallotStore):
+    """
+    Ballot store in compressed sparse row layout: the choices of all ballots in one flat array, with ballot i's choices at choices[offsets[i] - offsets[0]:offsets[i + 1] - offsets[0]]. offsets[0] is 0 unless the store is a window of a larger one (see subset), whose arrays it shares. Trailing empty ranks are not stored, so memory and scans scale with the number of choices actually made instead of ballots x candidates. Counts are the same as for the rank matrix it replaces; `ranks` is still available but builds the full matrix.
+    """
+    def __init__(self, choices: np.ndarray, offsets: np.ndarray, n_ranks: int, names: list[str], schools: np.ndarray, years: np.ndarray, nc_cutoff: np.ndarray, key: tuple = None):
+        self.choices = choices
+        self.offsets = offsets
+        self.width = n_ranks
+        self.names = names
+        self.codes = {name: code for code, name in enumerate(names) if name is not None}
+        self.schools = schools
+        self.years = years
+        self.nc_cutoff = nc_cutoff
+        self._unique_ranks = None
+        self._unique_choices = None
+        self._entry_rows = None
+        self._entry_positions = None
+        self.key = key
+        self.version = _ballot_version
+        self._filtered = {}
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __str__(self):
+        return f"RaggedBallotStore: {len(self)} ballots, {len(self.choices)} choices, {self.width} ranks, {len(self.names) - 1} names"
+
+    @property
+    def n_ranks(self):
+        return self.width
+
+    @property
+    def ranks(self):
+        rows, positions = self._entries()
+        ranks = np.zeros((len(self), self.width), dtype=np.uint16)
+        ranks[rows, positions] = self.choices
+        return ranks
+
+    def _entries(self):
+        # ballot row and (0-based) rank of every stored choice
+        if self._entry_rows is None:
+            self._entry_rows = np.repeat(np.arange(len(self), dtype=np.int32 if len(self) < 2**31 else np.int64), np.diff(self.offsets))
+            self._entry_positions = (np.arange(self.offsets[0], self.offsets[-1], dtype=np.int64) - self.offsets[self._entry_rows]).astype(np.int16)
+        return self._entry_rows, self._entry_positions
+
+    def _row_sums(self, flags: np.ndarray):
+        totals = np.zeros(len(flags) + 1, dtype=np.int64)
+        np.cumsum(flags, out=totals[1:])
+        return totals[self.offsets[1:] - self.offsets[0]] - totals[self.offsets[:-1] - self.offsets[0]]
+
+    def ballot(self, row: int):
+        return self.choices[self.offsets[row] - self.offsets[0]:self.offsets[row + 1] - self.offsets[0]]
+
+    def to_ragged(self):
+        return self
+
+    def to_dense(self):
+        """
+        Returns the same ballots as a rank matrix store, with the same key.
+
+        :return: The dense ballot store
+        :rtype: BallotStore
+        """
+        store = BallotStore(self.ranks, self.names, self.schools, self.years, self.nc_cutoff, key=self.key)
+        store.version = self.version
+        return store
+
+    def extend(self, other: BallotStore):
+        other = other.to_ragged()
+        offsets = np.concatenate([self.offsets - self.offsets[0], other.offsets[1:] - other.offsets[0] + self.offsets[-1] - self.offsets[0]])
+        names = max(self.names, other.names, key=len)
+        store = RaggedBallotStore(np.concatenate([self.choices, other.choices]), offsets, max(self.width, other.width), names,
+                                  np.concatenate([self.schools, other.schools]), np.concatenate([self.years, other.years]),
+                                  np.concatenate([self.nc_cutoff, other.nc_cutoff]), key=(next(_store_ids), None, None))
+        store.version = min(self.version, other.version)
+        return store
+
+    def subset(self, rows: np.ndarray):
+        if isinstance(rows, slice) and rows.step in (None, 1):
+            # contiguous ballots are a window that shares this store's choices and offsets
+            start, stop, _ = rows.indices(len(self))
+            stop = max(start, stop)
+            choices = self.choices[self.offsets[start] - self.offsets[0]:self.offsets[stop] - self.offsets[0]]
+            return RaggedBallotStore(choices, self.offsets[start:stop + 1], self.width, self.names, self.schools[rows], self.years[rows], self.nc_cutoff[rows])
+        rows = np.arange(len(self))[rows]
+        lengths = np.diff(self.offsets)[rows]
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        # index of every kept choice in self.choices
+        entries = np.repeat(self.offsets[rows] - self.offsets[0] - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return RaggedBallotStore(self.choices[entries], offsets, self.width, self.names, self.schools[rows], self.years[rows], self.nc_cutoff[rows])
+
+    def unique_choices(self):
+        """
+        Returns the flat choice array with repeated candidates blanked out, keeping each candidate's highest rank.
+
+        :return: Choices in the same layout as self.choices
+        :rtype: np.ndarray
+        """
+        if self._unique_choices is None:
+            rows, _ = self._entries()
+            entry_keys = rows.astype(np.int64) * len(self.names) + self.choices
+            # stable sort keeps the choices of one ballot and candidate in rank order
+            order = np.argsort(entry_keys, kind="stable")
+            sorted_keys = entry_keys[order]
+            repeated = np.zeros(len(self.choices), dtype=bool)
+            repeated[order[1:]] = sorted_keys[1:] == sorted_keys[:-1]
+            self._unique_choices = np.where(repeated, EMPTY, self.choices).astype(np.uint16)
+        return self._unique_choices
+
+    def considered_choices(self, no_confidence_last: bool = False):
+        """
+        Returns the flat choice array with repeated candidates and (if no_confidence_last is True) choices after 'No Confidence' blanked out.
+
+        :param no_confidence_last: If True, no choices after 'No Confidence' will be considered
+        :type no_confidence_last: bool
+        :return: Choices in the same layout as self.choices
+        :rtype: np.ndarray
+        """
+        choices = self.unique_choices()
+        if no_confidence_last:
+            rows, positions = self._entries()
+            choices = np.where(positions < self.nc_cutoff[rows], choices, EMPTY).astype(choices.dtype)
+        return choices
+
+    def unique_ranks(self):
+        if self._unique_ranks is None:
+            rows, positions = self._entries()
+            ranks = np.zeros((len(self), self.width), dtype=np.uint16)
+            ranks[rows, positions] = self.unique_choices()
+            self._unique_ranks = ranks
+        return self._unique_ranks
+
+    def first_choices(self, eliminated: np.ndarray, no_confidence_last: bool = False, rows: np.ndarray = None):
+        if rows is not None:
+            return self.subset(rows).first_choices(eliminated, no_confidence_last)
+        entry_rows, positions = self._entries()
+        active = ~eliminated[self.choices]
+        if no_confidence_last:
+            active &= positions < self.nc_cutoff[entry_rows]
+        # the first active choice of each ballot; ballots without one (or with all ranks left unstored) are exhausted
+        index = np.flatnonzero(active)
+        ballots = entry_rows[index]
+        first = np.ones(len(index), dtype=bool)
+        first[1:] = ballots[1:] != ballots[:-1]
+        result = np.zeros(len(self), dtype=np.uint16)
+        result[ballots[first]] = self.choices[index[first]]
+        return result
+
+    def rank_counts(self, eliminated: np.ndarray, no_confidence_last: bool = False):
+        choices = self.considered_choices(no_confidence_last)
+        keep = (choices != EMPTY) & ~eliminated[choices]
+        totals = np.zeros(len(choices) + 1, dtype=np.int64)
+        np.cumsum(keep, out=totals[1:])
+        # rank among the kept choices of the same ballot
+        entry_rows, _ = self._entries()
+        position = totals[1:] - totals[self.offsets[:-1] - self.offsets[0]][entry_rows] - 1
+        flat = choices[keep].astype(np.int64) * self.width + position[keep]
+        return np.bincount(flat, minlength=len(self.names) * self.width).reshape(len(self.names), self.width)
+
+    def ranking_depths(self, no_confidence_last: bool = False):
+        return self._row_sums(self.considered_choices(no_confidence_last) != EMPTY)
+
+    def rank_positions(self, no_confidence_last: bool = False):
+        choices = self.considered_choices(no_confidence_last)
+        rows, positions = self._entries()
+        ranked = choices != EMPTY
+        result = np.full((len(self), len(self.names)), self.width, dtype=np.int16)
+        # repeats are blanked, so each (ballot, candidate) pair is written once
+        result[rows[ranked], choices[ranked]] = positions[ranked]
+        return result
+
+def store_arrays(store: BallotStore):
+    """
+    Returns the arrays of a ballot store for saving with np.savez: the ranks (or the flat choices and offsets of a RaggedBallotStore), cutoffs, years and school codes, and a JSON 'store_meta' entry with the candidate name of every code, the school names and the number of ranks.
+
+    :param store: The ballots
+    :type store: BallotStore
+    :return: Arrays by name
+    :rtype: dict[str, np.ndarray]
+    """
+    school_names, school_codes = np.unique(store.schools.astype(str), return_inverse=True)
+    meta = {"names": list(store.names), "schools": school_names.tolist(), "n_ranks": store.n_ranks}
+    arrays = {"store_meta": np.array(json.dumps(meta)), "school_codes": school_codes.astype(np.int32), "years": store.years, "nc_cutoff": store.nc_cutoff}
+    if isinstance(store, RaggedBallotStore):
+        arrays.update(choices=store.choices, offsets=store.offsets)
+    else:
+        arrays["ranks"] = store.ranks
+    return arrays
+
+def store_from_arrays(data):
+    """
+    Rebuilds a ballot store from arrays written by store_arrays(), e.g. an opened .npz file. Candidate codes are per process, so the saved codes are mapped through their names; only names that appear on the ballots are registered.
+
+    :param data: Arrays by name
+    :type data: dict or np.lib.npyio.NpzFile
+    :return: The ballots, with this process's candidate codes
+    :rtype: BallotStore or RaggedBallotStore
+    """
+    meta = json.loads(str(data["store_meta"]))
+    used = np.zeros(len(meta["names"]), dtype=bool)
+    used[np.unique(data["choices"] if "choices" in data else data["ranks"])] = True
+    recode = np.array([candidate_code(name) if name is not None and used[code] else EMPTY for code, name in enumerate(meta["names"])], dtype=np.uint16)
+    schools = np.array(meta["schools"], dtype=object)[data["school_codes"]]
+    if "choices" in data:
+        return RaggedBallotStore(recode[data["choices"]], data["offsets"], meta["n_ranks"], list(CANDIDATE_NAMES), schools, data["years"], data["nc_cutoff"])
+    return BallotStore(recode[data["ranks"]], list(CANDIDATE_NAMES), schools, data["years"], data["nc_cutoff"])
+
+def _ranking_lengths(ranks: np.ndarray):
+    # number of ranks up to and including the last non-empty one on each ballot
+    filled = ranks != EMPTY
+    return np.where(filled.any(axis=1), ranks.shape[1] - filled[:, ::-1].argmax(axis=1), 0).astype(np.int64)
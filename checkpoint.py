@@ -0,0 +1,138 @@
+import json
+import os
+
+import numpy as np
+
+from ballots import BallotStore, store_arrays, store_from_arrays
+from classes import Voter
+
+# scenes of the show, in order
+SCENES = ["intro", "zero", "batches", "rounds", "final", "done"]
+
+class ShowState:
+    """
+    Where the election night show is: the current scene, the next batch of round 1 to show, the round and the step within it (0 for the results screen, then one per projection screen), the batch split plan, the per-round results once the full count has been made, and the NumPy RNG state that draws the batch waits.
+    """
+    def __init__(self, scene: str = "intro", batch: int = 0, round: int = 1, step: int = 0, split_indexes: list[int] = None,
+                 rounds: list[dict] = None, rng_state: tuple = None):
+        self.scene = scene
+        self.batch = batch
+        self.round = round
+        self.step = step
+        self.split_indexes = split_indexes
+        self.rounds = rounds
+        self.rng_state = rng_state
+
+    def __str__(self):
+        return f"Show State: {self.scene}, batch {self.batch}, round {self.round}, step {self.step}"
+
+    def to_dict(self):
+        """
+        Returns the state as a JSON-serializable dictionary.
+
+        :return: The state
+        :rtype: dict
+        """
+        rng_state = None
+        if self.rng_state is not None:
+            name, keys, pos, has_gauss, cached_gaussian = self.rng_state
+            rng_state = [name, np.asarray(keys).tolist(), int(pos), int(has_gauss), float(cached_gaussian)]
+        return {"scene": self.scene, "batch": self.batch, "round": self.round, "step": self.step,
+                "split_indexes": self.split_indexes, "rounds": self.rounds, "rng_state": rng_state}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """
+        Builds a state from a dictionary written by to_dict().
+
+        :param data: The state
+        :type data: dict
+        :return: The show state
+        :rtype: ShowState
+        """
+        rng_state = data.get("rng_state")
+        if rng_state is not None:
+            name, keys, pos, has_gauss, cached_gaussian = rng_state
+            rng_state = (name, np.array(keys, dtype=np.uint32), pos, has_gauss, cached_gaussian)
+        return cls(data["scene"], data["batch"], data["round"], data["step"], data.get("split_indexes"), data.get("rounds"), rng_state)
+
+    def advance(self, scene: str):
+        """
+        Moves the show to the start of a later scene.
+
+        :param scene: The scene to move to (see SCENES)
+        :type scene: str
+        """
+        if SCENES.index(scene) < SCENES.index(self.scene):
+            raise ValueError(f"Cannot go back from scene '{self.scene}' to '{scene}'.")
+        self.scene = scene
+
+class ShowCheckpoint:
+    """
+    Writes the show state together with the ballots and candidates to a single .npz file, replacing the previous checkpoint atomically so a crash while writing leaves the last one intact. The ballots are kept in their compact integer form, so resuming does not re-read the CSV export.
+    """
+    def __init__(self, path: str, store: BallotStore, candidates: list[str]):
+        self.path = path
+        self.arrays = store_arrays(store)
+        self.arrays["meta"] = np.array(json.dumps({"candidates": list(candidates)}))
+        self.saves = 0
+
+    def __str__(self):
+        return f"Show Checkpoint: {self.path}, {self.saves} saves"
+
+    def save(self, state: ShowState):
+        """
+        Writes a checkpoint of the show state. The NumPy RNG state is captured at the time of the call.
+
+        :param state: The show state
+        :type state: ShowState
+        """
+        if self.path is None:
+            return
+        state.rng_state = np.random.get_state()
+        temporary = self.path + ".tmp"
+        with open(temporary, "wb") as f:
+            np.savez(f, state=np.array(json.dumps(state.to_dict(), separators=(",", ":"))), **self.arrays)
+        os.replace(temporary, self.path)
+        self.saves += 1
+
+def load_checkpoint(path: str):
+    """
+    Reads a checkpoint written by ShowCheckpoint (including checkpoints from before the ballot arrays were written by ballots.store_arrays) and restores the NumPy RNG state it captured.
+
+    :param path: Path to the checkpoint
+    :type path: str
+    :return: The show state, the ballots (recoded to this process's candidate codes) and the candidates
+    :rtype: tuple[ShowState, BallotStore, list[str]]
+    """
+    with np.load(path, allow_pickle=False) as data:
+        state = ShowState.from_dict(json.loads(str(data["state"])))
+        meta = json.loads(str(data["meta"]))
+        if "store_meta" in data:
+            store = store_from_arrays(data)
+        else:
+            # earlier checkpoints kept the store's names, schools and number of ranks in "meta"
+            store = store_from_arrays(dict({name: data[name] for name in data.files}, store_meta=data["meta"]))
+    if state.rng_state is not None:
+        np.random.set_state(state.rng_state)
+    return state, store, meta["candidates"]
+
+def voters_from_store(store: BallotStore):
+    """
+    Rebuilds Voter objects from a ballot store, e.g. one loaded from a checkpoint. Voter IDs are row numbers and submission times are not kept.
+
+    :param store: The ballots
+    :type store: BallotStore
+    :return: One Voter per ballot
+    :rtype: list[Voter]
+    """
+    voters = []
+    codes = np.zeros(store.n_ranks, dtype=np.uint16)
+    for row in range(len(store)):
+        ballot = store.ballot(row)
+        codes[:] = 0
+        codes[:len(ballot)] = ballot
+        voter = Voter(row + 1, store.schools[row], int(store.years[row]), store.n_ranks)
+        voter.set_choices(codes.tolist())
+        voters.append(voter)
+    return voters
@@ -1,116 +1,303 @@
-import pandas as pd
 import numpy as np
-import copy
-from pprint import pprint
+from array import array
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from results import RoundCounts, ElectionResults, TabulationStats, MarginAnalysis
+from diagnostics import Diagnostics, UNKNOWN_VOTE, UNKNOWN_CHOICE, RANK_OVERFLOW, UNRESOLVED_TIE, ROUND_LIMIT
+from ballots import BallotStore, EMPTY, CANDIDATE_NAMES, NO_CONFIDENCE_CODES, candidate_code, eliminated_mask, ballots_changed
+
+if TYPE_CHECKING:
+    from audit import AuditTranscript
+    import pandas as pd
 
 class Voter:
     # n_candidates includes 'No Confidence' as a candidate
-    def __init__(self, voter_id: int, school: str, year: int, n_candidates: int, timestamp: pd.Timestamp = None):
+    # choices are stored as integer codes (see ballots.candidate_code); 0 is an empty slot
+    # nc_cutoff is the number of ranks up to and including the first 'No Confidence' choice
+    # stored is set once the ballot is copied into a BallotStore; only changes after that make stores stale
+    __slots__ = ('voter_id', 'school', 'year', 'n_candidates', 'timestamp', 'choices', 'nc_cutoff', 'stored')
+
+    def __init__(self, voter_id: int, school: str, year: int, n_candidates: int, timestamp: 'pd.Timestamp' = None):
         self.voter_id = voter_id
         self.school = school
         self.year = year
         self.n_candidates = n_candidates
         self.timestamp = timestamp
-        for i in range(1, n_candidates + 1):
-            setattr(self, f'choice_{i}', None)
+        self.choices = array('H', bytes(2 * n_candidates))
+        self.nc_cutoff = n_candidates
+        self.stored = False
 
     def __str__(self):
-        choices = [getattr(self, f'choice_{i}') for i in range(1, self.n_candidates + 1)]
+        choices = [CANDIDATE_NAMES[code] for code in self.choices]
         return f"Voter ID: {self.voter_id}, School: {self.school}, Year: {self.year}, Choices: {choices}"
-    
+
+    def __getattr__(self, name: str):
+        # keeps the old choice_1 ... choice_n attributes readable
+        if name.startswith('choice_') and name[7:].isdigit():
+            return self.get_choice(int(name[7:]))
+        raise AttributeError(f"'Voter' object has no attribute '{name}'")
+
+    def __reduce__(self):
+        # codes are only meaningful within one process, so pickle the names
+        choices = [CANDIDATE_NAMES[code] for code in self.choices]
+        return (_restore_voter, (self.voter_id, self.school, self.year, self.n_candidates, self.timestamp, choices))
+
     def set_choice(self, rank: int, candidate: str):
         if 1 <= rank <= self.n_candidates:
-            setattr(self, f'choice_{rank}', candidate)
+            code = candidate_code(candidate)
+            replaced = self.choices[rank - 1]
+            self.choices[rank - 1] = code
+            if code in NO_CONFIDENCE_CODES or replaced in NO_CONFIDENCE_CODES:
+                self.nc_cutoff = next((i + 1 for i, c in enumerate(self.choices) if c in NO_CONFIDENCE_CODES), self.n_candidates)
+            if self.stored:
+                ballots_changed()
         else:
             raise ValueError(f"Rank must be between 1 and {self.n_candidates}")
         
+    def set_choices(self, codes):
+        """
+        Sets all choices at once from candidate codes (0 for an empty rank), e.g. codes resolved by a CandidateRegistry at load time.
+        
+        :param self: Voter object
+        :param codes: One candidate code per rank
+        :type codes: list[int] or np.ndarray
+        """
+        if len(codes) != self.n_candidates:
+            raise ValueError(f"Expected {self.n_candidates} choices, got {len(codes)}")
+        self.choices = array('H', codes)
+        self.nc_cutoff = next((i + 1 for i, c in enumerate(self.choices) if c in NO_CONFIDENCE_CODES), self.n_candidates)
+        if self.stored:
+            ballots_changed()
+
     def get_choice(self, rank: int):
         if 1 <= rank <= self.n_candidates:
-            return getattr(self, f'choice_{rank}')
+            return CANDIDATE_NAMES[self.choices[rank - 1]]
         else:
             raise ValueError(f"Rank must be between 1 and {self.n_candidates}")
         
-    def count_vote(self, eliminated: list[str], no_confidence_last: bool = False):
+    def count_vote(self, eliminated, no_confidence_last: bool = False):
         """
-        Counts the vote for the voter based on their choices and the list of eliminated candidates. If no_confidence_last is True, no choices after 'No Confidence' will be considered.
+        Counts the vote for the voter based on their choices and the eliminated candidates. If no_confidence_last is True, no choices after 'No Confidence' will be considered.
         
         :param self: Voter object
-        :param eliminated: List of eliminated candidates
-        :type eliminated: list[str]
+        :param eliminated: Eliminated candidates, or a bitmask from ballots.eliminated_mask
+        :type eliminated: list[str] or frozenset[str] or int
         :param no_confidence_last: If True, no choices after 'No Confidence' will be considered
         :type no_confidence_last: bool
         :return: The candidate that the vote counts for, or None if no valid choices remain
         :rtype: str or None
         """
-        for i in range(1, self.n_candidates + 1):
-            choice = getattr(self, f'choice_{i}')
-            if choice not in eliminated:
-                return choice
-            if choice is not None:
-                if no_confidence_last and choice.lower() == 'no confidence':
-                    break
+        mask = eliminated_mask(eliminated)
+        choices = self.choices
+        # an empty slot (code 0) is never eliminated, so it ends the ballot
+        for i in range(self.nc_cutoff if no_confidence_last else self.n_candidates):
+            code = choices[i]
+            if not (mask >> code) & 1:
+                return CANDIDATE_NAMES[code]
         return None
     
-    def count_choices(self, eliminated: list[str], no_confidence_last: bool = False):
+    def count_choices(self, eliminated, no_confidence_last: bool = False):
         """
         Returns a list of the voter's choices in order of preference, excluding eliminated and duplicate candidates. If no_confidence_last is True, no choices after 'No Confidence' will be included.
         
         :param self: Voter object
-        :param eliminated: List of eliminated candidates
-        :type eliminated: list[str]
+        :param eliminated: Eliminated candidates, or a bitmask from ballots.eliminated_mask
+        :type eliminated: list[str] or frozenset[str] or int
         :param no_confidence_last: If True, no choices after 'No Confidence' will be included
         :type no_confidence_last: bool
         :return: A list of the voter's choices in order of preference
         :rtype: list[str]
         """
+        # empty slots, eliminated and already-listed candidates are all skipped via one mask
+        skip = eliminated_mask(eliminated) | 1
         choices = []
-        for i in range(1, self.n_candidates + 1):
-            choice = getattr(self, f'choice_{i}')
-            if choice is None:
-                continue
-            if choice not in eliminated and choice not in choices:
-                choices.append(choice)
-            if no_confidence_last and choice.lower() == 'no confidence':
-                break
+        for code in self.choices[:self.nc_cutoff] if no_confidence_last else self.choices:
+            if not (skip >> code) & 1:
+                choices.append(CANDIDATE_NAMES[code])
+                skip |= 1 << code
         return choices
 
+def _restore_voter(voter_id: int, school: str, year: int, n_candidates: int, timestamp, choices: list[str]):
+    voter = Voter(voter_id, school, year, n_candidates, timestamp)
+    for rank, choice in enumerate(choices, start=1):
+        voter.set_choice(rank, choice)
+    return voter
+
 class VoteCounter:
-    def __init__(self, candidates: list[str]):
+    def __init__(self, candidates: list[str], cache_size: int = 128, diagnostics: Diagnostics = None):
         self.candidates = candidates
         self.vote_counts = {candidate: 0 for candidate in candidates}
         self.choice_counts = {candidate: [0] * len(candidates) for candidate in candidates}
+        self.last_choices = None
+        self.tiebreak_steps = []
+        self.last_rule = None
+        # BallotStore tallies keyed by (kind, store key, eliminated, no_confidence_last), least recently used first
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # anomalies are aggregated here instead of printed from the counting loops
+        self.diagnostics = diagnostics if diagnostics is not None else Diagnostics()
 
     def __str__(self):
         return f"Vote Counts: {self.vote_counts}"
     
-    def count_votes(self, voters: list[Voter], eliminated: list[str], no_confidence_last: bool = False, reset_counts: bool = True):
+    def count_votes(self, voters: list[Voter], eliminated: list[str], no_confidence_last: bool = False, reset_counts: bool = True, round: int = None):
         """
-        Counts the votes for a list of voters based on their choices and the list of eliminated candidates. If no_confidence_last is True, no choices after 'No Confidence' will be considered.
+        Counts the votes for a list of voters based on their choices and the list of eliminated candidates. If no_confidence_last is True, no choices after 'No Confidence' will be considered. When given a BallotStore, the count is vectorized, the code each ballot counted for is kept in self.last_choices, and the result is cached per (ballot set, eliminated set, no_confidence_last) so repeated counts of the same round do not rescan the ballots.
         
         :param self: VoteCounter object
-        :param voters: List of Voter objects
-        :type voters: list[Voter]
+        :param voters: List of Voter objects, or a BallotStore
+        :type voters: list[Voter] or BallotStore
         :param eliminated: List of eliminated candidates
-        :type eliminated: list[str]
+        :type eliminated: list[str] or frozenset[str]
         :param no_confidence_last: If True, no choices after 'No Confidence' will be considered
         :type no_confidence_last: bool
         :param reset_counts: If True, resets the vote counts before counting
         :type reset_counts: bool
+        :param round: The round being counted, for diagnostics (defaults to one elimination per round)
+        :type round: int or None
         """
+        eliminated = frozenset(eliminated)
+        if round is None:
+            round = len(eliminated) + 1
         if reset_counts:
             self.vote_counts = {candidate: 0 for candidate in self.candidates if candidate not in eliminated}
             self.choice_counts = {candidate: [0] * len(self.candidates) for candidate in self.candidates if candidate not in eliminated}
-        
+
+        if isinstance(voters, BallotStore):
+            self.last_choices, tally, anomalies = self._cached(voters, ('votes', eliminated, no_confidence_last), lambda: self._count_store_votes(voters, eliminated, no_confidence_last))
+            for kind, detail, count in anomalies:
+                self.diagnostics.record(round, kind, detail, count)
+            for candidate in self.vote_counts:
+                self.vote_counts[candidate] += int(tally[voters.codes[candidate]])
+            return self.vote_counts
+
+        mask = eliminated_mask(eliminated)
+        unknown = {}
         for voter in voters:
-            choice = voter.count_vote(eliminated, no_confidence_last)
+            choice = voter.count_vote(mask, no_confidence_last)
             if choice in self.vote_counts:
                 self.vote_counts[choice] += 1
             elif choice is not None:
-                pass
-                # print(f"Warning: Choice '{choice}' not in candidates list.")
+                unknown[choice] = unknown.get(choice, 0) + 1
 
+        for choice, count in unknown.items():
+            self.diagnostics.record(round, UNKNOWN_VOTE, choice, count)
         return self.vote_counts
 
+    def tally_choices(self, voters: list[Voter], eliminated: list[str], no_confidence_last: bool = False, round: int = None):
+        """
+        Counts the number of votes for each candidate at each rank, excluding eliminated candidates, without building a dataframe. If no_confidence_last is True, no choices after 'No Confidence' will be included. Results for a BallotStore are cached like in count_votes().
+        
+        :param self: VoteCounter object
+        :param voters: List of Voter objects, or a BallotStore
+        :type voters: list[Voter] or BallotStore
+        :param eliminated: List of eliminated candidates
+        :type eliminated: list[str] or frozenset[str]
+        :param no_confidence_last: If True, no choices after 'No Confidence' will be included
+        :type no_confidence_last: bool
+        :param round: The round being counted, for diagnostics (defaults to one elimination per round)
+        :type round: int or None
+        :return: The number of votes for each candidate at each rank
+        :rtype: RoundCounts
+        """
+        eliminated = frozenset(eliminated)
+        remaining = [candidate for candidate in self.candidates if candidate not in eliminated]
+        n_ranks = max(0, len(self.candidates) - len(eliminated))
+        if round is None:
+            round = len(eliminated) + 1
+
+        if isinstance(voters, BallotStore):
+            round_counts, anomalies = self._cached(voters, ('choices', eliminated, no_confidence_last), lambda: self._tally_store_choices(voters, eliminated, remaining, n_ranks, no_confidence_last))
+            for kind, detail, count in anomalies:
+                self.diagnostics.record(round, kind, detail, count)
+            self.choice_counts = dict(zip(remaining, round_counts.counts.tolist()))
+            return round_counts
+
+        mask = eliminated_mask(eliminated)
+        row_of = {candidate: i for i, candidate in enumerate(remaining)}
+        counts = [[0] * n_ranks for _ in remaining]
+        overflow = {}
+        unknown = {}
+        
+        for voter in voters:
+            choices = voter.count_choices(mask, no_confidence_last)
+            for rank, choice in enumerate(choices):
+                row = row_of.get(choice)
+                if row is not None:
+                    if rank < n_ranks:
+                        counts[row][rank] += 1
+                    else:
+                        overflow[choice] = overflow.get(choice, 0) + 1
+                elif choice is not None:
+                    unknown[choice] = unknown.get(choice, 0) + 1
+
+        for choice, count in overflow.items():
+            self.diagnostics.record(round, RANK_OVERFLOW, choice, count)
+        for choice, count in unknown.items():
+            self.diagnostics.record(round, UNKNOWN_CHOICE, choice, count)
+        
+        self.choice_counts = dict(zip(remaining, counts))
+        return RoundCounts(remaining, np.array(counts, dtype=np.int64).reshape(len(remaining), n_ranks))
+
+    def _cached(self, store: BallotStore, query: tuple, compute):
+        if store.key is None or self.cache_size <= 0:
+            return compute()
+        key = (query[0], store.key, store.version) + query[1:]
+        value = self.cache.get(key)
+        if value is None:
+            self.cache_misses += 1
+            value = compute()
+            self.cache[key] = value
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        else:
+            self.cache_hits += 1
+            self.cache.move_to_end(key)
+        return value
+
+    def clear_cache(self):
+        """
+        Drops all cached BallotStore tallies.
+
+        :param self: VoteCounter object
+        """
+        self.cache.clear()
+
+    def _count_store_votes(self, store: BallotStore, eliminated: frozenset[str], no_confidence_last: bool):
+        choices = store.first_choices(store.eliminated_array(eliminated), no_confidence_last)
+        tally = store.tally(choices)
+        listed = {store.codes[candidate] for candidate in self.candidates}
+        anomalies = [(UNKNOWN_VOTE, store.names[code], int(tally[code])) for code in np.flatnonzero(tally) if code != EMPTY and code not in listed]
+        # cached arrays are shared between calls
+        choices.setflags(write=False)
+        tally.setflags(write=False)
+        return choices, tally, anomalies
+
+    def _tally_store_choices(self, store: BallotStore, eliminated: frozenset[str], remaining: list[str], n_ranks: int, no_confidence_last: bool):
+        by_code = store.rank_counts(store.eliminated_array(eliminated), no_confidence_last)
+        counts = np.zeros((len(remaining), n_ranks), dtype=np.int64)
+        width = min(n_ranks, by_code.shape[1])
+        remaining_codes = [store.codes[candidate] for candidate in remaining]
+        counts[:, :width] = by_code[remaining_codes, :width]
+
+        # anomalies are cached with the counts so a cache hit reports them again
+        anomalies = []
+        for candidate, code in zip(remaining, remaining_codes):
+            overflow = int(by_code[code, n_ranks:].sum())
+            if overflow:
+                anomalies.append((RANK_OVERFLOW, candidate, overflow))
+        listed = set(remaining_codes) | {store.codes[c] for c in eliminated if c in store.codes}
+        totals = by_code.sum(axis=1)
+        for code in np.flatnonzero(totals):
+            if code != EMPTY and code not in listed:
+                anomalies.append((UNKNOWN_CHOICE, store.names[code], int(totals[code])))
+
+        counts.setflags(write=False)
+        return RoundCounts(remaining, counts), anomalies
+
     def count_choices(self, voters: list[Voter], eliminated: list[str], no_confidence_last: bool = False):
         """
         Returns a dataframe with the number of votes for each candidate at each rank, excluding eliminated candidates. If no_confidence_last is True, no choices after 'No Confidence' will be included.
@@ -119,53 +306,45 @@ class VoteCounter:
         :param voters: List of Voter objects
         :type voters: list[Voter]
         :param eliminated: List of eliminated candidates
-        :type eliminated: list[str]
+        :type eliminated: list[str] or frozenset[str]
         :param no_confidence_last: If True, no choices after 'No Confidence' will be included
         :type no_confidence_last: bool
         :return: A dataframe with the number of votes for each candidate at each rank
         :rtype: pd.DataFrame
         """
-        choice_counts = {candidate: [0] * (len(self.candidates) - len(eliminated)) for candidate in self.candidates if candidate not in eliminated}
-        
-        for voter in voters:
-            choices = voter.count_choices(eliminated, no_confidence_last)
-            for rank, choice in enumerate(choices, start=1):
-                if choice in choice_counts:
-                    try:
-                        choice_counts[choice][rank-1] += 1
-                    except IndexError:
-                        print(f"Warning: Rank {rank} for choice '{choice}' exceeds the number of candidates. Voter ID: {voter.voter_id}")
-                elif choice is not None:
-                    pass
-                    print(f"Warning: Choice '{choice}' not in candidates list.")
-        
-        self.choice_counts = choice_counts
+        return self.tally_choices(voters, eliminated, no_confidence_last).to_frame()
 
-        df = pd.DataFrame(choice_counts, index=[f'Rank {i}' for i in range(1, len(self.candidates) - len(eliminated) + 1)])
-        df = df.transpose()
-        df = df.sort_values(by='Rank 1', ascending=False)
-        return df
-
-    def eliminate_candidate(self, voters: list[Voter], prev_eliminated: list[str] = None):
+    def eliminate_candidate(self, voters: list[Voter], prev_eliminated: list[str] = None, rounds: list[list[str]] = None, round_numbers: list[int] = None):
         """
-        Returns the candidate with the fewest votes to be eliminated. In case of a tie, follow the tiebreaker rules.
+        Returns the candidate with the fewest votes to be eliminated. In case of a tie, follow the tiebreaker rules. The comparisons made are kept in self.tiebreak_steps and the rule that decided in self.last_rule.
         
         :param self: VoteCounter object
         :param voters: List of Voter objects
         :type voters: list[Voter]
         :param prev_eliminated: List of previously eliminated candidates for tiebreaker rules
         :type prev_eliminated: list[str]
+        :param rounds: The candidates eliminated before each round so far, for when a round can eliminate more than one candidate (defaults to one elimination per round)
+        :type rounds: list[list[str]]
+        :param round_numbers: The round each entry of rounds was counted in, for the tiebreak steps and diagnostics (defaults to 1, 2, ...)
+        :type round_numbers: list[int]
         :return: The candidate with the fewest votes
         :rtype: str
         """
         assert all(candidate not in self.vote_counts for candidate in (prev_eliminated or [])), "Eliminated candidates should not be in vote counts."
 
-        round = len(prev_eliminated) + 1 if prev_eliminated is not None else 1
+        if rounds is None:
+            rounds = [(prev_eliminated or [])[:i] for i in range(len(prev_eliminated or []) + 1)]
+        round = len(rounds)
+        if round_numbers is None:
+            round_numbers = list(range(1, round + 1))
+        self.tiebreak_steps = []
+        self.last_rule = None
 
         min_votes = min(self.vote_counts.values())
         candidates_with_min_votes = [candidate for candidate, votes in self.vote_counts.items() if votes == min_votes and candidate not in (prev_eliminated or [])]
         
         if len(candidates_with_min_votes) == 1:
+            self.last_rule = "fewest_votes"
             return candidates_with_min_votes[0]
         
         """
@@ -180,7 +359,7 @@ class VoteCounter:
         7. In a tie for elimination, eliminate the remaining tied candidates. In a tie for victory, there will be a runoff.        
         """
         # choices for current round
-        self.count_choices(voters, prev_eliminated or [])
+        self.tally_choices(voters, prev_eliminated or [], round=round_numbers[-1])
         for choice_rank in range(2, len(self.candidates) + 1):
             # Only consider candidates with enough ranks
             valid_candidates = [c for c in candidates_with_min_votes if choice_rank-1 < len(self.choice_counts[c])]
@@ -188,6 +367,7 @@ class VoteCounter:
                 continue
             min_choice_votes = min(self.choice_counts[c][choice_rank-1] for c in valid_candidates)
             candidates_with_min_choice_votes = [c for c in valid_candidates if self.choice_counts[c][choice_rank-1] == min_choice_votes]
+            self._tiebreak_step("current_round", round_numbers[-1], choice_rank, valid_candidates, prev_eliminated or [])
             if len(candidates_with_min_choice_votes) == 1:
                 return candidates_with_min_choice_votes[0]
             candidates_with_min_votes = candidates_with_min_choice_votes
@@ -195,80 +375,247 @@ class VoteCounter:
         # choices for previous rounds
         for choice_rank in range(1, len(self.candidates) + 1):
             for prev_round in range(round - 1, 0, -1):
-                self.count_choices(voters, prev_eliminated[:prev_round] or [])
+                self.tally_choices(voters, rounds[prev_round], round=round_numbers[prev_round])
                 # Only consider candidates with enough ranks
                 valid_candidates = [c for c in candidates_with_min_votes if choice_rank-1 < len(self.choice_counts[c])]
                 if not valid_candidates:
                     continue
                 min_choice_votes = min(self.choice_counts[c][choice_rank-1] for c in valid_candidates)
                 candidates_with_min_choice_votes = [c for c in valid_candidates if self.choice_counts[c][choice_rank-1] == min_choice_votes]
+                self._tiebreak_step("previous_round", round_numbers[prev_round], choice_rank, valid_candidates, rounds[prev_round])
                 if len(candidates_with_min_choice_votes) == 1:
                     return candidates_with_min_choice_votes[0]
                 candidates_with_min_votes = candidates_with_min_choice_votes
         
         # If still tied, return None for now
+        self.last_rule = "unresolved"
         return None
 
+    def _tiebreak_step(self, rule: str, round: int, rank: int, tied: list[str], eliminated: list[str]):
+        # eliminated are the candidates out before the counts compared, which bulk elimination can put in the middle of a round
+        self.last_rule = rule
+        self.tiebreak_steps.append({"rule": rule, "round": round, "rank": rank, "eliminated": list(eliminated),
+                                    "counts": {c: self.choice_counts[c][rank-1] for c in tied}})
+
+def defeated_candidates(vote_counts: dict[str, int]):
+    """
+    Returns the largest group of two or more lowest candidates whose combined votes are fewer than the votes of the next-lowest candidate. Transfers among them can never lift any of them above that candidate, so eliminating them one at a time would eliminate all of them (in some order) before anyone else, and they can be eliminated in one round.
+
+    :param vote_counts: Votes of each continuing candidate
+    :type vote_counts: dict[str, int]
+    :return: The defeated candidates from fewest votes up (ties in candidate order), or an empty list if there is no such group
+    :rtype: list[str]
+    """
+    ordered = sorted(vote_counts, key=lambda c: vote_counts[c])
+    defeated = []
+    total = 0
+    for k, candidate in enumerate(ordered[:-1], start=1):
+        total += vote_counts[candidate]
+        if k > 1 and total < vote_counts[ordered[k]]:
+            defeated = ordered[:k]
+    return defeated
+
 class Election:
-    def __init__(self, voters: list[Voter], candidates: list[str], no_confidence_last: bool = False):
+    def __init__(self, voters: list[Voter], candidates: list[str], no_confidence_last: bool = False, bulk_elimination: bool = False):
         self.voters = voters
         self.candidates = candidates
         self.no_confidence_last = no_confidence_last
+        # eliminate every mathematically defeated candidate in one round (see defeated_candidates)
+        self.bulk_elimination = bulk_elimination
         self.vote_counter = VoteCounter(candidates)
+        self.diagnostics = self.vote_counter.diagnostics
         self.eliminated_candidates = []
+        # the candidates eliminated at the end of each round, in elimination order
+        self.round_eliminations = []
+        # (round, candidates eliminated before) of each count the tiebreaks look back on; with bulk elimination a round holds one per defeated candidate, as if they were eliminated one at a time
+        self.sequential_rounds = []
         self.last_round = 0
         self.winner = None
+        self.ballot_store = None
+        self.stats = None
+
+    def add_voters(self, voters: list[Voter]):
+        """
+        Adds a batch of ballots to the election. Call run_election() again to recount.
+
+        :param self: Election object
+        :param voters: List of Voter objects to add
+        :type voters: list[Voter]
+        """
+        self.voters.extend(voters)
+        if self.ballot_store is not None and len(self.ballot_store) + len(voters) == len(self.voters):
+            self.ballot_store = self.ballot_store.extend(BallotStore.from_voters(voters, self.candidates))
 
-    def run_election(self):
+    def run_election(self, transcript: 'AuditTranscript' = None, workers: int = 1):
         """
-        Runs the election using the RCV method until a winner is determined.
+        Runs the election using the RCV method until a winner is determined. Exhausted ballots, transfers and ranking depths are collected in self.stats as the rounds are counted, and anomalies (unknown choices, unresolved ties) in self.diagnostics. With bulk_elimination, all mathematically defeated candidates are eliminated in the same round; self.round_eliminations lists who was eliminated in each round. If their votes all differ, they are eliminated fewest votes first without counting again, which saves a full count (tallies, transfers and stats) for every other candidate in the group; transfers among them are not counted, so their order can differ from eliminating them one at a time. If some of them are tied, they are eliminated one at a time with the usual tiebreaks, counting between the eliminations, so only the rounds shown are saved.
         
         :param self: Election object
+        :param transcript: Audit transcript to record the count in (optional); see audit.verify_transcript
+        :type transcript: AuditTranscript or None
+        :param workers: Number of worker processes to split the ballots across (see sharding.ShardedStore); 1 counts in this process
+        :type workers: int
         :return: The winning candidate
         :rtype: str
         """
         self.eliminated_candidates = []
+        self.round_eliminations = []
+        self.sequential_rounds = []
         self.last_round = 0
+        self.diagnostics.clear()
+        store = self.get_ballot_store()
+        if workers > 1:
+            from sharding import ShardedStore
+            with ShardedStore(store, workers) as sharded:
+                return self._count_rounds(sharded, transcript)
+        return self._count_rounds(store, transcript)
+
+    def _count_rounds(self, store: BallotStore, transcript: 'AuditTranscript' = None):
+        depths = store.ranking_depths(self.no_confidence_last)
+        self.stats = TabulationStats(self.candidates, np.bincount(depths, minlength=store.n_ranks + 1))
+        candidate_codes = np.array([store.codes[candidate] for candidate in self.candidates], dtype=np.int64)
+        previous_choices = None
+        if transcript is not None:
+            transcript.add("header", store_hash=store.digest(), ballots=len(store), candidates=list(self.candidates), no_confidence_last=self.no_confidence_last)
 
         while True:
-            self.vote_counter.count_votes(self.voters, self.eliminated_candidates, self.no_confidence_last)
             self.last_round += 1
+            self.vote_counter.count_votes(store, self.eliminated_candidates, self.no_confidence_last, round=self.last_round)
+            self.sequential_rounds.append((self.last_round, list(self.eliminated_candidates)))
+
+            # exhaustion and transfers come from the per-ballot choices of this count
+            choices = self.vote_counter.last_choices
+            continuing = sum(self.vote_counter.vote_counts.values())
+            transfers = None
+            if previous_choices is not None:
+                transfers = np.zeros((len(self.candidates), len(self.candidates) + 1), dtype=np.int64)
+                for candidate in self.round_eliminations[-1]:
+                    from_row = self.candidates.index(candidate)
+                    moved = choices[previous_choices == candidate_codes[from_row]]
+                    received = store.tally(moved)[candidate_codes]
+                    transfers[from_row, :-1] = received
+                    transfers[from_row, -1] = len(moved) - received.sum()
+                    if transcript is not None:
+                        to = {name: n for name, n in zip(self.candidates + ["Exhausted"], transfers[from_row].tolist()) if n}
+                        transcript.add("transfer", round=self.last_round, to=to, **{"from": candidate})
+            self.stats.add_round(len(store) - continuing, transfers)
+            previous_choices = choices
+            if transcript is not None:
+                transcript.add("round", round=self.last_round, tallies=dict(self.vote_counter.vote_counts), exhausted=len(store) - continuing)
             
             total_votes = sum(self.vote_counter.vote_counts.values())
             for candidate, votes in self.vote_counter.vote_counts.items():
                 if votes > total_votes / 2:
-                    self.winner = candidate
-                    return candidate
-            
-            eliminated_candidate = self.vote_counter.eliminate_candidate(self.voters, self.eliminated_candidates)
-            if eliminated_candidate is None:
-                print("Tie detected among remaining candidates. No winner can be determined.")
-                self.winner = None
-                return None
+                    return self._declare_winner(candidate, "majority", transcript)
             
-            self.eliminated_candidates.append(eliminated_candidate)
+            defeated = defeated_candidates(self.vote_counter.vote_counts) if self.bulk_elimination else []
+            ordered = self._order_defeated(store, defeated) if len(defeated) > 1 else None
+            if ordered is not None:
+                defeated, steps = ordered
+                rule = "defeated"
+                if transcript is not None:
+                    for step in steps:
+                        transcript.add("tiebreak", **step)
+            else:
+                eliminated_candidate = self._eliminate_one(store, self.eliminated_candidates)
+                if transcript is not None:
+                    for step in self.vote_counter.tiebreak_steps:
+                        transcript.add("tiebreak", **step)
+                if eliminated_candidate is None:
+                    tied = [candidate for candidate, votes in self.vote_counter.vote_counts.items() if votes == min(self.vote_counter.vote_counts.values())]
+                    self.diagnostics.record(self.last_round, UNRESOLVED_TIE, ", ".join(tied))
+                    return self._declare_winner(None, "unresolved_tie", transcript)
+                defeated, rule = [eliminated_candidate], self.vote_counter.last_rule
+
+            self.eliminated_candidates.extend(defeated)
+            self.round_eliminations.append(defeated)
+            if transcript is not None:
+                for candidate in defeated:
+                    transcript.add("elimination", round=self.last_round, candidate=candidate, rule=rule)
 
             if len(self.eliminated_candidates) == len(self.candidates) - 1:
                 remaining_candidates = [candidate for candidate in self.candidates if candidate not in self.eliminated_candidates]
                 if remaining_candidates:
-                    self.winner = remaining_candidates[0]
-                    return remaining_candidates[0]
+                    return self._declare_winner(remaining_candidates[0], "last_remaining", transcript)
                 else:
-                    self.winner = None
-                    return None
+                    return self._declare_winner(None, "no_candidates", transcript)
 
             if self.last_round > len(self.candidates):
-                print("Error: More rounds than candidates. Possible issue with vote counting or elimination.")
-                self.winner = None
-                return None
+                self.diagnostics.record(self.last_round, ROUND_LIMIT)
+                return self._declare_winner(None, "round_limit", transcript)
 
-    def get_round_vote_counts(self, round: int):
+    def _eliminate_one(self, store: BallotStore, eliminated: list[str]):
+        return self.vote_counter.eliminate_candidate(store, eliminated, [before for _, before in self.sequential_rounds],
+                                                     [round for round, _ in self.sequential_rounds])
+
+    def _order_defeated(self, store: BallotStore, defeated: list[str]):
+        # returns (elimination order, tiebreak steps) for a defeated group, or None (with nothing recorded) to eliminate only one candidate.
+        # Without ties among them, the round's counts give the order, fewest votes first, and nothing is counted again; the points between
+        # the eliminations are still recorded for later tiebreaks to look back on, which count them only if they need them
+        votes = [self.vote_counter.vote_counts[candidate] for candidate in defeated]
+        if len(set(votes)) == len(votes):
+            for i in range(1, len(defeated)):
+                self.sequential_rounds.append((self.last_round, self.eliminated_candidates + defeated[:i]))
+            return list(defeated), []
+
+        # with ties, they are eliminated one at a time, as counting without bulk elimination would, so the tiebreaks and the counts later
+        # tiebreaks look back on are the same; None if one at a time would stop among them, on an unresolved tie or a majority
+        start = len(self.sequential_rounds)
+        eliminated = list(self.eliminated_candidates)
+        steps = []
+        # the counts between the eliminations are not rounds of their own, so their anomalies are not recorded
+        diagnostics, self.vote_counter.diagnostics = self.vote_counter.diagnostics, Diagnostics()
+        try:
+            for i in range(len(defeated)):
+                if i:
+                    votes = self.vote_counter.count_votes(store, eliminated, self.no_confidence_last, round=self.last_round)
+                    self.sequential_rounds.append((self.last_round, list(eliminated)))
+                    if any(count > sum(votes.values()) / 2 for count in votes.values()):
+                        break
+                candidate = self._eliminate_one(store, eliminated)
+                if candidate is None:
+                    break
+                steps.extend(self.vote_counter.tiebreak_steps)
+                eliminated.append(candidate)
+            else:
+                return eliminated[len(self.eliminated_candidates):], steps
+            del self.sequential_rounds[start:]
+            self.vote_counter.count_votes(store, self.eliminated_candidates, self.no_confidence_last, round=self.last_round)
+            return None
+        finally:
+            self.vote_counter.diagnostics = diagnostics
+
+    def eliminated_before(self, round: int):
         """
-        Returns a datarame with the number of votes for each candidate at each rank for a specific round of the election, excluding eliminated candidates. This method can only be run after calling run_election(). If no_confidence_last is True, no choices after 'No Confidence' will be included.
-        
+        Returns the candidates eliminated before a round was counted. With one elimination per round these are the first round - 1 eliminated candidates; with bulk elimination a round can eliminate several.
+
+        :param self: Election object
+        :param round: The round number
+        :type round: int
+        :return: The eliminated candidates, in elimination order
+        :rtype: list[str]
+        """
+        return self.eliminated_candidates[:sum(len(group) for group in self.round_eliminations[:round - 1])]
+
+    def _declare_winner(self, winner: str, reason: str, transcript: 'AuditTranscript' = None):
+        self.winner = winner
+        if transcript is not None:
+            transcript.add("result", winner=winner, reason=reason, rounds=self.last_round, eliminated=list(self.eliminated_candidates))
+        return winner
+
+    def round_counts(self, round: int, school: str = None, year: int = None):
+        """
+        Returns the number of votes for each candidate at each rank for a specific round of the election, filtered by school and/or year, and excluding eliminated candidates. Unlike get_round_vote_counts(), no dataframe is built unless to_frame() is called on the result. This method can only be run after calling run_election(). If no_confidence_last is True, no choices after 'No Confidence' will be included.
+
         :param self: Election object
         :param round: The round number for which to get the vote counts
         :type round: int
+        :param school: The school to filter by (optional)
+        :type school: str or None
+        :param year: The year to filter by (optional)
+        :type year: int or None
+        :return: The vote counts for the round
+        :rtype: RoundCounts
         """
         if round < 1 or round > self.last_round:
             raise ValueError(f"Round must be between 1 and {self.last_round}")
@@ -276,8 +623,18 @@ class Election:
         if self.last_round == 0:
             raise ValueError("Election has not been run yet. Please call run_election() first.")
 
-        eliminated = self.eliminated_candidates[:round-1]
-        return self.vote_counter.count_choices(self.voters, eliminated, self.no_confidence_last)
+        eliminated = self.eliminated_before(round)
+        return self.vote_counter.tally_choices(self.get_ballot_store().filter(school, year), eliminated, self.no_confidence_last, round=round)
+
+    def get_round_vote_counts(self, round: int):
+        """
+        Returns a datarame with the number of votes for each candidate at each rank for a specific round of the election, excluding eliminated candidates. This method can only be run after calling run_election(). If no_confidence_last is True, no choices after 'No Confidence' will be included.
+        
+        :param self: Election object
+        :param round: The round number for which to get the vote counts
+        :type round: int
+        """
+        return self.round_counts(round).to_frame()
     
     def get_filtered_round_vote_counts(self, round: int, school: str = None, year: int = None):
         """
@@ -291,52 +648,53 @@ class Election:
         :param year: The year to filter by (optional)
         :type year: int or None
         """
-        if round < 1 or round > self.last_round:
-            raise ValueError(f"Round must be between 1 and {self.last_round}")
-        
-        if self.last_round == 0:
-            raise ValueError("Election has not been run yet. Please call run_election() first.")
+        return self.round_counts(round, school, year).to_frame()
 
-        eliminated = self.eliminated_candidates[:round-1]
-        
-        filtered_voters = [
-            voter for voter in self.voters 
-            if (school is None or voter.school == school) 
-            and (year is None or voter.year == year)
-        ]
-        
-        return self.vote_counter.count_choices(filtered_voters, eliminated, self.no_confidence_last)
-    
-    def get_election_results(self):
+    def election_results(self, school: str = None, year: int = None):
         """
-        Returns a dataframe with the first choice vote counts for each candidate in each round of the election, excluding eliminated candidates. This method can only be run after calling run_election().
+        Returns the first choice vote counts for each candidate in each round of the election, filtered by school and/or year. Counts are kept as an integer matrix with a separate eliminated mask; no dataframe is built unless to_frame() is called on the result. This method can only be run after calling run_election().
 
         :param self: Election object
-        :return: A dataframe with the first choice vote counts for each candidate in each round
-        :rtype: pd.DataFrame
+        :param school: The school to filter by (optional)
+        :type school: str or None
+        :param year: The year to filter by (optional)
+        :type year: int or None
+        :return: The first choice vote counts in each round
+        :rtype: ElectionResults
         """
         if self.last_round == 0:
             raise ValueError("Election has not been run yet. Please call run_election() first.")
 
-        results = []
+        voters = self.get_ballot_store().filter(school, year)
+        row_of = {candidate: i for i, candidate in enumerate(self.candidates)}
+        counts = np.zeros((len(self.candidates), self.last_round), dtype=np.int64)
+        eliminated_flags = np.ones((len(self.candidates), self.last_round), dtype=bool)
         for round in range(1, self.last_round + 1):
-            eliminated = self.eliminated_candidates[:round-1]
-            vote_counts = self.vote_counter.count_votes(self.voters, eliminated, self.no_confidence_last)
-            results.append(copy.deepcopy(vote_counts))
-        
-        df = pd.DataFrame(results, index=[f'Round {i}' for i in range(1, self.last_round + 1)])
-        df = df.transpose()
+            eliminated = self.eliminated_before(round)
+            vote_counts = self.vote_counter.count_votes(voters, eliminated, self.no_confidence_last, round=round)
+            for candidate, votes in vote_counts.items():
+                counts[row_of[candidate], round - 1] = votes
+                eliminated_flags[row_of[candidate], round - 1] = False
 
         sorted_candidates = sorted(self.candidates, key=lambda c: self.eliminated_candidates.index(c) if c in self.eliminated_candidates else float('inf'), reverse=True)
-        winner = self.winner if self.winner is not None else df[df.columns[-1]].idxmax()
+        if self.winner is not None:
+            winner = self.winner
+        else:
+            winner = self.candidates[np.argmax(np.where(eliminated_flags[:, -1], -1, counts[:, -1]))]
         sorted_candidates = [winner] + [c for c in sorted_candidates if c != winner]
-        df = df.reindex(sorted_candidates)
-        
-        df = df.fillna('')
-        for column in df.columns:
-            df[column] = df[column].apply(lambda x: int(x) if isinstance(x, (int, float)) and not pd.isna(x) else x)
-        
-        return df
+        order = [row_of[c] for c in sorted_candidates]
+
+        return ElectionResults(sorted_candidates, counts[order], eliminated_flags[order])
+
+    def get_election_results(self):
+        """
+        Returns a dataframe with the first choice vote counts for each candidate in each round of the election, excluding eliminated candidates. This method can only be run after calling run_election().
+
+        :param self: Election object
+        :return: A dataframe with the first choice vote counts for each candidate in each round
+        :rtype: pd.DataFrame
+        """
+        return self.election_results().to_frame(blank_eliminated=True)
     
     def get_filtered_election_results(self, school: str = None, year: int = None):
         """
@@ -350,30 +708,142 @@ class Election:
         :return: A dataframe with the first choice vote counts for each candidate in each round
         :rtype: pd.DataFrame
         """
+        return self.election_results(school, year).to_frame(blank_eliminated=True)
+
+    def get_ballot_store(self):
+        """
+        Returns the compact ballot store for this election's voters, building it on first use and rebuilding it if voters were added or any ballot was changed (e.g. by reader.remove_candidate).
+
+        :param self: Election object
+        :return: The ballot store for this election
+        :rtype: BallotStore
+        """
+        store = self.ballot_store
+        if store is None or len(store) != len(self.voters) or not store.is_current():
+            self.ballot_store = BallotStore.from_voters(self.voters, self.candidates)
+        return self.ballot_store
+
+    def pairwise_matrix(self, school: str = None, year: int = None):
+        """
+        Returns a dataframe where the entry at [A, B] is the number of ballots ranking candidate A above candidate B, filtered by school and/or year. Unranked candidates are treated as ranked below every ranked candidate. If no_confidence_last is True, no choices after 'No Confidence' will be considered. This method does not require run_election().
+
+        :param self: Election object
+        :param school: The school to filter by (optional)
+        :type school: str or None
+        :param year: The year to filter by (optional)
+        :type year: int or None
+        :return: A dataframe of head-to-head counts with candidates as both index and columns
+        :rtype: pd.DataFrame
+        """
+        store = self.get_ballot_store()
+        import pandas as pd
+        codes = [store.codes[candidate] for candidate in self.candidates]
+        counts = store.filter(school, year).pairwise_counts(codes, self.no_confidence_last)
+        return pd.DataFrame(counts, index=self.candidates, columns=self.candidates)
+
+    def condorcet_winner(self, school: str = None, year: int = None):
+        """
+        Returns the candidate who beats every other candidate head-to-head, filtered by school and/or year, or None if there is no such candidate.
+
+        :param self: Election object
+        :param school: The school to filter by (optional)
+        :type school: str or None
+        :param year: The year to filter by (optional)
+        :type year: int or None
+        :return: The Condorcet winner, or None
+        :rtype: str or None
+        """
+        df = self.pairwise_matrix(school, year)
+        margins = df.values - df.values.T
+        np.fill_diagonal(margins, 1)
+        winners = np.flatnonzero((margins > 0).all(axis=1))
+        return df.index[winners[0]] if len(winners) == 1 else None
+
+    def margins(self):
+        """
+        Returns, for each round, the margin between the eliminated candidate and the next-lowest candidate (with bulk elimination, between the defeated candidates combined and the next-lowest candidate), and for the final round the margin between the winner and the runner-up. Each margin comes with an upper bound on the number of ballots that would have to change to alter the result: changes = margin // 2 + 1 ballots counting for the higher candidate are changed to rank the lower candidate first. Each bound is checked by recounting with those ballots changed; only the changed ballots and the ballots of each eliminated candidate are recounted. This method can only be run after calling run_election().
+
+        :param self: Election object
+        :return: Margins and change bounds by round
+        :rtype: MarginAnalysis
+        """
         if self.last_round == 0:
             raise ValueError("Election has not been run yet. Please call run_election() first.")
+        store = self.get_ballot_store()
+        first = store.first_choices(store.eliminated_array([]), self.no_confidence_last).astype(np.int64)
 
-        results = []
+        rounds = []
+        final = None
         for round in range(1, self.last_round + 1):
-            eliminated = self.eliminated_candidates[:round-1]
-            filtered_voters = [
-                voter for voter in self.voters 
-                if (school is None or voter.school == school) 
-                and (year is None or voter.year == year)
-            ]
-            vote_counts = self.vote_counter.count_votes(filtered_voters, eliminated, self.no_confidence_last)
-            results.append(copy.deepcopy(vote_counts))
-        
-        df = pd.DataFrame(results, index=[f'Round {i}' for i in range(1, self.last_round + 1)])
-        df = df.transpose()
+            eliminated = self.eliminated_before(round)
+            choices = store.first_choices(store.eliminated_array(eliminated), self.no_confidence_last)
+            tally = store.tally(choices)
+            votes = {c: int(tally[store.codes[c]]) for c in self.candidates if c not in eliminated}
+            if round <= len(self.round_eliminations):
+                group = self.round_eliminations[round - 1]
+                lower = group[-1]
+                others = [c for c in votes if c not in group]
+                if not others:
+                    break
+                higher = min(others, key=lambda c: votes[c])
+                entry = {"round": round, "eliminated": lower, "next_lowest": higher}
+                if len(group) > 1:
+                    # the defeated group stays defeated while it has fewer votes than the next-lowest candidate combined
+                    entry["defeated"] = list(group)
+                margin = votes[higher] - sum(votes[c] for c in group)
+            else:
+                others = [c for c in votes if c != self.winner]
+                if self.winner is None or not others:
+                    break
+                higher, lower = self.winner, max(others, key=lambda c: votes[c])
+                entry = {"round": round, "winner": higher, "runner_up": lower}
+                margin = votes[higher] - votes[lower]
 
-        sorted_candidates = sorted(self.candidates, key=lambda c: self.eliminated_candidates.index(c) if c in self.eliminated_candidates else float('inf'), reverse=True)
-        winner = self.winner if self.winner is not None else df[df.columns[-1]].idxmax()
-        sorted_candidates = [winner] + [c for c in sorted_candidates if c != winner]
-        df = df.reindex(sorted_candidates)
+            changes = margin // 2 + 1
+            # rewrite `changes` ballots counting for the higher candidate to rank the lower one first
+            rows = np.flatnonzero(choices == store.codes[higher])[:changes]
+            entry.update({"margin": margin, "changes": changes, "order_flips": False, "winner_flips": False})
+            if len(rows) == changes:
+                rankings = [[lower] + [store.names[code] for code in store.ballot(row) if code != EMPTY and store.names[code] != lower] for row in rows]
+                winner, order = self._recount_with_changes(store, first, rows, rankings)
+                if order is not None:
+                    through = len(self.eliminated_before(round + 1))
+                    entry["order_flips"] = order[:through] != self.eliminated_candidates[:through]
+                    entry["winner_flips"] = winner != self.winner
+            if round <= len(self.round_eliminations):
+                rounds.append(entry)
+            else:
+                final = entry
 
-        df = df.fillna('')
-        for column in df.columns:
-            df[column] = df[column].apply(lambda x: int(x) if isinstance(x, (int, float)) and not pd.isna(x) else x)
-        
-        return df
\ No newline at end of file
+        return MarginAnalysis(rounds, final)
+
+    def _recount_with_changes(self, store: BallotStore, first: np.ndarray, rows: np.ndarray, rankings: list[list[str]]):
+        # counts the election again with the given rows replaced; returns (winner, elimination order), or (None, None) on a tie for fewest votes
+        changed = BallotStore.from_rankings(rankings, store.n_ranks)
+        codes = {c: store.codes[c] for c in self.candidates}
+        choices = first.copy()
+        choices[rows] = EMPTY
+        tally = np.bincount(choices, minlength=len(store.names))
+        eliminated = []
+        while True:
+            changed_tally = changed.tally(changed.first_choices(changed.eliminated_array(eliminated), self.no_confidence_last))
+            votes = {c: int(tally[codes[c]] + changed_tally[codes[c]]) for c in self.candidates if c not in eliminated}
+            total = sum(votes.values())
+            for candidate, count in votes.items():
+                if count > total / 2:
+                    return candidate, eliminated
+            # one at a time: bulk elimination eliminates in the same order
+            lowest = min(votes.values())
+            group = [c for c, count in votes.items() if count == lowest]
+            if len(group) > 1:
+                return None, None
+            eliminated.extend(group)
+            if len(eliminated) == len(self.candidates) - 1:
+                return next(c for c in self.candidates if c not in eliminated), eliminated
+            # only the eliminated candidates' ballots move
+            moved = np.flatnonzero(np.isin(choices, [codes[c] for c in group]))
+            new = store.first_choices(store.eliminated_array(eliminated), self.no_confidence_last, moved)
+            for candidate in group:
+                tally[codes[candidate]] -= int(np.count_nonzero(choices[moved] == codes[candidate]))
+            choices[moved] = new
+            tally += np.bincount(new, minlength=len(store.names))
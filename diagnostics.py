@@ -0,0 +1,84 @@
+UNKNOWN_VOTE = "unknown_vote"
+UNKNOWN_CHOICE = "unknown_choice"
+RANK_OVERFLOW = "rank_overflow"
+UNRESOLVED_TIE = "unresolved_tie"
+ROUND_LIMIT = "round_limit"
+
+MESSAGES = {
+    UNKNOWN_VOTE: "{count} ballots count for '{detail}', which is not in candidates list.",
+    UNKNOWN_CHOICE: "{count} choices for '{detail}' not in candidates list.",
+    RANK_OVERFLOW: "{count} choices for '{detail}' exceed the number of candidates.",
+    UNRESOLVED_TIE: "Tie detected among remaining candidates ({detail}). No winner can be determined.",
+    ROUND_LIMIT: "More rounds than candidates. Possible issue with vote counting or elimination.",
+}
+
+class Diagnostics:
+    """
+    Anomalies found while counting, aggregated by round, kind and detail (e.g. the candidate name) instead of being printed once per ballot.
+    """
+    def __init__(self):
+        self.entries = {}
+
+    def __str__(self):
+        return f"Diagnostics: {len(self.entries)} entries"
+
+    def __len__(self):
+        return len(self.entries)
+
+    def record(self, round: int, kind: str, detail: str = None, count: int = 1):
+        """
+        Records an anomaly. Counting the same round again (e.g. for a report or a filtered count) does not add to the total: the largest count seen for a round, kind and detail is kept, which is the count over all ballots.
+
+        :param round: The round the anomaly was found in
+        :type round: int
+        :param kind: The kind of anomaly (UNKNOWN_VOTE, UNKNOWN_CHOICE, RANK_OVERFLOW, UNRESOLVED_TIE or ROUND_LIMIT)
+        :type kind: str
+        :param detail: What the anomaly is about, e.g. the candidate name (optional)
+        :type detail: str or None
+        :param count: Number of occurrences
+        :type count: int
+        """
+        key = (round, kind, detail)
+        self.entries[key] = max(self.entries.get(key, 0), int(count))
+
+    def clear(self):
+        """
+        Removes all recorded anomalies.
+        """
+        self.entries.clear()
+
+    def counts(self, kind: str = None):
+        """
+        Returns the total count of each kind of anomaly, or of one kind by round.
+
+        :param kind: If given, return counts by round for this kind only (optional)
+        :type kind: str or None
+        :return: Counts by kind, or by round if kind is given
+        :rtype: dict
+        """
+        totals = {}
+        for (round, entry_kind, _), count in self.entries.items():
+            if kind is None:
+                totals[entry_kind] = totals.get(entry_kind, 0) + count
+            elif entry_kind == kind:
+                totals[round] = totals.get(round, 0) + count
+        return totals
+
+    def to_list(self):
+        """
+        Returns the recorded anomalies as JSON-serializable dictionaries, ordered by round.
+
+        :return: One dictionary per round, kind and detail
+        :rtype: list[dict]
+        """
+        return [{"round": round, "kind": kind, "detail": detail, "count": count}
+                for (round, kind, detail), count in sorted(self.entries.items(), key=lambda item: (item[0][0], item[0][1], str(item[0][2])))]
+
+    def messages(self):
+        """
+        Returns one readable line per recorded anomaly.
+
+        :return: Messages such as "Round 1: 12 choices for 'Fiona' not in candidates list."
+        :rtype: list[str]
+        """
+        return [f"Round {entry['round']}: " + MESSAGES.get(entry["kind"], "{kind} ({detail}): {count}").format(**entry) for entry in self.to_list()]
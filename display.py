@@ -0,0 +1,603 @@
+import time
+
+import numpy as np
+import pygame
+from typing import TYPE_CHECKING
+
+from assets import AssetManager
+from ballots import BallotStore
+from classes import Election
+from projection import ProjectionEngine
+from telemetry import FrameTelemetry
+
+if TYPE_CHECKING:
+    from checkpoint import ShowState
+
+NU_PURPLE = (78, 42, 132)
+
+# Parameters
+WELCOME_SCREEN_TIME = 8
+OBS_START_DELAY = 0.1
+INITIAL_ZERO_SCREEN_TIME = 4
+BATCH_WAIT_MIN = 2
+BATCH_WAIT_VAR = 1
+ROUND_DISPLAY_TIME = 9
+ELIMINATION_SCREEN_TIME = 5
+N_SPLITS = 20
+VAR_SPLITS = 0.75
+WIDTH, HEIGHT = 1250, 850
+# Final projection screen duration after the election ends
+FINAL_PROJECTION_TIME = 15
+
+# Functions
+
+# --- Projection screen and checkmark functions ---
+def draw_checkmark(screen, x, y, w, h):
+    # Draw a white checkmark in the given box
+    # Coordinates are relative to (x, y), size (w, h)
+    # Simple checkmark: two lines
+    thickness = max(3, w // 12)
+    start1 = (x + w * 0.15, y + h * 0.55)
+    end1 = (x + w * 0.4, y + h * 0.8)
+    start2 = end1
+    end2 = (x + w * 0.85, y + h * 0.2)
+    pygame.draw.line(screen, (255, 255, 255), start1, end1, thickness)
+    pygame.draw.line(screen, (255, 255, 255), start2, end2, thickness)
+
+def draw_projection(screen, font_header, font_round, font_name, BG_COLOR, NU_PURPLE, TEXT_COLOR, get_color, WIDTH, HEIGHT,
+                    campaign, title, subtitle, checkmark):
+    # Non-blocking draw of a projection overlay (no flips or waits)
+    box_w = 320
+    box_h = 225
+    box_x = 80
+    box_y = HEIGHT // 2 - box_h // 2
+    color = get_color(campaign)
+    # Draw background fill for overlay
+    screen.fill(BG_COLOR)
+    # Draw campaign color box
+    pygame.draw.rect(screen, color, (box_x, box_y, box_w, box_h), border_radius=24)
+    # Checkmark
+    if checkmark:
+        check_w, check_h = 48, 48
+        check_x = box_x + box_w - check_w - 18
+        check_y = box_y + box_h - check_h - 18
+        draw_checkmark(screen, check_x, check_y, check_w, check_h)
+    # Text
+    text_x = box_x + box_w + 40
+    center_y = HEIGHT // 2
+    subtitle_surf = font_round.render(subtitle, True, TEXT_COLOR)
+    subtitle_rect = subtitle_surf.get_rect()
+    subtitle_rect.topleft = (text_x, center_y - 48)
+    campaign_surf = font_header.render(str(campaign), True, color)
+    campaign_rect = campaign_surf.get_rect()
+    campaign_rect.topleft = (text_x, center_y)
+    title_surf = font_name.render(title, True, (0, 0, 0))
+    title_rect = title_surf.get_rect()
+    title_rect.topleft = (text_x, center_y + box_h // 2 - 24)
+    screen.blit(subtitle_surf, subtitle_rect)
+    screen.blit(campaign_surf, campaign_rect)
+    screen.blit(title_surf, title_rect)
+
+def draw_results(screen, font_header, font_round, font_name, font_count, font_percent, BG_COLOR, TEXT_COLOR, BAR_BG, get_color,
+                 office_title, round_label, sorted_candidates, vote_counts, percentages, footer=None):
+    # Non-blocking draw of a results table (no flips or waits)
+    screen.fill(BG_COLOR)
+    header = font_header.render(office_title, True, NU_PURPLE)
+    header_rect = header.get_rect()
+    header_rect.topleft = (40, 20)
+    screen.blit(header, header_rect)
+    screen.blit(font_round.render(round_label, True, TEXT_COLOR), (40, 90))
+
+    row_height = 80
+    start_y = 160
+    color_box_x = 40
+    color_box_w = 60
+    name_x = color_box_x + color_box_w + 20
+    percent_box_w = 100
+    percent_box_x = WIDTH - percent_box_w - 40
+    bar_x = name_x
+    bar_w = percent_box_x - bar_x - 30
+    for i, candidate in enumerate(sorted_candidates):
+        y = start_y + i * row_height
+        color = get_color(candidate)
+        pygame.draw.rect(screen, color, (color_box_x, y, color_box_w, 60))
+        screen.blit(font_name.render(candidate, True, TEXT_COLOR), (name_x, y + 10))
+        count_surf = font_count.render(str(vote_counts[i]), True, TEXT_COLOR)
+        count_rect = count_surf.get_rect()
+        count_rect.top = y + 10
+        count_rect.right = percent_box_x - 10
+        screen.blit(count_surf, count_rect)
+        pygame.draw.rect(screen, color, (percent_box_x, y, percent_box_w, 60))
+        screen.blit(font_percent.render(f"{percentages[i]:.1f}%", True, (255, 255, 255)), (percent_box_x + 10, y + 10))
+        pygame.draw.rect(screen, BAR_BG, (bar_x, y + 50, bar_w, 15))
+        pygame.draw.rect(screen, color, (bar_x, y + 50, int(bar_w * (percentages[i] / 100)), 15))
+
+    if footer:
+        footer_surf = font_round.render(footer, True, NU_PURPLE)
+        footer_rect = footer_surf.get_rect()
+        footer_rect.right = WIDTH - 40
+        footer_rect.top = start_y + len(sorted_candidates) * row_height + 20
+        screen.blit(footer_surf, footer_rect)
+
+def run_live_view(host: str, port: int, registry, telemetry: FrameTelemetry = None):
+    """
+    Runs the display as a client of a ResultsServer: shows the latest round of the live count, updating as the server pushes deltas.
+
+    :param host: Results server host
+    :type host: str
+    :param port: Results server port
+    :type port: int
+    :param registry: Candidate registry used for candidate colors
+    :type registry: CandidateRegistry
+    :param telemetry: Frame-time and latency telemetry of the display loop (optional)
+    :type telemetry: FrameTelemetry or None
+    """
+    import asyncio
+    import threading
+    from server import subscribe, apply_message
+
+    state = {}
+    lock = threading.Lock()
+
+    async def listen():
+        async for message in subscribe(host, port):
+            with lock:
+                apply_message(state, message)
+
+    threading.Thread(target=lambda: asyncio.run(listen()), daemon=True).start()
+
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("ASG Election Night")
+    assets = AssetManager(images={}, music_path=None)
+    assets.wait()
+    font_header = assets.font("header")
+    font_round = assets.font("round")
+    font_name = assets.font("name")
+    font_count = assets.font("count")
+    font_percent = assets.font("percent")
+    BG_COLOR = (245, 245, 245)
+    TEXT_COLOR = (20, 20, 20)
+    BAR_BG = (220, 220, 220)
+
+    telemetry = telemetry or FrameTelemetry()
+    clock = pygame.time.Clock()
+    while True:
+        telemetry.begin_frame(30)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                telemetry.close()
+                pygame.quit()
+                return
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                telemetry.overlay = not telemetry.overlay
+        telemetry.begin_render()
+        with lock:
+            rounds = list(state.get("rounds", []))
+            office_title = state.get("office", "")
+            ballots = state.get("ballots", 0)
+        if rounds:
+            latest = rounds[-1]
+            draw_results(screen, font_header, font_round, font_name, font_count, font_percent, BG_COLOR, TEXT_COLOR, BAR_BG, registry.color,
+                         office_title, f"Round {latest['round']} Results", latest["candidates"], latest["votes"], latest["percentages"],
+                         footer=f"{ballots} ballots counted")
+        else:
+            screen.fill(BG_COLOR)
+        telemetry.draw(screen, assets.font("debug"))
+        pygame.display.flip()
+        telemetry.end_frame()
+        clock.tick(30)
+
+class ShowScreen:
+    """
+    The window, fonts and colors of the show, with the drawing and waiting helpers its scenes share. Fonts, images and music start loading in the background as soon as the window is open (see assets.AssetManager); the fonts wait for the loading on first use. Frames drawn through wait() and flip() are measured by self.telemetry, whose overlay F3 toggles.
+    """
+    def __init__(self, registry, office_title: str, telemetry: FrameTelemetry = None):
+        pygame.init()
+        self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("ASG Election Night")
+        self.assets = AssetManager()
+        self.assets.start()
+        self.bg_color = (245, 245, 245)
+        self.text_color = (20, 20, 20)
+        self.bar_bg = (220, 220, 220)
+        self.get_color = registry.color
+        self.office_title = office_title
+        self.clock = pygame.time.Clock()
+        self.telemetry = telemetry or FrameTelemetry()
+
+    def __str__(self):
+        return f"Show Screen: {self.office_title}"
+
+    @property
+    def font_header(self):
+        return self.assets.font("header")
+
+    @property
+    def font_round(self):
+        return self.assets.font("round")
+
+    @property
+    def font_name(self):
+        return self.assets.font("name")
+
+    @property
+    def font_count(self):
+        return self.assets.font("count")
+
+    @property
+    def font_percent(self):
+        return self.assets.font("percent")
+
+    @property
+    def font_debug(self):
+        return self.assets.font("debug")
+
+    def pump(self):
+        """
+        Handles pending window events; closing the window ends the program and F3 toggles the telemetry overlay.
+        """
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.telemetry.close()
+                pygame.quit()
+                exit()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                self.telemetry.overlay = not self.telemetry.overlay
+
+    def flip(self):
+        """
+        Draws the telemetry overlay (if enabled) and updates the display.
+        """
+        self.telemetry.draw(self.screen, self.font_debug)
+        pygame.display.flip()
+
+    def wait(self, seconds: float, draw=None, fps: int = 30):
+        """
+        Keeps the window responsive for a number of seconds, redrawing every frame if draw is given.
+
+        :param seconds: How long to wait
+        :type seconds: float
+        :param draw: Draws the frame (optional)
+        :type draw: callable or None
+        :param fps: Frame rate while waiting
+        :type fps: int
+        """
+        end = time.time() + seconds
+        while time.time() < end:
+            self.telemetry.begin_frame(fps)
+            self.pump()
+            self.telemetry.begin_render()
+            if draw is not None:
+                draw()
+                self.flip()
+            elif self.telemetry.overlay:
+                # the screen is static, but the overlay is kept current
+                self.flip()
+            self.telemetry.end_frame()
+            self.clock.tick(fps)
+
+    def results(self, round_label: str, sorted_candidates: list[str], vote_counts: list[int], percentages: list[float], percent_in: float = None,
+                projection: str = None):
+        """
+        Draws a results table, with a bar showing the share of the vote in below it if percent_in is given and below 1, and a projection line on the left if given.
+        """
+        draw_results(self.screen, self.font_header, self.font_round, self.font_name, self.font_count, self.font_percent, self.bg_color, self.text_color,
+                     self.bar_bg, self.get_color, self.office_title, round_label, sorted_candidates, vote_counts, percentages)
+        if percent_in is not None and percent_in < 1.0:
+            bar_in_w = 120
+            bar_in_h = 10
+            bar_in_x = WIDTH - bar_in_w - 40
+            bar_in_y = 160 + len(sorted_candidates) * 80 + 20
+            pygame.draw.rect(self.screen, self.bar_bg, (bar_in_x, bar_in_y, bar_in_w, bar_in_h))
+            pygame.draw.rect(self.screen, NU_PURPLE, (bar_in_x, bar_in_y, int(bar_in_w * percent_in), bar_in_h))
+            percent_in_surf = self.font_round.render(f"{int(percent_in * 100)}% of vote in", True, NU_PURPLE)
+            percent_in_rect = percent_in_surf.get_rect()
+            percent_in_rect.right = bar_in_x + bar_in_w
+            percent_in_rect.top = bar_in_y + bar_in_h + 2
+            self.screen.blit(percent_in_surf, percent_in_rect)
+        if projection:
+            projection_surf = self.font_name.render(projection, True, NU_PURPLE)
+            projection_rect = projection_surf.get_rect()
+            projection_rect.left = 40
+            projection_rect.top = 160 + len(sorted_candidates) * 80 + 20
+            self.screen.blit(projection_surf, projection_rect)
+
+    def projection(self, campaign: str, title: str, checkmark: bool, subtitle: str = 'ASG Projects:'):
+        """
+        Draws a projection screen for a campaign.
+        """
+        draw_projection(self.screen, self.font_header, self.font_round, self.font_name, self.bg_color, NU_PURPLE, self.text_color, self.get_color,
+                        WIDTH, HEIGHT, campaign, title, subtitle, checkmark)
+
+def split_plan(total_voters: int, n_splits: int = N_SPLITS, var_splits: float = VAR_SPLITS):
+    """
+    Draws the cumulative ballot counts after each batch of round 1 results, with batch sizes varying randomly around an even split.
+
+    :param total_voters: Number of ballots
+    :type total_voters: int
+    :param n_splits: Number of batches
+    :type n_splits: int
+    :param var_splits: Largest variation of a batch size, as a share of the average batch size
+    :type var_splits: float
+    :return: Number of ballots in after each batch
+    :rtype: list[int]
+    """
+    avg_split = total_voters // n_splits
+    split_sizes = []
+    remaining = total_voters
+    for i in range(n_splits):
+        if i == n_splits - 1:
+            split_sizes.append(remaining)
+        else:
+            # Add random variation
+            var = int(avg_split * var_splits)
+            size = avg_split + np.random.randint(-var, var + 1)
+            size = max(1, min(size, remaining - (n_splits - i - 1)))
+            split_sizes.append(size)
+            remaining -= size
+    return [int(sum(split_sizes[:i+1])) for i in range(n_splits)]
+
+def run_show(voters: list, candidates: list[str], registry, office_title: str, checkpoint_path: str = None, state: 'ShowState' = None,
+             telemetry: FrameTelemetry = None):
+    """
+    Runs the election night show: intro, round 1 results coming in batches, then the round-by-round results with projection screens. The show is played as a sequence of scenes; if checkpoint_path is given, the show state is checkpointed at every batch, round and projection screen so that a restarted show can resume where it was.
+
+    :param voters: List of Voter objects
+    :type voters: list[Voter]
+    :param candidates: List of candidates
+    :type candidates: list[str]
+    :param registry: Candidate registry used for candidate colors
+    :type registry: CandidateRegistry
+    :param office_title: The office being elected, shown in headers and projections
+    :type office_title: str
+    :param checkpoint_path: File to checkpoint the show to (optional)
+    :type checkpoint_path: str or None
+    :param state: State to resume the show from, e.g. from checkpoint.load_checkpoint (optional)
+    :type state: ShowState or None
+    :param telemetry: Frame-time and latency telemetry of the show (optional)
+    :type telemetry: FrameTelemetry or None
+    """
+    from checkpoint import ShowState, ShowCheckpoint
+
+    resumed = state is not None
+    state = state or ShowState()
+    checkpoint = ShowCheckpoint(checkpoint_path, Election(voters, candidates).get_ballot_store(), candidates) if checkpoint_path else None
+
+    def save():
+        if checkpoint is not None:
+            checkpoint.save(state)
+
+    show = ShowScreen(registry, office_title, telemetry)
+    show.telemetry.scene = state.scene
+    if state.scene == "intro":
+        play_intro(show)
+        state.advance("zero")
+    elif resumed:
+        show.assets.play_music()
+    if state.scene == "zero":
+        show.telemetry.scene = state.scene
+        if state.split_indexes is None:
+            state.split_indexes = split_plan(len(voters))
+        save()
+        play_zero(show, candidates)
+        state.advance("batches")
+    if state.scene == "batches":
+        show.telemetry.scene = state.scene
+        play_batches(show, state, save, voters, candidates)
+        state.advance("rounds")
+    if state.scene == "rounds":
+        show.telemetry.scene = state.scene
+        play_rounds(show, state, save, voters, candidates)
+        state.advance("final")
+    if state.scene == "final":
+        show.telemetry.scene = state.scene
+        save()
+        play_final(show, state)
+        state.advance("done")
+        save()
+    show.telemetry.close()
+    pygame.quit()
+
+def play_intro(show: ShowScreen):
+    """
+    Plays the intro: waits for OBS to start, starts the music and animates the logo.
+
+    :param show: The show window
+    :type show: ShowScreen
+    """
+    screen = show.screen
+    BG_COLOR = show.bg_color
+    clock = show.clock
+
+    # OBS Start delay (unchanged); the assets keep loading in the background meanwhile
+    show.wait(OBS_START_DELAY)
+
+    # Start music after OBS
+    show.assets.play_music()
+
+    # --- Real Intro Animation ---
+    logo_small = show.assets.image("logo")
+    logo_w_small, logo_h_small = logo_small.get_size()
+    intro_duration = 8.0
+    intro_anim_time = 3.0
+    intro_start = time.time()
+    text_surf = show.font_header.render("Election Night", True, NU_PURPLE)
+    text_rect = text_surf.get_rect()
+    # Center logo and text vertically and horizontally
+    logo_final_y = HEIGHT // 2 - (logo_h_small + text_rect.height + 30) // 2
+    logo_final_x = WIDTH // 2 - logo_w_small // 2
+    text_rect.centerx = WIDTH // 2
+    text_rect.top = logo_final_y + logo_h_small + 30
+
+    # Animate logo slide/fade in over 3 seconds
+    while True:
+        show.telemetry.begin_frame(60)
+        elapsed = time.time() - intro_start
+        progress = min(elapsed / intro_anim_time, 1.0)
+        logo_y = int(-logo_h_small + progress * (logo_final_y + logo_h_small))
+        # fade with the surface alpha instead of blending a copy of the logo every frame
+        logo_small.set_alpha(int(progress * 255))
+        screen.fill(BG_COLOR)
+        logo_rect = logo_small.get_rect()
+        logo_rect.left = logo_final_x
+        logo_rect.top = logo_y
+        screen.blit(logo_small, logo_rect)
+        if progress == 1.0:
+            screen.blit(text_surf, text_rect)
+        show.flip()
+        show.pump()
+        show.telemetry.end_frame()
+        clock.tick(60)
+        if progress == 1.0:
+            break
+
+    # Hold logo and text for remaining intro time
+    def draw_hold():
+        screen.fill(BG_COLOR)
+        logo_rect = logo_small.get_rect()
+        logo_rect.left = logo_final_x
+        logo_rect.top = logo_final_y
+        screen.blit(logo_small, logo_rect)
+        screen.blit(text_surf, text_rect)
+
+    show.wait(intro_duration - intro_anim_time, draw_hold, fps=60)
+
+def play_zero(show: ShowScreen, candidates: list[str]):
+    """
+    Shows round 1 with no votes in yet.
+
+    :param show: The show window
+    :type show: ShowScreen
+    :param candidates: List of candidates
+    :type candidates: list[str]
+    """
+    show.results("Round 1 Results", candidates, [0] * len(candidates), [0.0] * len(candidates), percent_in=0.0)
+    show.flip()
+    show.wait(INITIAL_ZERO_SCREEN_TIME)
+
+def play_batches(show: ShowScreen, state: 'ShowState', save, voters: list, candidates: list[str]):
+    """
+    Shows round 1 results as the ballots come in, one batch of the split plan at a time, starting at state.batch. Until all ballots are in, each batch also shows the projected winner from resampled completions of the full count (see projection.ProjectionEngine); the time spent counting and projecting comes out of the batch wait.
+
+    :param show: The show window
+    :type show: ShowScreen
+    :param state: The show state
+    :type state: ShowState
+    :param save: Checkpoints the show state
+    :type save: callable
+    :param voters: List of Voter objects
+    :type voters: list[Voter]
+    :param candidates: List of candidates
+    :type candidates: list[str]
+    """
+    total_voters = len(voters)
+    engine = ProjectionEngine(candidates)
+    added = 0
+    for batch_num in range(state.batch, len(state.split_indexes)):
+        state.batch = batch_num
+        save()
+        split_idx = state.split_indexes[batch_num]
+        batch_start = time.time()
+        with show.telemetry.measure("count", batch=batch_num, ballots=split_idx):
+            partial_election = Election(voters[:split_idx], candidates)
+            partial_election.run_election()
+            counts = partial_election.round_counts(1)
+        vote_counts = counts.votes[counts.order].tolist()
+        total_votes = sum(vote_counts)
+        percentages = [(v / total_votes * 100) if total_votes > 0 else 0 for v in vote_counts]
+
+        # the share of the vote in is only shown until the full vote is in
+        percent_in = split_idx / total_voters if total_voters > 0 else 0
+        projection_text = None
+        if split_idx < total_voters and split_idx > added:
+            with show.telemetry.measure("projection", batch=batch_num, ballots=split_idx):
+                engine.add(BallotStore.from_voters(voters[added:split_idx], candidates))
+                added = split_idx
+                projection = engine.project(total_voters - split_idx)
+            if projection.leader is not None:
+                projection_text = f"Projected: {projection.leader} ({projection.win_probability[projection.leader]:.0%} to win)"
+        with show.telemetry.measure("draw", batch=batch_num):
+            show.results("Round 1 Results", counts.sorted_candidates, vote_counts, percentages, percent_in=percent_in, projection=projection_text)
+            show.flip()
+        # Wait for a short time for each batch
+        show.wait(max(0.0, BATCH_WAIT_MIN + np.random.uniform(0, BATCH_WAIT_VAR) - (time.time() - batch_start)))
+    state.batch = len(state.split_indexes)
+
+def play_rounds(show: ShowScreen, state: 'ShowState', save, voters: list, candidates: list[str]):
+    """
+    Shows the results of every round followed by its projection screens, starting at state.round and state.step. The full count is made once and kept in state.rounds.
+
+    :param show: The show window
+    :type show: ShowScreen
+    :param state: The show state
+    :type state: ShowState
+    :param save: Checkpoints the show state
+    :type save: callable
+    :param voters: List of Voter objects
+    :type voters: list[Voter]
+    :param candidates: List of candidates
+    :type candidates: list[str]
+    """
+    if state.rounds is None:
+        from server import election_rounds
+        with show.telemetry.measure("count", ballots=len(voters)):
+            election = Election(voters, candidates)
+            election.run_election()
+            state.rounds = election_rounds(election)
+
+    office_title = show.office_title
+    for round_num in range(state.round, len(state.rounds) + 1):
+        round_data = state.rounds[round_num - 1]
+        sorted_candidates = round_data["candidates"]
+        vote_counts = round_data["votes"]
+        total_votes = sum(vote_counts)
+        percentages = [(v / total_votes * 100) if total_votes > 0 else 0 for v in vote_counts]
+
+        # --- Manual majority/plurality/elimination check ---
+        winner = next((c for c, pct in zip(sorted_candidates, percentages) if total_votes > 0 and pct > 50.0), None)
+        eliminated = sorted_candidates[-1] if sorted_candidates else None
+        plurality = sorted_candidates[0] if sorted_candidates else None
+        if winner is not None:
+            projections = [(winner, f'Elected {office_title}', True)]
+        else:
+            # plurality then eliminated
+            projections = [(plurality, f'Wins Plurality of Round {round_num}', True),
+                           (eliminated, f'Eliminated Round {round_num}', False)]
+
+        # step 0 is the results screen, then one step per projection screen
+        first_step = state.step if round_num == state.round else 0
+        for step in range(first_step, len(projections) + 1):
+            state.round, state.step = round_num, step
+            save()
+            if step == 0:
+                # redraw current round results during countdown so screen isn't static
+                show.wait(ROUND_DISPLAY_TIME, lambda: show.results(f"Round {round_num} Results", sorted_candidates, vote_counts, percentages))
+            else:
+                campaign, title, checkmark = projections[step - 1]
+                show.wait(ELIMINATION_SCREEN_TIME, lambda: show.projection(campaign, title, checkmark))
+
+        # After all projections finished, clear and ensure compositor updates
+        show.screen.fill(show.bg_color)
+        show.flip()
+        pygame.event.pump()
+        pygame.time.delay(50)
+        pygame.display.flip()
+    state.round, state.step = len(state.rounds) + 1, 0
+
+def play_final(show: ShowScreen, state: 'ShowState'):
+    """
+    Shows the final projection of the winner after the last round.
+
+    :param show: The show window
+    :type show: ShowScreen
+    :param state: The show state, with the per-round results
+    :type state: ShowState
+    """
+    final_winner = None
+    if state.rounds:
+        final_round = state.rounds[-1]
+        if final_round["candidates"] and sum(final_round["votes"]) > 0:
+            final_winner = final_round["candidates"][0]
+    if final_winner:
+        show.wait(FINAL_PROJECTION_TIME, lambda: show.projection(final_winner, f'Elected {show.office_title}', True))
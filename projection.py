@@ -0,0 +1,188 @@
+import numpy as np
+
+from ballots import BallotStore
+
+SIMULATIONS = 1000   # resampled completions per projection
+
+class Projection:
+    """
+    Outcome of many resampled completions of a count: how often each candidate won, how often each was eliminated in each round, and the elimination orders seen.
+    """
+    def __init__(self, candidates: list[str], wins: np.ndarray, eliminations: np.ndarray, orders: list[tuple[list[str], int]],
+                 simulations: int, counted: int, remaining: int):
+        self.candidates = candidates
+        self.wins = wins
+        self.eliminations = eliminations
+        self.orders = orders
+        self.simulations = simulations
+        self.counted = counted
+        self.remaining = remaining
+
+    def __str__(self):
+        leader = self.leader
+        return f"Projection: {leader} wins in {self.win_probability[leader]:.1%} of {self.simulations} completions" if leader else "Projection: no ballots"
+
+    @property
+    def win_probability(self):
+        return {candidate: float(self.wins[i]) / self.simulations for i, candidate in enumerate(self.candidates)} if self.simulations else {}
+
+    @property
+    def leader(self):
+        return self.candidates[int(np.argmax(self.wins))] if self.simulations and self.wins.any() else None
+
+    @property
+    def likely_order(self):
+        return self.orders[0][0] if self.orders else []
+
+    def to_dict(self):
+        """
+        Returns the projection as a JSON-serializable dictionary.
+
+        :return: Win probabilities, elimination probabilities by round and the most common elimination orders
+        :rtype: dict
+        """
+        return {
+            "counted": self.counted,
+            "remaining": self.remaining,
+            "simulations": self.simulations,
+            "win_probability": self.win_probability,
+            "elimination_probability": {candidate: (self.eliminations[i] / max(self.simulations, 1)).tolist() for i, candidate in enumerate(self.candidates)},
+            "orders": [{"order": order, "probability": count / max(self.simulations, 1)} for order, count in self.orders],
+        }
+
+class ProjectionEngine:
+    """
+    Projects the outcome of a count from the ballots in so far. Ballots are kept as counts of unique ballot patterns and updated as each batch arrives; a projection draws the remaining ballots from the patterns seen so far (multinomially, with pattern shares drawn from a Dirichlet distribution over their counts) and counts every completed election at once with NumPy, grouping simulations that have eliminated the same candidates. Ties for fewest votes are broken by candidate order.
+    """
+    def __init__(self, candidates: list[str], no_confidence_last: bool = False, simulations: int = SIMULATIONS, seed: int = None):
+        self.candidates = candidates
+        self.no_confidence_last = no_confidence_last
+        self.simulations = simulations
+        self.rng = np.random.default_rng(seed)
+        # one row per unique ballot pattern: candidate indexes in rank order, len(candidates) for "no candidate"
+        self.patterns = np.zeros((0, 0), dtype=np.int16)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self._rows = {}
+
+    def __str__(self):
+        return f"Projection Engine: {int(self.counts.sum())} ballots in {len(self.counts)} patterns"
+
+    def __len__(self):
+        return int(self.counts.sum())
+
+    def add(self, store: BallotStore):
+        """
+        Adds a batch of ballots.
+
+        :param store: The new ballots
+        :type store: BallotStore
+        """
+        if not len(store):
+            return
+        no_candidate = len(self.candidates)
+        index = np.full(len(store.names), no_candidate, dtype=np.int16)
+        for i, candidate in enumerate(self.candidates):
+            if candidate in store.codes:
+                index[store.codes[candidate]] = i
+        ranks = index[store.ranks]
+        if self.no_confidence_last:
+            ranks[np.arange(ranks.shape[1])[None, :] >= store.nc_cutoff[:, None]] = no_candidate
+        # an empty rank or unknown choice ends the ballot (see BallotStore.first_choices), so everything after it can be dropped
+        stops = ranks == no_candidate
+        ranks[np.cumsum(stops, axis=1) > 0] = no_candidate
+        width = max(ranks.shape[1], self.patterns.shape[1])
+        if ranks.shape[1] < width:
+            ranks = np.pad(ranks, ((0, 0), (0, width - ranks.shape[1])), constant_values=no_candidate)
+        if self.patterns.shape[1] < width:
+            self.patterns = np.pad(self.patterns, ((0, 0), (0, width - self.patterns.shape[1])), constant_values=no_candidate)
+            self._rows = {pattern.tobytes(): row for row, pattern in enumerate(self.patterns)}
+
+        patterns, counts = np.unique(ranks, axis=0, return_counts=True)
+        new_patterns = []
+        for pattern, count in zip(patterns, counts):
+            key = pattern.tobytes()
+            row = self._rows.get(key)
+            if row is None:
+                row = len(self.counts) + len(new_patterns)
+                self._rows[key] = row
+                new_patterns.append((pattern, count))
+            else:
+                self.counts[row] += count
+        if new_patterns:
+            self.patterns = np.vstack([self.patterns.reshape(-1, width)] + [pattern[None, :] for pattern, _ in new_patterns])
+            self.counts = np.concatenate([self.counts, [count for _, count in new_patterns]])
+
+    def project(self, remaining: int, simulations: int = None):
+        """
+        Projects the count once `remaining` more ballots are in.
+
+        :param remaining: Expected number of ballots still to come
+        :type remaining: int
+        :param simulations: Number of resampled completions (defaults to self.simulations)
+        :type simulations: int or None
+        :return: The projection
+        :rtype: Projection
+        """
+        simulations = simulations or self.simulations
+        n_candidates = len(self.candidates)
+        counted = int(self.counts.sum())
+        if counted == 0 or n_candidates == 0:
+            return Projection(self.candidates, np.zeros(n_candidates, dtype=np.int64), np.zeros((n_candidates, max(n_candidates - 1, 0)), dtype=np.int64), [], 0, counted, remaining)
+
+        weights = np.broadcast_to(self.counts.astype(np.float64), (simulations, len(self.counts))).copy()
+        if remaining > 0:
+            # the pattern shares are drawn too, so the projection allows for the ballots in so far being a small sample
+            weights += self.rng.multinomial(remaining, self.rng.dirichlet(self.counts, size=simulations))
+        winners, order = self._count(weights)
+
+        wins = np.bincount(winners[winners >= 0], minlength=n_candidates)
+        eliminations = np.zeros((n_candidates, max(n_candidates - 1, 0)), dtype=np.int64)
+        for round in range(order.shape[1]):
+            eliminated = order[:, round]
+            eliminations[:, round] = np.bincount(eliminated[eliminated >= 0], minlength=n_candidates)
+        unique_orders, order_counts = np.unique(order, axis=0, return_counts=True)
+        ranked = np.argsort(-order_counts, kind="stable")
+        orders = [([self.candidates[i] for i in unique_orders[k] if i >= 0], int(order_counts[k])) for k in ranked]
+        return Projection(self.candidates, wins, eliminations, orders, simulations, counted, remaining)
+
+    def _count(self, weights: np.ndarray):
+        # counts every simulated election round by round; returns the winner and elimination order of each (-1 where none)
+        n_sims = len(weights)
+        n_candidates = len(self.candidates)
+        patterns = np.hstack([self.patterns, np.full((len(self.patterns), 1), n_candidates, dtype=self.patterns.dtype)])
+        eliminated = np.zeros((n_sims, n_candidates + 1), dtype=bool)
+        winners = np.full(n_sims, -1, dtype=np.int64)
+        order = np.full((n_sims, max(n_candidates - 1, 0)), -1, dtype=np.int64)
+        counting = np.ones(n_sims, dtype=bool)
+
+        for round in range(n_candidates):
+            sims = np.flatnonzero(counting)
+            if not len(sims):
+                break
+            tallies = np.zeros((len(sims), n_candidates + 1))
+            # simulations that eliminated the same candidates share each pattern's first choice
+            states, inverse = np.unique(np.packbits(eliminated[sims, :n_candidates], axis=1), axis=0, return_inverse=True)
+            for state in range(len(states)):
+                members = np.flatnonzero(inverse.ravel() == state)
+                active = ~eliminated[sims[members[0]]][patterns]
+                first = patterns[np.arange(len(patterns)), active.argmax(axis=1)]
+                choice = np.zeros((len(patterns), n_candidates + 1))
+                choice[np.arange(len(patterns)), first] = 1
+                tallies[members] = weights[sims[members]] @ choice
+            tallies = tallies[:, :n_candidates]
+
+            continuing = ~eliminated[sims, :n_candidates]
+            top = tallies.argmax(axis=1)
+            majority = tallies[np.arange(len(sims)), top] > tallies.sum(axis=1) / 2
+            last = continuing.sum(axis=1) == 1
+            done = majority | last
+            winners[sims[done]] = np.where(majority[done], top[done], continuing[done].argmax(axis=1))
+            counting[sims[done]] = False
+
+            going = ~done
+            if not going.any():
+                break
+            lowest = np.where(continuing, tallies, np.inf)[going].argmin(axis=1)
+            eliminated[sims[going], lowest] = True
+            order[sims[going], round] = lowest
+        return winners, order
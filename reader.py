@@ -1,29 +1,38 @@
 import pandas as pd
+import numpy as np
 from classes import Voter
-import json
-import re
+from registry import CandidateRegistry, NAMES_FILE
+from validation import validate_ballots
 
-def read_election_data(filepath: str, asg: bool = True):
+def read_election_data(filepath: str, asg: bool = True, registry: CandidateRegistry = None,
+                       validate: bool = True, candidates: list[str] = None, with_report: bool = False,
+                       compact_skipped: bool = False):
     """
-    Reads election data into classes from a CSV file downloaded from 'Cats on Campus.
+    Reads election data into classes from a CSV file downloaded from 'Cats on Campus. Unless validate is False, only the latest submission of each User Id is kept, repeated candidates are removed and skipped ranks are reported; they are left in place (so the ballot exhausts there, as in the baseline count) unless compact_skipped is True (see validation.validate_ballots).
     
     :param filepath: The path to the CSV file containing the election data.
     :type filepath: str
-    :return: A list of Voter objects representing the election data and a list of candidates.
-    :rtype: tuple[list[Voter], list[str]]
+    :param registry: Candidate registry used to resolve ballot strings; one is loaded from Data/names.json if not given (optional)
+    :type registry: CandidateRegistry or None
+    :param validate: If True, validate and normalize the ballots before building Voter objects
+    :type validate: bool
+    :param candidates: Expected candidates (optional); when validating, choices for other names are removed and reported
+    :type candidates: list[str] or None
+    :param with_report: If True, also return the ValidationReport (None when validate is False)
+    :type with_report: bool
+    :param compact_skipped: If True, validation moves choices up over skipped ranks, which changes how those ballots are counted
+    :type compact_skipped: bool
+    :return: A list of Voter objects representing the election data and a list of candidates (and the validation report if with_report is True).
+    :rtype: tuple[list[Voter], list[str]] or tuple[list[Voter], list[str], ValidationReport]
     """
-    if asg:
-        with open("Data/names.json", "r") as f:
-            CANDIDATE_REPLACEMENTS = json.load(f)
-        CANDIDATE_REPLACEMENTS = {k.lower(): v for k, v in CANDIDATE_REPLACEMENTS.items()}
-    else:
-        CANDIDATE_REPLACEMENTS = {}
+    if registry is None:
+        registry = CandidateRegistry.load(names_file=NAMES_FILE if asg else None, colors_file=None)
 
     try:
         data = pd.read_csv(filepath)
     except Exception as e:
         print(f"An error occurred while reading the file: {e}")
-        return None, None
+        return (None, None, None) if with_report else (None, None)
     
     if asg:
         ID_COL = "User Id"
@@ -45,46 +54,48 @@ def read_election_data(filepath: str, asg: bool = True):
     assert all(col in data.columns for col in _cols), f"Missing columns in the data. Required columns: {_cols}"
     data = data[_cols]
 
-    all_voters = []
-    for _, row in data.iterrows():
-        submission_time = row[TIMESTAMP_COL]
-        submission_time = pd.to_datetime(submission_time, errors='coerce')
-        # if submission_time > pd.to_datetime("2026-02-14 11:30:00"):
-        #     continue
-        # if submission_time < pd.to_datetime("2026-02-13 09:00:00"):
-        #     continue
-        voter_id = int(row[ID_COL])
-        if asg:
-            school = str(row[SCHOOL]).strip()
-            year = re.search(r'\d{4}', str(row[YEAR]))
-            year = int(year.group(0)) if year is not None else 0
-        else:
-            school = "N/A"
-            year = 0
-        
-        voter = Voter(voter_id, school, year, N_CANDIDATES, submission_time if not pd.isna(submission_time) else None)
-        
-        for i in range(1, N_CANDIDATES + 1):
-            choice_col = CHOICE_COLUMNS[i-1]
-            if choice_col in row:
-                if pd.isna(row[choice_col]):
-                    choice = None
-                else:
-                    choice = str(row[choice_col]).strip()
-                    if choice.lower() in CANDIDATE_REPLACEMENTS:
-                        choice = CANDIDATE_REPLACEMENTS[choice.lower()]
-                voter.set_choice(i, choice)
+    # resolve each distinct ballot string once, then map whole columns to codes
+    choice_values = data[CHOICE_COLUMNS].to_numpy(dtype=object)
+    uniques = pd.unique(choice_values.ravel())
+    code_of = {raw: registry.code(raw) for raw in uniques if not pd.isna(raw)}
+    codes = np.zeros(choice_values.shape, dtype=np.uint16)
+    for i in range(N_CANDIDATES):
+        codes[:, i] = data[CHOICE_COLUMNS[i]].map(code_of).fillna(0).to_numpy(dtype=np.uint16)
+
+    timestamps = pd.to_datetime(data[TIMESTAMP_COL], errors='coerce')
+    voter_ids = data[ID_COL].astype(int).tolist()
+    if asg:
+        schools = [str(school).strip() for school in data[SCHOOL]]
+        years = pd.Series([str(year) for year in data[YEAR]]).str.extract(r'(\d{4})', expand=False).fillna(0).astype(int).tolist()
+    else:
+        schools = ["N/A"] * len(data)
+        years = [0] * len(data)
 
+    report = None
+    rows = range(len(data))
+    if validate:
+        known_codes = None if candidates is None else [registry.code(candidate) for candidate in candidates]
+        rows, codes, report = validate_ballots(codes, np.array(voter_ids), timestamps.to_numpy(dtype='datetime64[ns]'), known_codes, compact_skipped)
+        rows = rows.tolist()
+
+    times = list(timestamps)
+    all_voters = []
+    for i, row in enumerate(rows):
+        # cutoff times are applied afterwards with filter_by_time
+        submission_time = times[row]
+        voter = Voter(voter_ids[row], schools[row], years[row], N_CANDIDATES, submission_time if not pd.isna(submission_time) else None)
+        voter.set_choices(codes[i])
         all_voters.append(voter)
 
-    candidates = set()
-    for voter in all_voters:
-        for i in range(1, N_CANDIDATES + 1):
-            choice = voter.get_choice(i)
-            if choice and choice is not None:
-                candidates.add(choice)
+    if candidates is None:
+        seen = set(code_of[raw] for raw in uniques if not pd.isna(raw))
+        candidates = [name for name in registry.names if registry.codes[name] in seen and name]
+    else:
+        candidates = [registry.canonical(candidate) for candidate in candidates]
 
-    return all_voters, list(candidates)
+    if with_report:
+        return all_voters, candidates, report
+    return all_voters, candidates
 
 def remove_candidate(voters: list[Voter], candidate: str):
     """
@@ -99,4 +110,28 @@ def remove_candidate(voters: list[Voter], candidate: str):
         for i in range(1, voter.n_candidates + 1):
             if voter.get_choice(i) == candidate:
                 voter.set_choice(i, None)
-                break
\ No newline at end of file
+                break
+
+def filter_by_time(voters: list[Voter], start: str = None, end: str = None):
+    """
+    Returns the voters who submitted between the start and end times (inclusive). Voters without a timestamp are dropped when either bound is given.
+
+    :param voters: A list of Voter objects.
+    :type voters: list[Voter]
+    :param start: Earliest submission time to keep, e.g. "2026-02-13 09:00:00" (optional)
+    :type start: str or None
+    :param end: Latest submission time to keep, e.g. "2026-02-14 11:30:00" (optional)
+    :type end: str or None
+    :return: The voters within the time window.
+    :rtype: list[Voter]
+    """
+    if start is None and end is None:
+        return voters
+    start = pd.to_datetime(start) if start is not None else None
+    end = pd.to_datetime(end) if end is not None else None
+    return [
+        voter for voter in voters
+        if voter.timestamp is not None
+        and (start is None or voter.timestamp >= start)
+        and (end is None or voter.timestamp <= end)
+    ]
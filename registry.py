@@ -0,0 +1,156 @@
+import json
+import os
+import zlib
+
+from ballots import candidate_code
+
+NAMES_FILE = "Data/names.json"
+COLORS_FILE = "Data/colors.json"
+
+# Color Palettes (Default, Red, Blue)
+PALETTES = {
+    "Default": [
+        (220, 38, 38), (37, 99, 235), (16, 185, 129), (234, 179, 8), (168, 85, 247),
+        (251, 191, 36), (59, 130, 246), (239, 68, 68), (34, 197, 94), (250, 204, 21)
+    ],
+    "Red": [
+        (220, 38, 38), (239, 68, 68), (255, 99, 99), (185, 28, 28), (254, 202, 202),
+        (153, 27, 27), (252, 165, 165), (127, 29, 29), (251, 113, 113), (191, 18, 18)
+    ],
+    "Blue": [
+        (37, 99, 235), (59, 130, 246), (99, 179, 237), (29, 78, 216), (147, 197, 253),
+        (30, 64, 175), (191, 219, 254), (21, 39, 161), (191, 219, 254), (13, 42, 148)
+    ],
+}
+
+class CandidateRegistry:
+    """
+    Canonical candidate names, codes and display colors for one election. Raw ballot strings are resolved to a canonical name once per distinct string, and colors are resolved once per candidate.
+    """
+    def __init__(self, aliases: dict[str, str] = None, colors: dict[str, list[int]] = None, palette: str = "Default"):
+        self.aliases = {k.lower(): v for k, v in (aliases or {}).items()}
+        self.campaign_colors = {k: tuple(v) for k, v in (colors or {}).items()}
+        self.palette = PALETTES.get(palette, PALETTES["Default"])
+        self.names = []
+        self.codes = {}
+        self._canonical = {}
+        self._colors = {}
+
+    def __str__(self):
+        return f"Candidate Registry: {self.names}"
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def load(cls, names_file: str = NAMES_FILE, colors_file: str = COLORS_FILE, palette: str = "Default"):
+        """
+        Builds a registry from the alias map and campaign color files. Missing files are treated as empty.
+
+        :param names_file: Path to a JSON object mapping ballot strings to canonical names
+        :type names_file: str or None
+        :param colors_file: Path to a JSON object mapping canonical names to RGB colors
+        :type colors_file: str or None
+        :param palette: Fallback color palette for candidates without a campaign color (Default, Red, Blue)
+        :type palette: str
+        :return: A candidate registry
+        :rtype: CandidateRegistry
+        """
+        aliases, colors = {}, {}
+        if names_file is not None and os.path.exists(names_file):
+            with open(names_file, "r") as f:
+                aliases = json.load(f)
+        if colors_file is not None and os.path.exists(colors_file):
+            with open(colors_file, "r") as f:
+                colors = json.load(f)
+        return cls(aliases, colors, palette)
+
+    @classmethod
+    def from_dict(cls, data: dict, palette: str = "Default"):
+        """
+        Builds a registry from a dictionary written by to_dict(), registering its candidates in the same order.
+
+        :param data: The registry
+        :type data: dict
+        :param palette: Fallback color palette for candidates without a campaign color (Default, Red, Blue)
+        :type palette: str
+        :return: A candidate registry
+        :rtype: CandidateRegistry
+        """
+        registry = cls(data.get("aliases"), data.get("colors"), palette)
+        for name in data.get("names", []):
+            registry.register(name)
+        return registry
+
+    def to_dict(self):
+        """
+        Returns the registry as a JSON-serializable dictionary: the alias map, the campaign colors and the registered candidates.
+
+        :return: The registry
+        :rtype: dict
+        """
+        return {"aliases": dict(self.aliases), "colors": {name: list(color) for name, color in self.campaign_colors.items()}, "names": list(self.names)}
+
+    def canonical(self, raw: str):
+        """
+        Returns the canonical name for a raw ballot string (stripped and mapped through the alias map), or None for an empty cell.
+
+        :param raw: The string as it appears on the ballot
+        :type raw: str or None
+        :return: The canonical candidate name
+        :rtype: str or None
+        """
+        if raw is None or raw != raw:   # None or NaN
+            return None
+        name = self._canonical.get(raw)
+        if name is None:
+            name = str(raw).strip()
+            name = self.aliases.get(name.lower(), name)
+            self._canonical[raw] = name
+        return name
+
+    def register(self, name: str):
+        """
+        Adds a canonical name to the registry if it is not already there and returns its code.
+
+        :param name: The canonical candidate name
+        :type name: str
+        :return: The candidate code (shared with Voter and BallotStore)
+        :rtype: int
+        """
+        code = self.codes.get(name)
+        if code is None:
+            code = candidate_code(name)
+            self.codes[name] = code
+            self.names.append(name)
+        return code
+
+    def code(self, raw: str):
+        """
+        Returns the code for a raw ballot string, registering its canonical name if needed. Empty cells get code 0.
+
+        :param raw: The string as it appears on the ballot
+        :type raw: str or None
+        :return: The candidate code
+        :rtype: int
+        """
+        name = self.canonical(raw)
+        return 0 if name is None else self.register(name)
+
+    def color(self, name: str):
+        """
+        Returns the display color for a candidate: its campaign color if one is configured, otherwise a palette color chosen from a stable hash of the name, so colors are the same on every run.
+
+        :param name: The candidate name
+        :type name: str
+        :return: An RGB color
+        :rtype: tuple[int, int, int]
+        """
+        color = self._colors.get(name)
+        if color is None:
+            if name in self.campaign_colors:
+                color = self.campaign_colors[name]
+            else:
+                color = self.palette[zlib.crc32(str(name).encode("utf-8")) % len(self.palette)]
+            self._colors[name] = color
+        return color
@@ -0,0 +1,207 @@
+import numpy as np
+
+# pandas is imported inside the to_frame methods so that counting does not pay for it
+
+class RoundCounts:
+    """
+    Number of votes for each remaining candidate at each rank in one round. Holds the raw count matrix; a dataframe is only built when to_frame() is called.
+    """
+    def __init__(self, candidates: list[str], counts: np.ndarray):
+        self.candidates = candidates
+        self.counts = counts
+        self.index = {candidate: i for i, candidate in enumerate(candidates)}
+        self.votes = counts[:, 0] if counts.shape[1] > 0 else np.zeros(len(candidates), dtype=np.int64)
+        # descending by first-rank votes, mirroring DataFrame.sort_values so ties keep the same order
+        n = len(candidates)
+        self.order = (n - 1 - self.votes[::-1].argsort(kind='quicksort'))[::-1]
+        self.sorted_candidates = [candidates[i] for i in self.order]
+
+    def __str__(self):
+        return f"Round Counts: {dict(zip(self.sorted_candidates, self.votes[self.order].tolist()))}"
+
+    def __len__(self):
+        return len(self.candidates)
+
+    def get_counts(self, candidate: str):
+        """
+        Returns the number of votes a candidate received at each rank.
+
+        :param candidate: The candidate
+        :type candidate: str
+        :return: Vote counts by rank
+        :rtype: np.ndarray
+        """
+        return self.counts[self.index[candidate]]
+
+    def to_frame(self):
+        """
+        Returns a dataframe with the number of votes for each candidate at each rank, sorted by first-rank votes.
+
+        :return: A dataframe with candidates as index and 'Rank n' columns
+        :rtype: pd.DataFrame
+        """
+        import pandas as pd
+        # a new frame each time, since RoundCounts may be shared through the VoteCounter cache
+        columns = [f'Rank {i}' for i in range(1, self.counts.shape[1] + 1)]
+        return pd.DataFrame(self.counts[self.order], index=self.sorted_candidates, columns=columns)
+
+class ElectionResults:
+    """
+    First choice vote counts for each candidate in each round. Counts for candidates who were already eliminated are zero and flagged in the eliminated mask.
+    """
+    def __init__(self, candidates: list[str], counts: np.ndarray, eliminated: np.ndarray):
+        self.candidates = candidates
+        self.counts = counts
+        self.eliminated = eliminated
+        self._frame = None
+
+    def __str__(self):
+        return f"Election Results: {len(self.candidates)} candidates, {self.counts.shape[1]} rounds"
+
+    def get_round(self, round: int):
+        """
+        Returns the first choice vote counts for one round, in the same candidate order as self.candidates.
+
+        :param round: The round number
+        :type round: int
+        :return: Vote counts for the round
+        :rtype: np.ndarray
+        """
+        return self.counts[:, round - 1]
+
+    def to_frame(self, blank_eliminated: bool = False):
+        """
+        Returns a dataframe with the first choice vote counts for each candidate in each round.
+
+        :param blank_eliminated: If True, counts for eliminated candidates are shown as '' (the format of Election.get_election_results)
+        :type blank_eliminated: bool
+        :return: A dataframe with candidates as index and 'Round n' columns
+        :rtype: pd.DataFrame
+        """
+        import pandas as pd
+        if self._frame is None:
+            columns = [f'Round {i}' for i in range(1, self.counts.shape[1] + 1)]
+            self._frame = pd.DataFrame(self.counts, index=self.candidates, columns=columns)
+        if not blank_eliminated:
+            return self._frame
+
+        df = self._frame.copy()
+        for i, column in enumerate(df.columns):
+            if self.eliminated[:, i].any():
+                df[column] = df[column].astype(object).where(~self.eliminated[:, i], '')
+        return df
+
+    def eliminated_frame(self):
+        """
+        Returns a boolean dataframe marking which candidates were eliminated before each round.
+
+        :return: A dataframe with the same shape as to_frame()
+        :rtype: pd.DataFrame
+        """
+        import pandas as pd
+        return pd.DataFrame(self.eliminated, index=self.candidates, columns=self.to_frame().columns)
+
+class TabulationStats:
+    """
+    Ballot exhaustion, vote transfers and ranking depths collected while an election is counted.
+    """
+    def __init__(self, candidates: list[str], depth_histogram: np.ndarray):
+        self.candidates = candidates
+        self.depth_histogram = depth_histogram
+        self.exhausted = []
+        self.transfers = []
+
+    def __str__(self):
+        return f"Tabulation Stats: {len(self.exhausted)} rounds, exhausted by round {self.exhausted}"
+
+    def add_round(self, exhausted: int, transfers: np.ndarray = None):
+        """
+        Records one counted round.
+
+        :param exhausted: Number of ballots not counting for any continuing candidate in this round
+        :type exhausted: int
+        :param transfers: Ballots moved into this round, shape (candidates, candidates + 1) from eliminated candidate to receiving candidate or 'Exhausted' (None for round 1)
+        :type transfers: np.ndarray or None
+        """
+        self.exhausted.append(int(exhausted))
+        if transfers is not None:
+            self.transfers.append(transfers)
+
+    def newly_exhausted(self):
+        """
+        Returns the number of ballots that became exhausted in each round.
+
+        :return: Newly exhausted ballots per round
+        :rtype: np.ndarray
+        """
+        return np.diff(np.array(self.exhausted, dtype=np.int64), prepend=0)
+
+    def exhausted_frame(self):
+        """
+        Returns a dataframe with total and newly exhausted ballots in each round.
+
+        :return: A dataframe indexed by round
+        :rtype: pd.DataFrame
+        """
+        import pandas as pd
+        return pd.DataFrame({'Exhausted': self.exhausted, 'Newly Exhausted': self.newly_exhausted()},
+                            index=[f'Round {i}' for i in range(1, len(self.exhausted) + 1)])
+
+    def transfer_frame(self, round: int):
+        """
+        Returns a dataframe of the ballots transferred from the candidate(s) eliminated in a round to each receiving candidate or 'Exhausted'.
+
+        :param round: The round in which the candidate(s) were eliminated
+        :type round: int
+        :return: A dataframe with eliminated candidates as index
+        :rtype: pd.DataFrame
+        """
+        import pandas as pd
+        if round < 1 or round > len(self.transfers):
+            raise ValueError(f"Round must be between 1 and {len(self.transfers)}")
+        transfers = self.transfers[round - 1]
+        rows = np.flatnonzero(transfers.sum(axis=1))
+        return pd.DataFrame(transfers[rows], index=[self.candidates[i] for i in rows], columns=self.candidates + ['Exhausted'])
+
+    def depth_frame(self):
+        """
+        Returns a dataframe with the number of ballots by number of choices ranked.
+
+        :return: A dataframe indexed by number of choices ranked
+        :rtype: pd.DataFrame
+        """
+        import pandas as pd
+        return pd.DataFrame({'Ballots': self.depth_histogram}, index=pd.Index(range(len(self.depth_histogram)), name='Choices Ranked'))
+
+class MarginAnalysis:
+    """
+    How close each round of an election was. For every elimination and for the final round it holds the margin in votes and an upper bound on the number of ballots that would have to change to alter the result, checked by recounting with those ballots changed.
+    """
+    def __init__(self, rounds: list[dict], final: dict):
+        self.rounds = rounds
+        self.final = final
+        flips = [entry["changes"] for entry in rounds + [final] if entry and entry["winner_flips"]]
+        self.winner_changes = min(flips) if flips else None
+
+    def __str__(self):
+        return f"Margin Analysis: {len(self.rounds)} eliminations, winner changes with at most {self.winner_changes} ballots"
+
+    def to_dict(self):
+        """
+        Returns the analysis as a JSON-serializable dictionary.
+
+        :return: The analysis
+        :rtype: dict
+        """
+        return {"rounds": self.rounds, "final": self.final, "winner_changes": self.winner_changes}
+
+    def to_frame(self):
+        """
+        Returns a dataframe with one row per elimination and a last row for the final round.
+
+        :return: A dataframe indexed by round
+        :rtype: pd.DataFrame
+        """
+        import pandas as pd
+        rows = self.rounds + ([self.final] if self.final else [])
+        return pd.DataFrame(rows).set_index('round') if rows else pd.DataFrame()
@@ -0,0 +1,209 @@
+import hashlib
+import math
+
+import numpy as np
+
+from ballots import BallotStore
+
+RISK_LIMIT = 0.05
+GAMMA = 1.03905   # error inflation factor for the Kaplan-Markov risk measure
+
+class Assertion:
+    """
+    A claim about the count that an audit can check ballot by ballot: in the round where `eliminated` are out, `winner` has more ballots counting for it than the `losers` together. NEB ("not eliminated before") assertions instead compare the winner's first choices with the ballots ranking the loser above the winner.
+    """
+    def __init__(self, kind: str, winner: str, losers: list[str], eliminated: list[str] = None, margin: int = 0, diluted_margin: float = 0.0):
+        self.kind = kind
+        self.winner = winner
+        self.losers = list(losers)
+        self.eliminated = list(eliminated or [])
+        self.margin = margin
+        self.diluted_margin = diluted_margin
+
+    def __str__(self):
+        return f"Assertion ({self.kind}): {self.winner} beats {', '.join(self.losers)} by {self.margin} with {len(self.eliminated)} eliminated"
+
+    def scores(self, store: BallotStore, no_confidence_last: bool = False, rows: np.ndarray = None):
+        """
+        Returns each ballot's contribution to the assertion's margin: +1 for the winner, -1 for a loser, 0 otherwise.
+
+        :param store: The ballots
+        :type store: BallotStore
+        :param no_confidence_last: If True, no choices after 'No Confidence' will be considered
+        :type no_confidence_last: bool
+        :param rows: Only score these ballots (optional)
+        :type rows: np.ndarray or None
+        :return: One score per ballot
+        :rtype: np.ndarray
+        """
+        winner = store.codes.get(self.winner, -1)
+        losers = [store.codes[loser] for loser in self.losers if loser in store.codes]
+        if self.kind == "neb":
+            first = store.first_choices(store.eliminated_array([]), no_confidence_last, rows)
+            positions = store.rank_positions(no_confidence_last)
+            if rows is not None:
+                positions = positions[rows]
+            above = positions[:, losers[0]] < positions[:, winner] if losers and winner >= 0 else np.zeros(len(first), dtype=bool)
+            return (first == winner).astype(np.int8) - above.astype(np.int8)
+        first = store.first_choices(store.eliminated_array(self.eliminated), no_confidence_last, rows)
+        return (first == winner).astype(np.int8) - np.isin(first, losers).astype(np.int8)
+
+    def to_dict(self):
+        """
+        Returns the assertion as a JSON-serializable dictionary.
+
+        :return: The assertion
+        :rtype: dict
+        """
+        return {"kind": self.kind, "winner": self.winner, "losers": self.losers, "eliminated": self.eliminated,
+                "margin": int(self.margin), "diluted_margin": float(self.diluted_margin)}
+
+def election_assertions(election):
+    """
+    Returns the assertions that together confirm an election's elimination order and winner: in every round, each continuing candidate beats the candidate eliminated in that round (or all candidates eliminated in a bulk elimination combined), and the winner beats the other continuing candidates combined in the last round if it was won by majority. NEB assertions of the winner against every other candidate are added with kind 'neb' for reference; they are not needed to confirm the outcome. Margins are computed from the ballot store, so run_election() must have been called.
+
+    :param election: Election object after run_election()
+    :type election: Election
+    :return: The assertions, with margins in ballots
+    :rtype: list[Assertion]
+    """
+    if election.last_round == 0:
+        raise ValueError("Election has not been run yet. Please call run_election() first.")
+    store = election.get_ballot_store()
+    n = max(len(store), 1)
+    assertions = []
+
+    for round in range(1, election.last_round + 1):
+        out = election.eliminated_before(round)
+        tally = store.tally(store.first_choices(store.eliminated_array(out), election.no_confidence_last))
+        votes = {c: int(tally[store.codes[c]]) for c in election.candidates if c not in out}
+        if round <= len(election.round_eliminations):
+            # candidates eliminated together in a bulk elimination are asserted to lose as a group
+            losers = election.round_eliminations[round - 1]
+            for candidate in votes:
+                if candidate not in losers:
+                    margin = votes[candidate] - sum(votes[loser] for loser in losers)
+                    assertions.append(Assertion("elimination", candidate, losers, out, margin, margin / n))
+        elif election.winner is not None and election.winner in votes:
+            others = [c for c in votes if c != election.winner]
+            margin = votes[election.winner] - sum(votes[c] for c in others)
+            if others:
+                assertions.append(Assertion("majority", election.winner, others, out, margin, margin / n))
+
+    if election.winner is not None:
+        for loser in election.candidates:
+            if loser != election.winner:
+                assertion = Assertion("neb", election.winner, [loser])
+                assertion.margin = int(assertion.scores(store, election.no_confidence_last).sum())
+                assertion.diluted_margin = assertion.margin / n
+                assertions.append(assertion)
+    return assertions
+
+def sample_size(assertions: list[Assertion], n_ballots: int, risk_limit: float = RISK_LIMIT, gamma: float = GAMMA):
+    """
+    Returns the number of ballots to sample for a comparison audit of the required (non-NEB) assertions, assuming no discrepancies are found: n = ceil(-2 * gamma * ln(risk_limit) / mu), where mu is the smallest diluted margin. A full hand count is needed if an assertion does not hold.
+
+    :param assertions: Assertions from election_assertions()
+    :type assertions: list[Assertion]
+    :param n_ballots: Number of ballots in the election
+    :type n_ballots: int
+    :param risk_limit: Largest acceptable chance of confirming a wrong outcome
+    :type risk_limit: float
+    :param gamma: Error inflation factor
+    :type gamma: float
+    :return: The initial sample size
+    :rtype: int
+    """
+    required = [a for a in assertions if a.kind != "neb"]
+    if not required:
+        return 0
+    margin = min(a.diluted_margin for a in required)
+    if margin <= 0:
+        return n_ballots
+    return min(n_ballots, math.ceil(-2 * gamma * math.log(risk_limit) / margin))
+
+def sample_ballots(seed: str, n_sample: int, n_ballots: int):
+    """
+    Draws a reproducible sample of ballot rows with replacement. Draw i is SHA-256(seed + "," + i) modulo n_ballots, so anyone with the public seed can repeat the draw.
+
+    :param seed: Public random seed, e.g. digits from dice rolled at a public meeting
+    :type seed: str
+    :param n_sample: Number of draws
+    :type n_sample: int
+    :param n_ballots: Number of ballots to draw from
+    :type n_ballots: int
+    :return: Sampled row indexes in draw order (rows may repeat)
+    :rtype: np.ndarray
+    """
+    if n_ballots <= 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.array([int(hashlib.sha256(f"{seed},{i}".encode("utf-8")).hexdigest(), 16) % n_ballots for i in range(1, n_sample + 1)], dtype=np.int64)
+
+class AuditEvaluation:
+    """
+    Discrepancies between sampled stored ballots and the audited records, and the resulting risk for each assertion.
+    """
+    def __init__(self, assertions: list[Assertion], discrepancies: np.ndarray, p_values: np.ndarray, risk_limit: float):
+        self.assertions = assertions
+        self.discrepancies = discrepancies
+        self.p_values = p_values
+        self.risk_limit = risk_limit
+        required = [i for i, a in enumerate(assertions) if a.kind != "neb"]
+        self.risk = float(p_values[required].max()) if required else 1.0
+        self.confirmed = bool(required) and self.risk <= risk_limit
+
+    def __str__(self):
+        return f"Audit Evaluation: {'confirmed' if self.confirmed else 'not confirmed'}, risk {self.risk:.4f}"
+
+    def to_dict(self):
+        """
+        Returns the evaluation as a JSON-serializable dictionary.
+
+        :return: The evaluation
+        :rtype: dict
+        """
+        rows = []
+        for assertion, counts, p_value in zip(self.assertions, self.discrepancies.tolist(), self.p_values.tolist()):
+            row = assertion.to_dict()
+            row.update({"overstatements": {"2": counts[4], "1": counts[3]}, "understatements": {"1": counts[1], "2": counts[0]}, "risk": p_value})
+            rows.append(row)
+        return {"confirmed": self.confirmed, "risk": self.risk, "risk_limit": self.risk_limit, "assertions": rows}
+
+def evaluate_sample(store: BallotStore, assertions: list[Assertion], rows: np.ndarray, audited: list[list[str]],
+                    no_confidence_last: bool = False, risk_limit: float = RISK_LIMIT, gamma: float = GAMMA):
+    """
+    Compares sampled stored ballots with the audited records of the same ballots and returns the Kaplan-Markov risk for each assertion. A ballot overstates an assertion by (stored score - audited score), from -2 to 2 votes.
+
+    :param store: The stored ballots the count was made from
+    :type store: BallotStore
+    :param assertions: Assertions from election_assertions()
+    :type assertions: list[Assertion]
+    :param rows: Sampled rows (see sample_ballots)
+    :type rows: np.ndarray
+    :param audited: The audited ranking of each sampled ballot, most preferred first
+    :type audited: list[list[str]]
+    :param no_confidence_last: If True, no choices after 'No Confidence' will be considered
+    :type no_confidence_last: bool
+    :param risk_limit: Largest acceptable chance of confirming a wrong outcome
+    :type risk_limit: float
+    :param gamma: Error inflation factor
+    :type gamma: float
+    :return: Discrepancy counts and risks
+    :rtype: AuditEvaluation
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    paper = BallotStore.from_rankings(audited, store.n_ranks)
+    # columns: overstatement of -2, -1, 0, 1, 2 votes
+    discrepancies = np.zeros((len(assertions), 5), dtype=np.int64)
+    p_values = np.ones(len(assertions))
+    for i, assertion in enumerate(assertions):
+        overstatement = assertion.scores(store, no_confidence_last, rows).astype(np.int64) - assertion.scores(paper, no_confidence_last).astype(np.int64)
+        discrepancies[i] = np.bincount(overstatement + 2, minlength=5)
+        if assertion.diluted_margin <= 0:
+            continue
+        u = 2 * gamma / assertion.diluted_margin
+        u2, u1, _, o1, o2 = discrepancies[i]
+        p = (1 - 1 / u) ** len(rows)
+        p *= (1 - 1 / (2 * gamma)) ** -o1 * (1 - 1 / gamma) ** -o2 * (1 + 1 / (2 * gamma)) ** -u1 * (1 + 1 / gamma) ** -u2
+        p_values[i] = min(1.0, p)
+    return AuditEvaluation(assertions, discrepancies, p_values, risk_limit)
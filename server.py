@@ -0,0 +1,373 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import struct
+
+from classes import Election, Voter
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+def election_rounds(election: Election):
+    """
+    Returns the per-round display data for an election that has been run: candidates sorted by votes, vote counts, percentages and the projection for the round (majority winner, plurality leader and the candidate eliminated).
+
+    :param election: Election object after run_election()
+    :type election: Election
+    :return: One dict per round
+    :rtype: list[dict]
+    """
+    rounds = []
+    for round in range(1, election.last_round + 1):
+        counts = election.round_counts(round)
+        votes = counts.votes[counts.order].tolist()
+        total = sum(votes)
+        percentages = [_percent(v, total) for v in votes]
+        majority = next((c for c, v in zip(counts.sorted_candidates, votes) if total > 0 and v > total / 2), None)
+        rounds.append({
+            "round": round,
+            "candidates": counts.sorted_candidates,
+            "votes": votes,
+            "percentages": percentages,
+            "majority": majority,
+            "plurality": counts.sorted_candidates[0] if counts.sorted_candidates else None,
+            "eliminated": ", ".join(election.round_eliminations[round - 1]) if round <= len(election.round_eliminations) else None,
+        })
+    return rounds
+
+def _percent(votes: int, total: int):
+    return round(votes / total * 100, 2) if total > 0 else 0.0
+
+class ResultsServer:
+    """
+    Owns one Election, ingests ballot batches over HTTP and pushes round-by-round JSON deltas to every WebSocket subscriber. Each batch is counted once, however many clients are connected.
+
+    Endpoints: GET /state (full snapshot), POST /ballots (JSON list of {"voter_id", "school", "year", "choices"}), GET /ws (WebSocket subscription).
+    """
+    def __init__(self, candidates: list[str], voters: list[Voter] = None, no_confidence_last: bool = False, office_title: str = "",
+                 send_timeout: float = 5.0):
+        self.election = Election(list(voters or []), candidates, no_confidence_last)
+        self.office_title = office_title
+        self.send_timeout = send_timeout
+        self.clients = set()
+        self.version = 0
+        self.rounds = []
+        self.server = None
+        if self.election.voters:
+            self.recount()
+
+    def snapshot(self):
+        """
+        Returns the full current state as sent to new subscribers.
+
+        :return: The state message
+        :rtype: dict
+        """
+        return {"type": "snapshot", "version": self.version, "office": self.office_title, "ballots": len(self.election.voters),
+                "winner": self.election.winner, "last_round": len(self.rounds), "rounds": self.rounds}
+
+    def recount(self):
+        """
+        Reruns the count and returns a delta message holding only the rounds that changed since the last count.
+
+        :return: The delta message
+        :rtype: dict
+        """
+        if self.election.voters:
+            self.election.run_election()
+            rounds = election_rounds(self.election)
+        else:
+            rounds = []
+        changed = [r for i, r in enumerate(rounds) if i >= len(self.rounds) or self.rounds[i] != r]
+        self.rounds = rounds
+        self.version += 1
+        return {"type": "delta", "version": self.version, "ballots": len(self.election.voters),
+                "winner": self.election.winner, "last_round": len(rounds), "rounds": changed}
+
+    def ingest(self, ballots: list[dict]):
+        """
+        Adds a batch of ballots, recounts and returns the resulting delta message. The whole batch is checked before any ballot is added, so a bad batch changes nothing.
+
+        :param ballots: Ballots as dicts with 'voter_id', 'school', 'year' and 'choices' (list of candidate names, None for an empty rank)
+        :type ballots: list[dict]
+        :return: The delta message
+        :rtype: dict
+        :raises ValueError: If the batch or any ballot in it is malformed
+        """
+        check_ballots(ballots)
+        voters = []
+        for ballot in ballots:
+            choices = ballot.get("choices", [])
+            voter = Voter(ballot.get("voter_id", 0), ballot.get("school", "N/A"), ballot.get("year", 0), len(choices))
+            for rank, choice in enumerate(choices, start=1):
+                voter.set_choice(rank, choice)
+            voters.append(voter)
+        self.election.add_voters(voters)
+        return self.recount()
+
+    async def publish(self, ballots: list[dict]):
+        """
+        Ingests a batch of ballots and pushes the delta to all subscribers.
+
+        :param ballots: Ballots as accepted by ingest()
+        :type ballots: list[dict]
+        :return: The delta message
+        :rtype: dict
+        """
+        delta = self.ingest(ballots)
+        await self.broadcast(delta)
+        return delta
+
+    async def broadcast(self, message: dict):
+        """
+        Sends a message to all subscribers at once. Subscribers whose connection fails or who do not take the message within send_timeout seconds are dropped, so one slow display does not hold up the others.
+
+        :param message: The message
+        :type message: dict
+        """
+        frame = ws_frame(json.dumps(message))
+        clients = list(self.clients)
+        for writer in clients:
+            writer.write(frame)
+        results = await asyncio.gather(*(asyncio.wait_for(writer.drain(), self.send_timeout) for writer in clients), return_exceptions=True)
+        for writer, result in zip(clients, results):
+            if isinstance(result, Exception):
+                self.clients.discard(writer)
+                writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765):
+        """
+        Starts listening for HTTP and WebSocket connections.
+
+        :param host: Interface to bind to
+        :type host: str
+        :param port: Port to listen on (0 picks a free port)
+        :type port: int
+        :return: The asyncio server
+        :rtype: asyncio.Server
+        """
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            method, path, headers = await read_http_request(reader)
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+            if path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                await self._serve_websocket(reader, writer, headers)
+            elif method == "GET" and path == "/state":
+                await send_http(writer, 200, self.snapshot())
+            elif method == "POST" and path == "/ballots":
+                await send_http(writer, 200, await self.publish(json.loads(body or b"[]")))
+            else:
+                await send_http(writer, 404, {"error": f"no route for {method} {path}"})
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except (ValueError, KeyError, TypeError) as e:
+            await send_http(writer, 400, {"error": str(e)})
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+    async def _serve_websocket(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, headers: dict):
+        accept = base64.b64encode(hashlib.sha1((headers["sec-websocket-key"] + WS_GUID).encode()).digest()).decode()
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+        writer.write(ws_frame(json.dumps(self.snapshot())))
+        await writer.drain()
+        self.clients.add(writer)
+        # subscribers only listen; wait for a close frame or disconnect
+        while True:
+            opcode, payload = await read_ws_frame(reader)
+            if opcode == 0x8:
+                writer.write(ws_frame(b"", opcode=0x8))
+                return
+            if opcode == 0x9:
+                writer.write(ws_frame(payload, opcode=0xA))
+
+def check_ballots(ballots: list[dict]):
+    """
+    Checks the types in a batch of posted ballots.
+
+    :param ballots: Ballots as accepted by ResultsServer.ingest()
+    :type ballots: list[dict]
+    :raises ValueError: If the batch is not a list or a ballot is malformed
+    """
+    if not isinstance(ballots, list):
+        raise ValueError("ballots must be a JSON list")
+    for i, ballot in enumerate(ballots):
+        if not isinstance(ballot, dict):
+            raise ValueError(f"ballot {i} must be an object")
+        choices = ballot.get("choices", [])
+        if not isinstance(choices, list):
+            raise ValueError(f"ballot {i}: choices must be a list")
+        if not all(choice is None or isinstance(choice, str) for choice in choices):
+            raise ValueError(f"ballot {i}: choices must be candidate names or null")
+        for key in ("voter_id", "year"):
+            if key in ballot and (not isinstance(ballot[key], int) or isinstance(ballot[key], bool)):
+                raise ValueError(f"ballot {i}: {key} must be an integer")
+        if "school" in ballot and not isinstance(ballot["school"], str):
+            raise ValueError(f"ballot {i}: school must be a string")
+
+async def read_http_request(reader: asyncio.StreamReader):
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    if not request_line:
+        raise ConnectionError("empty request")
+    method, path, _ = request_line.split(" ", 2)
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        key, _, value = line.partition(":")
+        headers[key.strip().lower()] = value.strip()
+    return method, path, headers
+
+async def send_http(writer: asyncio.StreamWriter, status: int, payload: dict):
+    body = json.dumps(payload).encode()
+    reason = {200: "OK", 400: "Bad Request", 404: "Not Found"}.get(status, "")
+    writer.write((f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                  f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode() + body)
+    await writer.drain()
+
+def ws_frame(payload, opcode: int = 0x1, mask: bool = False):
+    """
+    Encodes one WebSocket frame. Frames sent by a client must be masked.
+
+    :param payload: Frame payload (text is UTF-8 encoded)
+    :type payload: str or bytes
+    :param opcode: WebSocket opcode (0x1 text, 0x8 close, 0x9 ping, 0xA pong)
+    :type opcode: int
+    :param mask: If True, mask the payload
+    :type mask: bool
+    :return: The encoded frame
+    :rtype: bytes
+    """
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    header = bytes([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    if len(payload) < 126:
+        header += bytes([mask_bit | len(payload)])
+    elif len(payload) < 1 << 16:
+        header += bytes([mask_bit | 126]) + struct.pack("!H", len(payload))
+    else:
+        header += bytes([mask_bit | 127]) + struct.pack("!Q", len(payload))
+    if mask:
+        key = os.urandom(4)
+        payload = bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+        header += key
+    return header + payload
+
+async def read_ws_frame(reader: asyncio.StreamReader):
+    """
+    Reads one WebSocket frame (fragmented messages are not supported).
+
+    :param reader: Stream to read from
+    :type reader: asyncio.StreamReader
+    :return: The opcode and unmasked payload
+    :rtype: tuple[int, bytes]
+    """
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", await reader.readexactly(8))[0]
+    key = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if key is not None:
+        payload = bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+    return first & 0x0F, payload
+
+async def subscribe(host: str = "127.0.0.1", port: int = 8765):
+    """
+    Connects to a ResultsServer and yields each snapshot/delta message as a dict.
+
+    :param host: Server host
+    :type host: str
+    :param port: Server port
+    :type port: int
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write((f"GET /ws HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                  f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+    await writer.drain()
+    status = (await reader.readline()).decode("latin-1")
+    if " 101 " not in status:
+        raise ConnectionError(f"WebSocket upgrade failed: {status.strip()}")
+    while (await reader.readline()).strip():
+        pass
+    try:
+        while True:
+            opcode, payload = await read_ws_frame(reader)
+            if opcode == 0x8:
+                return
+            if opcode == 0x1:
+                yield json.loads(payload)
+    finally:
+        writer.close()
+
+def apply_message(state: dict, message: dict):
+    """
+    Applies a snapshot or delta message to a client-side state dict (as held by display clients).
+
+    :param state: Client state, updated in place
+    :type state: dict
+    :param message: Message received from subscribe()
+    :type message: dict
+    :return: The updated state
+    :rtype: dict
+    """
+    if message["type"] == "snapshot":
+        state.clear()
+        state.update({k: v for k, v in message.items() if k != "type"})
+        return state
+    rounds = {r["round"]: r for r in state.get("rounds", [])}
+    for r in message["rounds"]:
+        rounds[r["round"]] = r
+    state.update({k: v for k, v in message.items() if k not in ("type", "rounds")})
+    state["rounds"] = [rounds[i] for i in range(1, message["last_round"] + 1)]
+    return state
+
+async def _replay(server: ResultsServer, voters: list[Voter], batches: int, interval: float):
+    size = max(1, len(voters) // batches)
+    for start in range(0, len(voters), size):
+        await asyncio.sleep(interval)
+        batch = [{"voter_id": v.voter_id, "school": v.school, "year": v.year,
+                  "choices": [v.get_choice(i) for i in range(1, v.n_candidates + 1)]} for v in voters[start:start + size]]
+        await server.publish(batch)
+
+async def serve(candidates: list[str], host: str, port: int, replay: list[Voter] = None, batches: int = 20, interval: float = 2.0,
+                no_confidence_last: bool = False, office_title: str = ""):
+    server = ResultsServer(candidates, no_confidence_last=no_confidence_last, office_title=office_title)
+    await server.start(host, port)
+    print(f"Serving results on http://{host}:{port} (WebSocket at /ws)")
+    if replay:
+        asyncio.ensure_future(_replay(server, replay, batches, interval))
+    async with server.server:
+        await server.server.serve_forever()
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="Serve live RCV results to display clients over HTTP/WebSocket.")
+    parser.add_argument("file", nargs="?", help="export to replay in batches (for testing)")
+    parser.add_argument("--candidates", nargs="*", help="candidates, when starting without a file")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--batches", type=int, default=20, help="number of batches to replay the file in")
+    parser.add_argument("--interval", type=float, default=2.0, help="seconds between replayed batches")
+    parser.add_argument("--no-confidence-last", action="store_true")
+    parser.add_argument("--office", default="ASG President")
+    args = parser.parse_args(argv)
+
+    voters, candidates = None, args.candidates or []
+    if args.file:
+        from reader import read_election_data
+        voters, candidates = read_election_data(args.file)
+    asyncio.run(serve(candidates, args.host, args.port, voters, args.batches, args.interval, args.no_confidence_last, args.office))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import inspect
+import multiprocessing
+import os
+
+import numpy as np
+
+from ballots import BallotStore
+from shared import SharedBallots
+
+class ShardedStore(BallotStore):
+    """
+    A ballot store whose per-ballot work is split across worker processes. It wraps the store it is given and keeps that store's layout (rank matrix or ragged): the ballots are placed in shared memory once and each worker attaches to a contiguous shard of them without copying; first choices, rank counts and ranking depths are computed by every shard in parallel and combined here, and everything else is answered by the wrapped store, so everything built on BallotStore (VoteCounter, run_election, tiebreaks) runs unchanged and gives the same results as the serial store.
+    """
+    def __init__(self, store: BallotStore, workers: int = None):
+        # BallotStore.__init__ is not called: the ballots, key and version (so the cached tallies) are the wrapped store's
+        self.store = store
+        workers = max(1, min(workers or os.cpu_count() or 1, len(store) or 1))
+        self.bounds = np.linspace(0, len(store), workers + 1).astype(np.int64)
+        self._pipes = []
+        self._processes = []
+        self.shared = SharedBallots(store)
+        context = multiprocessing.get_context()
+        for start, end in zip(self.bounds[:-1], self.bounds[1:]):
+            parent, child = context.Pipe()
+            process = context.Process(target=_serve_shard, args=(child, self.shared.handle, int(start), int(end)), daemon=True)
+            process.start()
+            child.close()
+            self._pipes.append(parent)
+            self._processes.append(process)
+
+    def __getattr__(self, name: str):
+        # attributes not set here (names, codes, key, version, the ballot arrays) are the wrapped store's
+        if name == "store":
+            raise AttributeError(name)
+        return getattr(self.store, name)
+
+    def __len__(self):
+        return len(self.store)
+
+    @property
+    def n_ranks(self):
+        return self.store.n_ranks
+
+    def __str__(self):
+        return f"Sharded BallotStore: {len(self)} ballots in {len(self._pipes)} shards"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """
+        Stops the worker processes.
+        """
+        for pipe in self._pipes:
+            try:
+                pipe.send(None)
+                pipe.close()
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._pipes = []
+        self._processes = []
+        self.shared.close()
+
+    def _broadcast(self, op: str, *args):
+        # send to every shard before waiting, so shards work in parallel
+        for pipe in self._pipes:
+            pipe.send((op, args))
+        results = [pipe.recv() for pipe in self._pipes]
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        return results
+
+    def first_choices(self, eliminated: np.ndarray, no_confidence_last: bool = False, rows: np.ndarray = None):
+        if rows is not None or not self._pipes:
+            return self.store.first_choices(eliminated, no_confidence_last, rows)
+        return np.concatenate(self._broadcast("first_choices", eliminated, no_confidence_last))
+
+    def rank_counts(self, eliminated: np.ndarray, no_confidence_last: bool = False):
+        if not self._pipes:
+            return self.store.rank_counts(eliminated, no_confidence_last)
+        return np.sum(self._broadcast("rank_counts", eliminated, no_confidence_last), axis=0)
+
+    def ranking_depths(self, no_confidence_last: bool = False):
+        if not self._pipes:
+            return self.store.ranking_depths(no_confidence_last)
+        return np.concatenate(self._broadcast("ranking_depths", no_confidence_last))
+
+def _delegate(name: str):
+    def method(self, *args, **kwargs):
+        return getattr(self.store, name)(*args, **kwargs)
+    method.__name__ = name
+    method.__doc__ = getattr(BallotStore, name).__doc__
+    return method
+
+# the rest of the BallotStore interface runs on the wrapped store, in its own layout
+for _name, _member in list(vars(BallotStore).items()):
+    if inspect.isfunction(_member) and not _name.startswith("__") and _name not in vars(ShardedStore):
+        setattr(ShardedStore, _name, _delegate(_name))
+
+def _serve_shard(pipe, handle, start: int, end: int):
+    # a contiguous shard is a view of the shared arrays in either layout
+    store = handle.attach().subset(slice(start, end))
+    while True:
+        try:
+            message = pipe.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        op, args = message
+        try:
+            pipe.send(getattr(store, op)(*args))
+        except Exception as e:
+            pipe.send(e)
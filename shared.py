@@ -0,0 +1,112 @@
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from ballots import BallotStore, RaggedBallotStore
+
+# segments attached in this process, kept open while any view of them may be alive
+_attached = {}
+
+class SharedStoreHandle:
+    """
+    Small, picklable description of a ballot store placed in shared memory. Send it to worker processes and call attach() there to use the ballots without copying them.
+    """
+    def __init__(self, segments: dict[str, tuple[str, tuple, str]], names: list[str], schools: list[str], key: tuple, n_ranks: int = None):
+        self.segments = segments
+        self.names = names
+        self.schools = schools
+        self.key = key
+        # set for ballots in the ragged layout
+        self.n_ranks = n_ranks
+
+    def __str__(self):
+        return f"Shared Store Handle: {', '.join(name for name, _, _ in self.segments.values())}"
+
+    def attach(self):
+        """
+        Returns a read-only ballot store backed by the shared segments. The segments stay mapped in this process until detach() is called.
+
+        :return: The shared ballot store
+        :rtype: BallotStore or RaggedBallotStore
+        """
+        arrays = {}
+        for field, (name, shape, dtype) in self.segments.items():
+            if name not in _attached:
+                _attached[name] = _open_segment(name)
+            array = np.ndarray(shape, dtype=dtype, buffer=_attached[name].buf)
+            array.flags.writeable = False
+            arrays[field] = array
+        schools = np.array(self.schools, dtype=object)[arrays["school_codes"]]
+        if "choices" in arrays:
+            return RaggedBallotStore(arrays["choices"], arrays["offsets"], self.n_ranks, self.names, schools, arrays["years"], arrays["nc_cutoff"], key=self.key)
+        return BallotStore(arrays["ranks"], self.names, schools, arrays["years"], arrays["nc_cutoff"], key=self.key)
+
+    def detach(self):
+        """
+        Unmaps the segments attached in this process. Stores returned by attach() must not be used afterwards.
+        """
+        for name, _, _ in self.segments.values():
+            memory = _attached.pop(name, None)
+            if memory is not None:
+                memory.close()
+
+class SharedBallots:
+    """
+    Owner of a ballot store copied into multiprocessing.shared_memory: the rank matrix (or the flat choices and offsets of a RaggedBallotStore), 'No Confidence' cutoffs, years and school codes each get a segment. The segments are unlinked by close(), when the owner is garbage collected, or at interpreter exit, so a failed run does not leak them.
+    """
+    def __init__(self, store: BallotStore):
+        school_names, school_codes = np.unique(store.schools.astype(str), return_inverse=True) if len(store) else (np.array([], dtype=str), np.zeros(0, dtype=np.int32))
+        ragged = isinstance(store, RaggedBallotStore)
+        fields = {"choices": store.choices, "offsets": store.offsets} if ragged else {"ranks": store.ranks}
+        fields.update({
+            "nc_cutoff": store.nc_cutoff,
+            "years": store.years,
+            "school_codes": school_codes.astype(np.int32),
+        })
+        self._memory = []
+        segments = {}
+        for field, array in fields.items():
+            array = np.ascontiguousarray(array)
+            memory = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf)[...] = array
+            self._memory.append(memory)
+            segments[field] = (memory.name, array.shape, array.dtype.str)
+        self.handle = SharedStoreHandle(segments, list(store.names), school_names.tolist(), store.key, store.n_ranks if ragged else None)
+        # also runs at interpreter exit; if the process is killed, the resource tracker unlinks the segments
+        self._finalizer = weakref.finalize(self, _release, self._memory)
+
+    def __str__(self):
+        return f"Shared Ballots: {len(self._memory)} segments, {self.nbytes} bytes"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def nbytes(self):
+        return sum(memory.size for memory in self._memory)
+
+    def close(self):
+        """
+        Unmaps and unlinks the shared segments. Stores attached in other processes keep working until they are released, but no new process can attach.
+        """
+        self._finalizer()
+
+def _release(segments):
+    for memory in segments:
+        try:
+            memory.close()
+            memory.unlink()
+        except (FileNotFoundError, BufferError):
+            pass
+
+def _open_segment(name: str):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # before Python 3.13 attaching also registers the segment with the resource tracker; worker
+        # processes share the owner's tracker, so this does not unlink it early
+        return shared_memory.SharedMemory(name=name)
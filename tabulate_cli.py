@@ -0,0 +1,172 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from classes import Election
+from audit import AuditTranscript
+
+def summarize_election(election: Election, breakdowns: list[str] = None):
+    """
+    Returns a JSON-serializable summary of an election that has been run: winner, elimination order, round tables, exhausted ballots, transfers, ranking depths, counting diagnostics, margins and optional per-school/per-year round tables.
+
+    :param election: Election object after run_election()
+    :type election: Election
+    :param breakdowns: Demographic fields to break results down by ('school' and/or 'year') (optional)
+    :type breakdowns: list[str] or None
+    :return: The election summary
+    :rtype: dict
+    """
+    results = election.election_results()
+    summary = {
+        "winner": election.winner,
+        "eliminated": list(election.eliminated_candidates),
+        "round_eliminations": [list(group) for group in election.round_eliminations],
+        "rounds": _round_table(results),
+        "exhausted": list(election.stats.exhausted),
+        "transfers": [],
+        "depth_histogram": election.stats.depth_histogram.tolist(),
+        "diagnostics": election.diagnostics.to_list(),
+        "margins": election.margins().to_dict(),
+        "breakdowns": {},
+    }
+    for round, transfers in enumerate(election.stats.transfers, start=1):
+        for row in np.flatnonzero(transfers.sum(axis=1)):
+            to = dict(zip(election.candidates + ["Exhausted"], transfers[row].tolist()))
+            summary["transfers"].append({"round": round, "from": election.candidates[row], "to": to})
+
+    store = election.get_ballot_store()
+    for field in breakdowns or []:
+        values = store.schools if field == "school" else store.years
+        summary["breakdowns"][field] = {}
+        for value in sorted(set(values.tolist())):
+            filtered = election.election_results(**{field: value})
+            summary["breakdowns"][field][str(value)] = _round_table(filtered)
+    return summary
+
+def _round_table(results):
+    # eliminated candidates are left out of a round rather than shown as 0
+    table = {}
+    for i in range(results.counts.shape[1]):
+        table[f"Round {i + 1}"] = {
+            candidate: int(results.counts[row, i])
+            for row, candidate in enumerate(results.candidates) if not results.eliminated[row, i]
+        }
+    return table
+
+def tabulate_file(filepath: str, output_dir: str, asg: bool = True, no_confidence_last: bool = False,
+                  start: str = None, end: str = None, breakdowns: list[str] = None, formats: list[str] = None, transcript: bool = False,
+                  bulk_elimination: bool = False, compact_skipped: bool = False):
+    """
+    Reads one export, runs the count and writes the results to output_dir as <name>.json and/or <name>_rounds.csv and <name>_transfers.csv, and the audit transcript as <name>_transcript.jsonl if requested.
+
+    :param filepath: Path to the CSV export
+    :type filepath: str
+    :param output_dir: Directory to write results to
+    :type output_dir: str
+    :param asg: If True, read the file with the ASG schema
+    :type asg: bool
+    :param no_confidence_last: If True, no choices after 'No Confidence' will be considered
+    :type no_confidence_last: bool
+    :param start: Earliest submission time to count (optional)
+    :type start: str or None
+    :param end: Latest submission time to count (optional)
+    :type end: str or None
+    :param breakdowns: Demographic fields to break results down by (optional)
+    :type breakdowns: list[str] or None
+    :param formats: Output formats, 'json' and/or 'csv' (defaults to both)
+    :type formats: list[str] or None
+    :param transcript: If True, write an audit transcript of the count (see audit.py)
+    :type transcript: bool
+    :param bulk_elimination: If True, eliminate all mathematically defeated candidates in the same round
+    :type bulk_elimination: bool
+    :param compact_skipped: If True, move choices up over skipped ranks when validating (see validation.validate_ballots)
+    :type compact_skipped: bool
+    :return: The file path, winner and paths written
+    :rtype: dict
+    """
+    from reader import read_election_data, filter_by_time
+
+    formats = formats or ["json", "csv"]
+    voters, candidates, report = read_election_data(filepath, asg, with_report=True, compact_skipped=compact_skipped)
+    if voters is None:
+        return {"file": filepath, "error": "could not read file"}
+    voters = filter_by_time(voters, start, end)
+
+    name = os.path.splitext(os.path.basename(filepath))[0]
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+
+    election = Election(voters, candidates, no_confidence_last, bulk_elimination)
+    if transcript:
+        path = os.path.join(output_dir, f"{name}_transcript.jsonl")
+        with AuditTranscript(path) as audit_transcript:
+            election.run_election(audit_transcript)
+        written.append(path)
+    else:
+        election.run_election()
+    summary = summarize_election(election, breakdowns)
+    summary["file"] = filepath
+    summary["ballots"] = len(voters)
+    summary["validation"] = report.to_dict()
+
+    if "json" in formats:
+        path = os.path.join(output_dir, f"{name}.json")
+        with open(path, "w") as f:
+            json.dump(summary, f, indent=2)
+        written.append(path)
+    if "csv" in formats:
+        path = os.path.join(output_dir, f"{name}_rounds.csv")
+        election.get_election_results().to_csv(path)
+        written.append(path)
+        if election.stats.transfers:
+            import pandas as pd
+            path = os.path.join(output_dir, f"{name}_transfers.csv")
+            frames = [election.stats.transfer_frame(r) for r in range(1, len(election.stats.transfers) + 1)]
+            pd.concat(frames, keys=[f"Round {r}" for r in range(1, len(frames) + 1)]).to_csv(path)
+            written.append(path)
+
+    return {"file": filepath, "winner": election.winner, "written": written, "diagnostics": election.diagnostics.messages()}
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="Tabulate RCV elections from 'Cats on Campus exports without the display.")
+    parser.add_argument("files", nargs="+", help="CSV exports to tabulate (one race per file)")
+    parser.add_argument("-o", "--output-dir", default="Results", help="directory to write results to (default: Results)")
+    parser.add_argument("--no-asg", dest="asg", action="store_false", help="do not read files with the ASG schema")
+    parser.add_argument("--no-confidence-last", action="store_true", help="ignore choices ranked after 'No Confidence'")
+    parser.add_argument("--start", help="only count ballots submitted at or after this time")
+    parser.add_argument("--end", help="only count ballots submitted at or before this time")
+    parser.add_argument("--by", action="append", choices=["school", "year"], default=[], help="add round tables broken down by school or year (repeatable)")
+    parser.add_argument("--format", action="append", choices=["json", "csv"], dest="formats", help="output format (repeatable, default: json and csv)")
+    parser.add_argument("--transcript", action="store_true", help="write an audit transcript of each count (verify with audit.py)")
+    parser.add_argument("--bulk-elimination", action="store_true", help="eliminate all candidates who can no longer win in the same round")
+    parser.add_argument("--compact-skipped", action="store_true", help="move later choices up over skipped ranks instead of ending the ballot there")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of files to tabulate in parallel")
+    args = parser.parse_args(argv)
+
+    options = dict(output_dir=args.output_dir, asg=args.asg, no_confidence_last=args.no_confidence_last,
+                   start=args.start, end=args.end, breakdowns=args.by, formats=args.formats, transcript=args.transcript,
+                   bulk_elimination=args.bulk_elimination, compact_skipped=args.compact_skipped)
+    if args.jobs > 1 and len(args.files) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            outcomes = list(pool.map(_tabulate_one, [(f, options) for f in args.files]))
+    else:
+        outcomes = [_tabulate_one((f, options)) for f in args.files]
+
+    for outcome in outcomes:
+        if "error" in outcome:
+            print(f"{outcome['file']}: {outcome['error']}")
+        else:
+            print(f"{outcome['file']}: winner {outcome['winner']} ({', '.join(outcome['written'])})")
+            for message in outcome["diagnostics"]:
+                print(f"  {message}")
+    return 0 if all("error" not in outcome for outcome in outcomes) else 1
+
+def _tabulate_one(job):
+    filepath, options = job
+    return tabulate_file(filepath, **options)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
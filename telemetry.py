@@ -0,0 +1,147 @@
+import contextlib
+import json
+import time
+from collections import deque
+
+import pygame
+
+ROLLING_FRAMES = 120        # frames in the on-screen averages
+MISSED_FRAME_FACTOR = 1.5   # a frame is missed if it comes this many frame periods after the previous one
+OVERLAY_BG = (20, 20, 20)
+OVERLAY_TEXT = (120, 255, 120)
+
+class FrameTelemetry:
+    """
+    Frame-time and latency measurements of a display loop. Every frame records the time since the previous frame, the render time (drawing and flipping) and the event-loop latency (how long after the frame was due the loop got to handle events), and counts missed frames; named spans of work such as the count of a batch are timed with measure(). The last ROLLING_FRAMES frames are summarized by the on-screen overlay, and every frame and span is written to a JSON-lines log if log_path is given.
+    """
+    def __init__(self, log_path: str = None, overlay: bool = False, window: int = ROLLING_FRAMES):
+        self.log_path = log_path
+        self.overlay = overlay
+        self.scene = None
+        self.n_frames = 0
+        self.missed = 0
+        # (interval, render, latency) in seconds
+        self.frames = deque(maxlen=window)
+        self.work = {}
+        self._log = open(log_path, "a", encoding="utf-8") if log_path else None
+        self._previous_start = None
+        self._start = None
+        self._period = None
+        self._latency = 0.0
+        self._render_start = None
+
+    def __str__(self):
+        return f"Frame Telemetry: {self.n_frames} frames, {self.missed} missed"
+
+    def begin_frame(self, fps: int):
+        """
+        Marks the start of a frame, before the window events are handled.
+
+        :param fps: Frame rate the loop is aiming for
+        :type fps: int
+        """
+        now = time.perf_counter()
+        self._period = 1 / fps
+        self._latency = max(0.0, now - (self._previous_start + self._period)) if self._previous_start is not None else 0.0
+        self._start = now
+        self._render_start = None
+
+    def begin_render(self):
+        """
+        Marks the start of drawing a frame, after the window events are handled.
+        """
+        self._render_start = time.perf_counter()
+
+    def end_frame(self):
+        """
+        Marks the end of a frame, after the display is flipped (or, for a frame that did not redraw, after the events are handled), and records it.
+        """
+        if self._start is None:
+            return
+        now = time.perf_counter()
+        interval = self._start - self._previous_start if self._previous_start is not None else 0.0
+        render = now - (self._render_start if self._render_start is not None else self._start)
+        missed = self._previous_start is not None and interval > MISSED_FRAME_FACTOR * self._period
+        self.n_frames += 1
+        self.missed += missed
+        self.frames.append((interval, render, self._latency))
+        self._write({"type": "frame", "scene": self.scene, "interval_ms": interval * 1000, "render_ms": render * 1000,
+                     "latency_ms": self._latency * 1000, "missed": missed})
+        self._previous_start = self._start
+        self._start = None
+
+    @contextlib.contextmanager
+    def measure(self, name: str, **fields):
+        """
+        Times a span of work, e.g. `with telemetry.measure("count", batch=3):`. The last duration of each name is shown on the overlay.
+
+        :param name: Name of the work
+        :type name: str
+        :param fields: Extra fields for the log record
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.work[name] = seconds
+            self._write({"type": "work", "scene": self.scene, "name": name, "ms": seconds * 1000, **fields})
+
+    def summary(self):
+        """
+        Returns the rolling frame statistics.
+
+        :return: Frame rate, mean and worst render time and latency in milliseconds, and frames missed in total
+        :rtype: dict
+        """
+        intervals = [interval for interval, _, _ in self.frames if interval > 0]
+        renders = [render for _, render, _ in self.frames]
+        latencies = [latency for _, _, latency in self.frames]
+        return {
+            "fps": len(intervals) / sum(intervals) if intervals else 0.0,
+            "render_ms": sum(renders) / len(renders) * 1000 if renders else 0.0,
+            "render_max_ms": max(renders, default=0.0) * 1000,
+            "latency_ms": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+            "latency_max_ms": max(latencies, default=0.0) * 1000,
+            "missed": self.missed,
+        }
+
+    def draw(self, screen, font):
+        """
+        Draws the overlay in the top right corner of the screen if it is enabled.
+
+        :param screen: The surface to draw on
+        :type screen: pygame.Surface
+        :param font: Font of the overlay
+        :type font: pygame.font.Font
+        """
+        if not self.overlay:
+            return
+        stats = self.summary()
+        lines = [
+            f"{stats['fps']:.1f} fps   {stats['missed']} missed",
+            f"render {stats['render_ms']:.1f} ms (max {stats['render_max_ms']:.1f})",
+            f"latency {stats['latency_ms']:.1f} ms (max {stats['latency_max_ms']:.1f})",
+        ] + [f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.work.items()]
+        surfaces = [font.render(line, True, OVERLAY_TEXT) for line in lines]
+        width = max(surface.get_width() for surface in surfaces) + 16
+        height = sum(surface.get_height() for surface in surfaces) + 12
+        x = screen.get_width() - width - 10
+        pygame.draw.rect(screen, OVERLAY_BG, (x, 10, width, height))
+        y = 16
+        for surface in surfaces:
+            screen.blit(surface, (x + 8, y))
+            y += surface.get_height()
+
+    def close(self):
+        """
+        Closes the log.
+        """
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def _write(self, record: dict):
+        if self._log is not None:
+            record["time"] = time.time()
+            self._log.write(json.dumps(record) + "\n")
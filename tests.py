@@ -1,5 +1,13 @@
-from reader import read_election_data
-from classes import Voter
+from reader import read_election_data, remove_candidate
+from classes import Voter, Election
+from tabulate_cli import summarize_election
+from server import ResultsServer, apply_message
+from validation import validate_voters
+from audit import AuditTranscript, verify_transcript
+from shared import SharedBallots
+from ballots import BallotStore, RaggedBallotStore
+from rla import election_assertions, sample_size, sample_ballots, evaluate_sample
+from projection import ProjectionEngine
 from pprint import pprint
 
 def test_read_simple_1():
@@ -21,7 +29,726 @@ def test_fake_simple_1():
 
     return True
 
+def make_voters(ballots: list[list[str]], n_candidates: int):
+    voters = []
+    for i, ballot in enumerate(ballots, start=1):
+        voter = Voter(i, "Swamp", 2026 + i % 2, n_candidates)
+        for rank, choice in enumerate(ballot, start=1):
+            voter.set_choice(rank, choice)
+        voters.append(voter)
+    return voters
+
+def test_voter_slots():
+    import pickle
+    voter = make_voters([["Shrek", "Donkey", "Shrek", None, "Woody"]], 5)[0]
+    assert not hasattr(voter, "__dict__")
+    assert voter.choice_1 == "Shrek" and voter.choice_3 == "Shrek" and voter.choice_4 is None and voter.choice_5 == "Woody"
+    assert not hasattr(voter, "choice_x")
+
+    # duplicates and empty ranks collapse like the dict-based Voter did
+    assert voter.count_choices([]) == ["Shrek", "Donkey", "Woody"]
+    assert voter.count_choices(["Shrek"]) == ["Donkey", "Woody"]
+    assert voter.count_vote(["Shrek"]) == "Donkey" and voter.count_vote(["Shrek", "Donkey"]) is None   # an empty rank ends the vote
+
+    copy = pickle.loads(pickle.dumps(voter))
+    assert (copy.voter_id, copy.school, copy.year) == (voter.voter_id, voter.school, voter.year)
+    assert [copy.get_choice(rank) for rank in range(1, 6)] == ["Shrek", "Donkey", "Shrek", None, "Woody"]
+    assert copy.count_choices([]) == voter.count_choices([])
+
+    # only names on ballots get a code: not expected candidates that nobody ranked, nor unused names in a saved store
+    import json
+    from ballots import CANDIDATE_CODES, store_arrays, store_from_arrays
+    from validation import validate_voters
+    validate_voters([voter], ["Shrek", "Donkey", "Woody", "Puss in Boots"])
+    arrays = store_arrays(BallotStore.from_voters([voter], ["Shrek", "Woody"]))
+    meta = json.loads(str(arrays["store_meta"]))
+    arrays["store_meta"] = json.dumps(dict(meta, names=meta["names"] + ["Gingerbread Man"]))
+    assert store_from_arrays(arrays).ballot(0).tolist() == BallotStore.from_voters([voter], ["Shrek", "Woody"]).ballot(0).tolist()
+    assert "Puss in Boots" not in CANDIDATE_CODES and "Gingerbread Man" not in CANDIDATE_CODES
+    return True
+
+def test_eliminated_mask():
+    from ballots import eliminated_mask, candidate_code
+    voter = make_voters([["Shrek", "No Confidence", "Donkey"]], 3)[0]
+    assert voter.nc_cutoff == 2
+    mask = eliminated_mask(["Shrek"])
+    assert mask == 1 << candidate_code("Shrek") and eliminated_mask(mask) == mask
+    assert voter.count_vote(mask) == voter.count_vote(["Shrek"]) == "No Confidence"
+    assert voter.count_choices(mask, True) == ["No Confidence"]
+
+    # with No Confidence eliminated, nothing after it counts when it must be last
+    mask = eliminated_mask(["Shrek", "No Confidence"])
+    assert voter.count_vote(mask, True) is None and voter.count_vote(mask) == "Donkey"
+    assert voter.count_choices(mask, True) == [] and voter.count_choices(mask) == ["Donkey"]
+
+    # replacing the No Confidence rank moves the cutoff
+    voter.set_choice(2, "Woody")
+    assert voter.nc_cutoff == 3
+    assert voter.count_vote(mask, True) == "Woody" and voter.count_choices(mask, True) == ["Woody", "Donkey"]
+    voter.set_choice(1, "No Confidence")
+    assert voter.nc_cutoff == 1
+    voter.set_choices([candidate_code("Donkey"), 0, candidate_code("No Confidence")])
+    assert voter.nc_cutoff == 3
+    assert BallotStore.from_voters([voter], ["Shrek", "Donkey", "Woody", "No Confidence"]).nc_cutoff.tolist() == [3]
+
+    # eliminating a name that is on no ballot does not register it
+    from ballots import CANDIDATE_CODES
+    assert eliminated_mask(["Shrek", "Magic Mirror", None]) == eliminated_mask(["Shrek"])
+    assert "Magic Mirror" not in CANDIDATE_CODES
+    assert voter.count_vote(["Magic Mirror"]) == "Donkey"
+    return True
+
+def test_candidate_registry():
+    from registry import CandidateRegistry
+    from ballots import CANDIDATE_NAMES
+    registry = CandidateRegistry({"Shrek the Ogre": "Shrek", "donk": "Donkey"}, {"Donkey": [1, 2, 3]})
+    assert registry.canonical(" shrek the ogre ") == "Shrek" and registry.canonical("DONK") == "Donkey"
+    assert registry.canonical(None) is None and registry.canonical(float("nan")) is None and registry.code(None) == 0
+    code = registry.code("Shrek the Ogre")
+    assert registry.code("Shrek") == code and CANDIDATE_NAMES[code] == "Shrek" and registry.names == ["Shrek"]
+
+    # names without an alias are kept as written (stripped) and registered on first use
+    assert registry.canonical(" Gingy") == "Gingy" and "Gingy" not in registry.codes
+    assert CANDIDATE_NAMES[registry.code(" Gingy")] == "Gingy" and registry.names == ["Shrek", "Gingy"]
+
+    # palette colors come from crc32 of the name, so they are the same in every process
+    assert registry.color("Donkey") == (1, 2, 3)
+    assert registry.color("Shrek") == (16, 185, 129) and registry.color("Gingy") == (239, 68, 68)
+    assert CandidateRegistry().color("Shrek") == registry.color("Shrek")
+    copy = CandidateRegistry.from_dict(registry.to_dict())
+    assert copy.names == registry.names and copy.codes == registry.codes and copy.color("Donkey") == (1, 2, 3)
+    return True
+
+def test_pairwise_matrix():
+    candidates = ["Shrek", "Donkey", "Woody"]
+    voters = make_voters([["Shrek", "Donkey"], ["Donkey", "Woody", "Shrek"], ["Woody"], ["Shrek"]], 3)
+    election = Election(voters, candidates)
+    df = election.pairwise_matrix()
+    assert df.loc["Shrek", "Donkey"] == 2
+    assert df.loc["Donkey", "Shrek"] == 1
+    assert df.loc["Woody", "Shrek"] == 2
+    assert df.loc["Shrek", "Woody"] == 2
+    assert election.condorcet_winner() is None
+    assert election.pairwise_matrix(year=2027).loc["Donkey", "Woody"] == 1
+
+    return True
+
+def test_tabulation_stats():
+    candidates = ["Shrek", "Donkey", "Woody"]
+    voters = make_voters([["Shrek"], ["Shrek"], ["Shrek", "Woody"], ["Donkey", "Shrek"], ["Donkey"], ["Woody", "Donkey"], ["Woody", "Donkey", "Shrek"], ["Woody"]], 3)
+    election = Election(voters, candidates)
+    assert election.run_election() == "Shrek"
+    assert election.eliminated_candidates == ["Donkey"]
+    transfers = election.stats.transfer_frame(1)
+    assert transfers.loc["Donkey", "Shrek"] == 1
+    assert transfers.loc["Donkey", "Exhausted"] == 1
+    assert list(election.stats.exhausted) == [0, 1]
+    assert list(election.stats.depth_histogram) == [0, 4, 3, 1]
+
+    return True
+
+def test_summarize_election():
+    candidates = ["Shrek", "Donkey", "Woody"]
+    voters = make_voters([["Shrek"], ["Shrek"], ["Shrek", "Woody"], ["Donkey", "Shrek"], ["Donkey"], ["Woody", "Donkey"], ["Woody", "Donkey", "Shrek"], ["Woody"]], 3)
+    election = Election(voters, candidates)
+    election.run_election()
+    summary = summarize_election(election, ["year"])
+    assert summary["winner"] == "Shrek"
+    assert summary["rounds"]["Round 2"] == {"Shrek": 4, "Woody": 3}
+    assert summary["transfers"][0]["from"] == "Donkey"
+    assert set(summary["breakdowns"]["year"]) == {"2026", "2027"}
+
+    return True
+
+def test_results_server_deltas():
+    server = ResultsServer(["Shrek", "Donkey", "Woody"])
+    state = apply_message({}, server.snapshot())
+    delta = server.ingest([{"voter_id": 1, "choices": ["Shrek", "Donkey"]}, {"voter_id": 2, "choices": ["Donkey"]}, {"voter_id": 3, "choices": ["Woody", "Shrek"]}])
+    apply_message(state, delta)
+    assert state["ballots"] == 3
+    assert state["rounds"] == server.rounds
+    delta = server.ingest([{"voter_id": 4, "choices": ["Shrek"]}])
+    assert state["rounds"] != server.rounds
+    apply_message(state, delta)
+    assert state["rounds"] == server.rounds
+    assert state["winner"] == "Shrek"
+
+    return True
+
+def test_results_server_bad_payloads():
+    import asyncio
+    import json
+    from ballots import CANDIDATE_CODES
+    server = ResultsServer(["Shrek", "Donkey"])
+    bad_batches = [{"choices": ["Shrek"]}, ["Shrek"], [{"choices": "Shrek"}], [{"choices": ["Lord Farquaad"]}, {"choices": [1]}],
+                   [{"choices": [{}]}], [{"voter_id": "1", "choices": ["Shrek"]}]]
+    for batch in bad_batches:
+        try:
+            server.ingest(batch)
+            assert False, batch
+        except ValueError:
+            pass
+    # nothing from a rejected batch is counted or registered
+    assert server.version == 0 and len(server.election.voters) == 0
+    assert "Lord Farquaad" not in CANDIDATE_CODES
+
+    async def post(body):
+        await server.start(port=0)
+        port = server.server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write((f"POST /ballots HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n").encode() + body)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        server.server.close()
+        await server.server.wait_closed()
+        return response
+
+    response = asyncio.run(post(json.dumps([{"choices": [1]}]).encode()))
+    assert response.startswith(b"HTTP/1.1 400 ") and b"choices" in response
+    return True
+
+def test_results_server_slow_subscriber():
+    import asyncio
+
+    class Subscriber:
+        def __init__(self, delay):
+            self.delay = delay
+            self.frames = []
+            self.closed = False
+
+        def write(self, frame):
+            self.frames.append(frame)
+
+        async def drain(self):
+            await asyncio.sleep(self.delay)
+
+        def close(self):
+            self.closed = True
+
+    server = ResultsServer(["Shrek", "Donkey"], send_timeout=0.1)
+    fast, slow = Subscriber(0), Subscriber(60)
+    server.clients.update([fast, slow])
+
+    async def publish_twice():
+        await server.publish([{"voter_id": 1, "choices": ["Shrek"]}])
+        await server.publish([{"voter_id": 2, "choices": ["Donkey"]}])
+    asyncio.run(asyncio.wait_for(publish_twice(), 1))
+    # the slow display is dropped after one timeout instead of holding up every batch
+    assert server.clients == {fast} and slow.closed and not fast.closed
+    assert len(fast.frames) == 2 and len(slow.frames) == 1
+    return True
+
+def test_tally_cache():
+    candidates = ["Shrek", "Donkey", "Woody"]
+    voters = make_voters([["Shrek", "Donkey"], ["Donkey", "Shrek"], ["Woody", "Donkey"], ["Shrek"], ["Donkey"]], 3)
+    election = Election(voters, candidates)
+    assert election.run_election() == "Donkey"
+    first = election.get_election_results()
+    misses = election.vote_counter.cache_misses
+    assert election.get_election_results().equals(first)
+    election.get_round_vote_counts(2)
+    election.get_round_vote_counts(2)
+    assert election.vote_counter.cache_misses == misses + 1
+    assert election.vote_counter.cache_hits >= 3
+
+    # removing a candidate from the ballots must not reuse the old counts
+    remove_candidate(voters, "Donkey")
+    assert election.run_election() == "Shrek"
+
+    # new ballots extend the store instead of rebuilding it
+    store = election.get_ballot_store()
+    election.add_voters(make_voters([["Woody"], ["Woody"], ["Woody"]], 3))
+    extended = election.ballot_store
+    assert extended is not store and election.get_ballot_store() is extended
+    assert election.run_election() == "Woody"
+    assert len(election.get_ballot_store()) == 8 and election.get_ballot_store() is extended
+    return True
+
+def test_lazy_results():
+    import numpy as np
+    import pandas as pd
+    candidates = ["Shrek", "Donkey", "Woody", "Fiona"]
+    ballots = [["Shrek", "Donkey"], ["Shrek"], ["Shrek", "Woody"], ["Donkey", "Shrek"], ["Donkey", "Woody"], ["Woody", "Donkey"], ["Woody", "Fiona"], ["Fiona", "Donkey", "Woody"], ["Donkey"]]
+    voters = make_voters(ballots, len(candidates))
+    election = Election(voters, candidates)
+    assert election.run_election() == "Donkey" and election.last_round == 3
+
+    # the frames the DataFrame-based count built
+    rounds = []
+    for round in range(1, election.last_round + 1):
+        eliminated = election.eliminated_before(round)
+        remaining = [candidate for candidate in candidates if candidate not in eliminated]
+        choice_counts = {candidate: [0] * len(remaining) for candidate in remaining}
+        vote_counts = {candidate: 0 for candidate in remaining}
+        for voter in voters:
+            for rank, choice in enumerate(voter.count_choices(eliminated)):
+                choice_counts[choice][rank] += 1
+            choice = voter.count_vote(eliminated)
+            if choice is not None:
+                vote_counts[choice] += 1
+        rounds.append(vote_counts)
+        expected = pd.DataFrame(choice_counts, index=[f"Rank {i}" for i in range(1, len(remaining) + 1)]).transpose().sort_values(by="Rank 1", ascending=False)
+        round_counts = election.round_counts(round)
+        assert round_counts.counts.dtype == np.int64 and round_counts.votes.tolist() == [vote_counts[c] for c in round_counts.candidates]
+        pd.testing.assert_frame_equal(round_counts.to_frame(), expected)
+        pd.testing.assert_frame_equal(election.get_round_vote_counts(round), expected)
+
+    expected = pd.DataFrame(rounds, index=[f"Round {i}" for i in range(1, election.last_round + 1)]).transpose()
+    order = sorted(candidates, key=lambda c: election.eliminated_candidates.index(c) if c in election.eliminated_candidates else float('inf'), reverse=True)
+    order = [election.winner] + [c for c in order if c != election.winner]
+    expected = expected.reindex(order).fillna('')
+    for column in expected.columns:
+        expected[column] = expected[column].apply(lambda x: int(x) if isinstance(x, (int, float)) and not pd.isna(x) else x)
+    pd.testing.assert_frame_equal(election.get_election_results(), expected)
+
+    results = election.election_results()
+    assert results.candidates == list(expected.index) and results.counts.dtype == np.int64
+    frame = results.to_frame()
+    assert list(frame.columns) == ["Round 1", "Round 2", "Round 3"] and (frame.dtypes == np.int64).all()
+    assert (results.eliminated_frame().values == (expected.values == '')).all()
+    assert frame.loc["Fiona", "Round 3"] == 0 and results.to_frame(blank_eliminated=True).loc["Fiona", "Round 3"] == ''
+    return True
+
+def test_validate_voters():
+    candidates = ["Shrek", "Donkey", "Woody"]
+    ballots = [["Shrek", "Shrek", "Donkey"], [None, "Woody", "Fiona"], ["Donkey"], ["Woody"]]
+    voters = make_voters(ballots, 3)
+    voters[2].voter_id = voters[3].voter_id   # resubmission; the later row wins without timestamps
+    kept, report = validate_voters(voters, candidates)
+    assert [voter.voter_id for voter in kept] == [1, 2, 4]
+    assert [voter.choice_1 for voter in kept] == ["Shrek", None, "Woody"]   # skipped ranks stay by default
+    assert kept[0].choice_2 == "Donkey" and kept[0].choice_3 is None   # a repeated choice is passed over like in count_vote
+    assert kept[1].choice_2 == "Woody" and kept[1].choice_3 is None
+    assert report.superseded == 1 and report.repeated_choices == 1 and report.skipped_ranks == 1
+    assert report.unknown_choices == {"Fiona": 1}
+
+    voters = make_voters(ballots, 3)
+    voters[2].voter_id = voters[3].voter_id
+    kept, report = validate_voters(voters, candidates, compact_skipped=True)
+    assert [voter.choice_1 for voter in kept] == ["Shrek", "Woody", "Woody"]
+    assert kept[1].choice_2 is None and report.skipped_ranks == 1
+    return True
+
+def test_read_skipped_ranks():
+    import tempfile
+    import os
+    import pandas as pd
+    candidates = ["Shrek", "Donkey", "Woody"]
+    ballots = [["Shrek"]] * 4 + [["Donkey"]] * 3 + [["Woody", None, "Donkey"]] * 2
+    columns = [f"Please select your {rank} choice for president/vice president ticket" for rank in ["TOP", "SECOND", "THIRD", "FOURTH", "FIFTH"]]
+    rows = [{"User Id": i, "Please select your primary college of enrollment": "Swamp", "Please select your expected graduation year": "2026",
+             "Submitted On": "2026-02-13 10:00:00", **dict(zip(columns, ballot + [None] * (5 - len(ballot))))} for i, ballot in enumerate(ballots, start=1)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "skipped.csv")
+        pd.DataFrame(rows).to_csv(path, index=False)
+        voters, _, report = read_election_data(path, candidates=candidates, with_report=True)
+        compacted, _ = read_election_data(path, candidates=candidates, compact_skipped=True)
+
+    # by default a skipped rank still exhausts the ballot, so the read tabulates like the unvalidated ballots
+    assert report.skipped_ranks == 2
+    assert Election(make_voters(ballots, 5), candidates).run_election() == "Shrek"
+    assert Election(voters, candidates).run_election() == "Shrek"
+    assert Election(compacted, candidates).run_election() == "Donkey"
+    return True
+
+def test_diagnostics():
+    candidates = ["Shrek", "Donkey"]
+    voters = make_voters([["Shrek"], ["Shrek"], ["Donkey", "Shrek"], ["Fiona", "Donkey"], ["Fiona"]], 3)
+    election = Election(voters, candidates)
+    assert election.run_election() == "Shrek"
+    assert election.diagnostics.counts() == {"unknown_vote": 2}
+    election.round_counts(1)
+    election.round_counts(1)
+    assert election.diagnostics.counts("unknown_choice") == {1: 2}
+    assert "Round 1: 2 choices for 'Fiona' not in candidates list." in election.diagnostics.messages()
+
+    election.vote_counter.tally_choices(voters, [])   # the Voter list path reports the same counts
+    assert election.diagnostics.counts("unknown_choice") == {1: 2}
+    return True
+
+def test_audit_transcript():
+    candidates = ["Shrek", "Donkey", "Woody", "Fiona"]
+    voters = make_voters([["Shrek", "Donkey"], ["Donkey", "Woody"], ["Woody", "Shrek"], ["Fiona", "Woody"], ["Shrek"], ["Donkey"], ["Woody"]], 4)
+    election = Election(voters, candidates)
+    transcript = AuditTranscript()
+    winner = election.run_election(transcript)
+    assert transcript.records[0]["store_hash"] == election.get_ballot_store().digest()
+    assert transcript.records[-1]["winner"] == winner
+    assert any(record["type"] == "tiebreak" for record in transcript)
+    assert verify_transcript(transcript, election.get_ballot_store()) == []
+
+    # a changed tally or a different ballot set is caught
+    records = [dict(record) for record in transcript]
+    records[1] = dict(records[1], tallies=dict(records[1]["tallies"], Shrek=3))
+    assert verify_transcript(records, election.get_ballot_store())
+    other = Election(make_voters([["Fiona"]] * 7, 4), candidates)
+    assert verify_transcript(transcript, other.get_ballot_store()) == ["Ballot store hash does not match the transcript."]
+    return True
+
+def test_risk_limiting_audit():
+    candidates = ["Shrek", "Donkey", "Woody"]
+    voters = make_voters([["Shrek"]] * 40 + [["Donkey", "Shrek"]] * 35 + [["Woody", "Shrek"]] * 25, 3)
+    election = Election(voters, candidates)
+    assert election.run_election() == "Shrek"
+    assertions = election_assertions(election)
+    required = [a for a in assertions if a.kind != "neb"]
+    assert [(a.winner, a.losers, a.margin) for a in required] == [("Shrek", ["Woody"], 15), ("Donkey", ["Woody"], 10), ("Shrek", ["Donkey"], 30)]
+
+    n = sample_size(assertions, len(voters))
+    rows = sample_ballots("0123456789", n, len(voters))
+    assert (rows == sample_ballots("0123456789", n, len(voters))).all()
+    store = election.get_ballot_store()
+    audited = [[voters[row].get_choice(rank) for rank in range(1, 4)] for row in rows]
+    assert evaluate_sample(store, assertions, rows, audited).confirmed
+    audited[0] = ["Woody"]   # a record that disagrees with the stored ballot
+    assert not evaluate_sample(store, assertions, rows, audited).confirmed
+    return True
+
+def test_margins():
+    candidates = ["Shrek", "Donkey", "Woody"]
+    voters = make_voters([["Shrek"]] * 40 + [["Donkey", "Shrek"]] * 35 + [["Woody", "Donkey"]] * 25, 3)
+    election = Election(voters, candidates)
+    assert election.run_election() == "Donkey"
+    analysis = election.margins()
+    assert analysis.rounds[0]["eliminated"] == "Woody" and analysis.rounds[0]["margin"] == 10
+    assert analysis.rounds[0]["changes"] == 6 and analysis.rounds[0]["order_flips"]
+    assert analysis.final["margin"] == 20 and analysis.final["changes"] == 11
+    # moving 6 Donkey ballots to Woody eliminates Donkey first, and Donkey's other ballots elect Shrek
+    assert analysis.rounds[0]["winner_flips"] and analysis.winner_changes == 6
+    return True
+
+def test_sharded_election():
+    candidates = ["Shrek", "Donkey", "Woody", "Fiona"]
+    voters = make_voters([["Shrek", "Donkey"], ["Donkey", "Woody"], ["Woody", "Shrek"], ["Fiona", "Woody"], ["Shrek"], ["Donkey"], ["Woody"]] * 3, 4)
+    serial, sharded = AuditTranscript(), AuditTranscript()
+    winner = Election(voters, candidates).run_election(serial)
+    assert Election(voters, candidates).run_election(sharded, workers=3) == winner
+    assert sharded.records == serial.records
+    return True
+
+def test_shared_ballots():
+    import pickle
+    candidates = ["Shrek", "Donkey", "Woody"]
+    election = Election(make_voters([["Shrek", "Donkey"], ["Woody"], ["Donkey", "Shrek"]], 3), candidates)
+    store = election.get_ballot_store()
+    with SharedBallots(store) as shared:
+        handle = pickle.loads(pickle.dumps(shared.handle))
+        attached = handle.attach()
+        assert (attached.ranks == store.ranks).all() and not attached.ranks.flags.writeable
+        assert attached.schools.tolist() == store.schools.tolist() and (attached.years == store.years).all()
+        assert attached.filter(year=2027).ranks.tolist() == store.filter(year=2027).ranks.tolist()
+        handle.detach()
+    return True
+
+def test_ragged_ballot_store():
+    candidates = ["Shrek", "Donkey", "Woody", "Buzz", "Fiona", "Puss", "Dragon", "Farquaad", "No Confidence"]
+    ballots = [["Shrek", "Donkey"], ["Woody"], ["Donkey", "Donkey", "Shrek"], ["Fiona", None, "Puss"], ["No Confidence", "Woody"], []]
+    voters = make_voters(ballots, len(candidates))
+    ragged = BallotStore.from_voters(voters, candidates)
+    dense = BallotStore.from_voters(voters, candidates, layout="dense")
+    assert isinstance(ragged, RaggedBallotStore) and len(ragged.choices) == 11
+    assert (ragged.ranks == dense.ranks).all() and ragged.digest() == dense.digest()
+    for no_confidence_last in (False, True):
+        eliminated = ragged.eliminated_array(["Shrek", "Fiona"])
+        assert (ragged.first_choices(eliminated, no_confidence_last) == dense.first_choices(eliminated, no_confidence_last)).all()
+        assert (ragged.rank_counts(eliminated, no_confidence_last) == dense.rank_counts(eliminated, no_confidence_last)).all()
+        assert (ragged.ranking_depths(no_confidence_last) == dense.ranking_depths(no_confidence_last)).all()
+    assert (ragged.filter(year=2027).ranks == dense.filter(year=2027).ranks).all()
+
+    election = Election(voters, candidates)
+    assert isinstance(election.get_ballot_store(), RaggedBallotStore)
+    serial = Election(voters, candidates)
+    serial.ballot_store = dense
+    assert election.run_election() == serial.run_election()
+    assert election.eliminated_candidates == serial.eliminated_candidates
+
+    # contiguous ballots are a window sharing the arrays; worker shards are taken this way
+    import numpy as np
+    from sharding import ShardedStore
+    window = ragged.subset(slice(2, 5))
+    assert np.shares_memory(window.choices, ragged.choices) and np.shares_memory(window.offsets, ragged.offsets)
+    assert (window.ranks == dense.ranks[2:5]).all() and window.ballot(1).tolist() == ragged.ballot(3).tolist()
+    eliminated = ragged.eliminated_array(["Donkey"])
+    assert (window.rank_counts(eliminated, True) == dense.subset(slice(2, 5)).rank_counts(eliminated, True)).all()
+    assert (window.extend(window).ranks == np.vstack([dense.ranks[2:5]] * 2)).all()
+    with ShardedStore(ragged, 2) as sharded:
+        assert sharded.store is ragged and sharded.digest() == ragged.digest()
+        assert (sharded.first_choices(eliminated) == ragged.first_choices(eliminated)).all()
+        assert (sharded.rank_counts(eliminated) == ragged.rank_counts(eliminated)).all()
+    return True
+
+def test_bulk_elimination():
+    candidates = ["Shrek", "Donkey", "Woody", "Buzz", "Fiona"]
+    ballots = [["Shrek"]] * 10 + [["Donkey"]] * 8 + [["Woody"]] * 3 + [["Buzz", "Shrek"]] * 2 + [["Fiona", "Donkey"]]
+    voters = make_voters(ballots, len(candidates))
+    sequential = Election(voters, candidates)
+    assert sequential.run_election() == "Shrek" and sequential.last_round == 4
+
+    election = Election(voters, candidates, bulk_elimination=True)
+    transcript = AuditTranscript()
+    assert election.run_election(transcript) == "Shrek"
+    assert election.round_eliminations == [["Fiona", "Buzz", "Woody"]] and election.last_round == 2
+    assert election.eliminated_before(2) == ["Fiona", "Buzz", "Woody"]
+    assert election.election_results().counts[:, 1].tolist() == [12, 9, 0, 0, 0]
+    assert verify_transcript(transcript, election.get_ballot_store()) == []
+
+    # anomalies are recorded under the round they were counted in, not the number of eliminations
+    voters = make_voters(ballots + [["Woody", "Gingy"]], len(candidates))
+    sequential = Election(voters, candidates)
+    sequential.run_election()
+    assert sequential.diagnostics.counts("unknown_vote") == {4: 1}
+    election = Election(voters, candidates, bulk_elimination=True)
+    election.run_election()
+    assert election.diagnostics.counts("unknown_vote") == {2: 1}
+    election.election_results()
+    assert election.diagnostics.counts("unknown_vote") == {2: 1}
+    return True
+
+def test_bulk_elimination_tiebreak():
+    # Dragon and Puss have different counts, so bulk elimination takes their order from round 1 without counting again;
+    # the Donkey-Fiona tie that follows is broken by the count with only Dragon out, which is not a round of its own
+    candidates = ["Shrek", "Donkey", "Fiona", "Puss", "Dragon"]
+    ballots = [["Shrek"]] * 7 + [["Donkey"]] * 4 + [["Puss", "Donkey"]] * 2 + [["Fiona"]] * 6 + [["Dragon"]]
+    voters = make_voters(ballots, len(candidates))
+    sequential = Election(voters, candidates)
+    assert sequential.run_election() == "Shrek"
+    assert sequential.eliminated_candidates == ["Dragon", "Puss", "Donkey"]
+
+    election = Election(voters, candidates, bulk_elimination=True)
+    counted = []
+    count_votes = election.vote_counter.count_votes
+    election.vote_counter.count_votes = lambda *args, **kwargs: counted.append(kwargs["round"]) or count_votes(*args, **kwargs)
+    transcript = AuditTranscript()
+    assert election.run_election(transcript) == "Shrek"
+    assert counted == [1, 2, 3]   # one count per round
+    assert election.eliminated_candidates == sequential.eliminated_candidates
+    assert election.round_eliminations == [["Dragon", "Puss"], ["Donkey"]] and election.last_round == 3
+    step = election.vote_counter.tiebreak_steps[-1]
+    assert step["rule"] == "previous_round" and step["eliminated"] == ["Dragon"] and step["counts"] == {"Donkey": 4, "Fiona": 6}
+    assert verify_transcript(transcript, election.get_ballot_store()) == []
+
+    # Dragon and Gingy are tied, so the group is eliminated one at a time with the same tiebreaks as sequential counting,
+    # and the Donkey-Fiona tie is broken by the count with Dragon and Gingy out, which is not a round of its own
+    candidates = ["Shrek", "Donkey", "Fiona", "Puss", "Dragon", "Gingy"]
+    ballots = ([["Shrek"]] * 12 + [["Shrek", "Gingy"]] + [["Donkey"]] * 5 + [["Puss", "Donkey"]] * 2 + [["Fiona"]] * 7
+               + [["Dragon", "Fiona"]] + [["Gingy", "Donkey"]])
+    voters = make_voters(ballots, len(candidates))
+    sequential = Election(voters, candidates)
+    assert sequential.run_election() == "Shrek"
+    election = Election(voters, candidates, bulk_elimination=True)
+    counted = []
+    count_votes = election.vote_counter.count_votes
+    election.vote_counter.count_votes = lambda *args, **kwargs: counted.append(kwargs["round"]) or count_votes(*args, **kwargs)
+    transcript = AuditTranscript()
+    assert election.run_election(transcript) == "Shrek"
+    assert counted == [1, 1, 1, 2, 3]   # recounted between the eliminations in round 1
+    assert election.eliminated_candidates == sequential.eliminated_candidates == ["Dragon", "Gingy", "Puss", "Donkey"]
+    assert election.round_eliminations == [["Dragon", "Gingy", "Puss"], ["Donkey"]]
+    step = election.vote_counter.tiebreak_steps[-1]
+    assert step["eliminated"] == ["Dragon", "Gingy"] and step["counts"] == {"Donkey": 6, "Fiona": 8}
+    assert verify_transcript(transcript, election.get_ballot_store()) == []
+    return True
+
+def test_show_checkpoint():
+    import os
+    import tempfile
+    import numpy as np
+    import json
+    from ballots import store_arrays
+    from checkpoint import ShowState, ShowCheckpoint, load_checkpoint, voters_from_store
+    candidates = ["Shrek", "Donkey", "Woody"]
+    election = Election(make_voters([["Shrek", "Donkey"], ["Woody"], ["Donkey", "Shrek", "Woody"]], 3), candidates)
+    election.run_election()
+    state = ShowState("rounds", batch=20, round=2, step=1, split_indexes=[1, 2, 3], rounds=[{"round": 1, "votes": [1, 1, 1]}])
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "show.npz")
+        ShowCheckpoint(path, election.get_ballot_store(), candidates).save(state)
+        expected = np.random.uniform()
+        loaded, store, loaded_candidates = load_checkpoint(path)
+        # the RNG state is restored, so the show draws the same batch waits
+        assert np.random.uniform() == expected
+    assert (loaded.scene, loaded.batch, loaded.round, loaded.step) == ("rounds", 20, 2, 1)
+    assert loaded.split_indexes == [1, 2, 3] and loaded.rounds == state.rounds and loaded_candidates == candidates
+    assert store.digest() == election.get_ballot_store().digest()
+    resumed = Election(voters_from_store(store), loaded_candidates)
+    assert resumed.run_election() == election.winner and resumed.eliminated_candidates == election.eliminated_candidates
+
+    # checkpoints written before ballots.store_arrays kept the store's meta data with the candidates
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "old.npz")
+        arrays = store_arrays(election.get_ballot_store())
+        meta = dict(json.loads(str(arrays.pop("store_meta"))), candidates=candidates)
+        np.savez(path, state=np.array(json.dumps(state.to_dict())), meta=np.array(json.dumps(meta)), **arrays)
+        _, old_store, old_candidates = load_checkpoint(path)
+    assert old_store.digest() == election.get_ballot_store().digest() and old_candidates == candidates
+    return True
+
+def test_projection():
+    candidates = ["Shrek", "Donkey", "Woody"]
+    ballots = [["Shrek", "Donkey"]] * 4 + [["Donkey", "Woody"]] * 3 + [["Woody", "Donkey"]] * 2
+    voters = make_voters(ballots, 3)
+    election = Election(voters, candidates)
+    election.run_election()
+    engine = ProjectionEngine(candidates, seed=1)
+    engine.add(BallotStore.from_voters(voters[:6], candidates))
+    partial = engine.project(len(voters) - 6, simulations=200)
+    print(partial)
+    assert sum(partial.win_probability.values()) == 1.0
+    assert sum(count for _, count in partial.orders) == 200
+    engine.add(BallotStore.from_voters(voters[6:], candidates))
+    assert len(engine) == len(voters) and len(engine.counts) == 3
+    # with every ballot in, each completion is the actual count
+    final = engine.project(0, simulations=10)
+    assert final.win_probability[election.winner] == 1.0
+    assert final.likely_order == election.eliminated_candidates
+    return True
+
+def test_asset_manager():
+    import pygame
+    from assets import AssetManager
+    pygame.font.init()
+    assets = AssetManager(images={}, music_path=None)
+    assets.start()
+    assert isinstance(assets.font("header"), pygame.font.Font) and assets.ready
+    # errors on the loading thread are raised where the assets are used
+    missing = AssetManager(fonts={}, images={"logo": ("Assets/Images/missing.png", 1)}, music_path=None)
+    try:
+        missing.image("logo")
+        return False
+    except (FileNotFoundError, pygame.error):
+        pass
+    return True
+
+def test_frame_telemetry():
+    import json
+    import os
+    import tempfile
+    import time
+    from telemetry import FrameTelemetry
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "telemetry.jsonl")
+        telemetry = FrameTelemetry(path)
+        telemetry.scene = "batches"
+        for pause in [0, 0, 0.1, 0]:
+            telemetry.begin_frame(100)
+            time.sleep(pause)
+            telemetry.begin_render()
+            telemetry.end_frame()
+        with telemetry.measure("count", batch=3):
+            pass
+        telemetry.close()
+        records = [json.loads(line) for line in open(path)]
+    print(telemetry, telemetry.summary())
+    # the slow frame makes the next one late
+    assert telemetry.n_frames == 4 and telemetry.missed == 1
+    assert [record["missed"] for record in records[:4]] == [False, False, False, True]
+    assert records[3]["latency_ms"] >= 80
+    assert records[-1]["type"] == "work" and records[-1]["name"] == "count" and records[-1]["batch"] == 3
+    return True
+
+def test_election_archive():
+    import tempfile
+    from archive import ElectionArchive
+    candidates = ["Shrek", "Donkey", "Woody"]
+    ballots_2024 = [["Shrek", "Donkey"]] * 4 + [["Donkey", "Woody"]] * 3 + [["Woody", "Donkey"]] * 2
+    ballots_2025 = [["Woody"]] * 5 + [["Shrek", "Woody"]] * 3 + [["Donkey"]]
+    with tempfile.TemporaryDirectory() as directory:
+        with ElectionArchive(directory) as archive:
+            for year, ballots in [(2024, ballots_2024), (2025, ballots_2025)]:
+                election = Election(make_voters(ballots, 3), candidates)
+                election.run_election()
+                archive.add(election, year, "Mayor of Far Far Away")
+            print(archive)
+            shares = archive.shares(office="Mayor of Far Far Away", last=2, by=["grad_year"])
+            print(shares)
+            # make_voters puts odd voters in the class of 2027
+            assert shares.loc[(2024, "Mayor of Far Far Away", 2027)].to_dict() == {"Donkey": 0.4, "Shrek": 0.4, "Woody": 0.2}
+            final = archive.tallies(round=None, by=[])
+            assert final.loc[(2024, "Mayor of Far Far Away")].to_dict() == {"Donkey": 5, "Shrek": 4, "Woody": 0}
+            assert [entry["winner"] for entry in archive.elections()] == ["Woody", "Donkey"]
+            loaded = archive.load(2024, "Mayor of Far Far Away")
+            assert loaded.rounds[-1]["votes"] == [5, 4] and loaded.to_election().run_election() == "Donkey"
+            try:
+                archive.add(election, 2025, "Mayor of Far Far Away")
+                return False
+            except ValueError:
+                pass
+
+            # a replacement only takes the place of the archived ballots once the index points at it
+            import os
+            import sqlite3
+            recount = Election(make_voters(ballots_2025 + [["Shrek"]] * 2, 3), candidates)
+            recount.run_election()
+            archive.connection.execute("CREATE TRIGGER refuse BEFORE INSERT ON elections BEGIN SELECT RAISE(ABORT, 'disk full'); END")
+            try:
+                archive.add(recount, 2025, "Mayor of Far Far Away", replace=True)
+                return False
+            except sqlite3.IntegrityError:
+                pass
+            assert len(archive.load(2025, "Mayor of Far Far Away").store) == 9
+            archive.connection.execute("DROP TRIGGER refuse")
+            archive.add(recount, 2025, "Mayor of Far Far Away", replace=True)
+            assert len(archive.load(2025, "Mayor of Far Far Away").store) == 11
+            assert sorted(name for name in os.listdir(directory) if name.endswith(".npz")) == ["2024_Mayor_of_Far_Far_Away.npz", "2025_Mayor_of_Far_Far_Away_2.npz"]
+    return True
+
 if __name__ == "__main__":
     assert test_read_simple_1()
     print()
-    assert test_fake_simple_1()
\ No newline at end of file
+    assert test_fake_simple_1()
+    print()
+    assert test_voter_slots()
+    print()
+    assert test_eliminated_mask()
+    print()
+    assert test_candidate_registry()
+    print()
+    assert test_pairwise_matrix()
+    print()
+    assert test_tabulation_stats()
+    print()
+    assert test_summarize_election()
+    print()
+    assert test_results_server_deltas()
+    print()
+    assert test_results_server_bad_payloads()
+    print()
+    assert test_results_server_slow_subscriber()
+    print()
+    assert test_tally_cache()
+    print()
+    assert test_lazy_results()
+    print()
+    assert test_validate_voters()
+    print()
+    assert test_read_skipped_ranks()
+    print()
+    assert test_diagnostics()
+    print()
+    assert test_audit_transcript()
+    print()
+    assert test_risk_limiting_audit()
+    print()
+    assert test_margins()
+    print()
+    assert test_sharded_election()
+    print()
+    assert test_shared_ballots()
+    print()
+    assert test_ragged_ballot_store()
+    print()
+    assert test_bulk_elimination()
+    print()
+    assert test_bulk_elimination_tiebreak()
+    print()
+    assert test_show_checkpoint()
+    print()
+    assert test_projection()
+    print()
+    assert test_asset_manager()
+    print()
+    assert test_frame_telemetry()
+    print()
+    assert test_election_archive()
@@ -0,0 +1,137 @@
+import numpy as np
+
+from ballots import EMPTY, CANDIDATE_NAMES, CANDIDATE_CODES
+
+class ValidationReport:
+    """
+    Counts of the problems found and fixed while validating a set of ballots.
+    """
+    def __init__(self, rows: int):
+        self.rows = rows
+        self.ballots = rows
+        self.superseded = 0
+        self.repeated_choices = 0
+        self.skipped_ranks = 0
+        self.empty_ballots = 0
+        self.unknown_choices = {}
+
+    def __str__(self):
+        unknown = sum(self.unknown_choices.values())
+        return (f"Validation Report: {self.ballots} of {self.rows} ballots kept, {self.superseded} superseded, "
+                f"{self.repeated_choices} with repeated choices, {self.skipped_ranks} with skipped ranks, "
+                f"{self.empty_ballots} empty, {unknown} unknown choices")
+
+    def to_dict(self):
+        """
+        Returns the report as a JSON-serializable dictionary.
+
+        :return: The report
+        :rtype: dict
+        """
+        return {
+            "rows": self.rows,
+            "ballots": self.ballots,
+            "superseded": self.superseded,
+            "repeated_choices": self.repeated_choices,
+            "skipped_ranks": self.skipped_ranks,
+            "empty_ballots": self.empty_ballots,
+            "unknown_choices": dict(self.unknown_choices),
+        }
+
+def validate_ballots(codes: np.ndarray, voter_ids: np.ndarray, timestamps: np.ndarray = None, known_codes: list[int] = None,
+                     compact_skipped: bool = False):
+    """
+    Validates a matrix of candidate codes in one vectorized pass: only the latest submission of each voter is kept, repeated candidates are removed (keeping the highest rank) and choices for unknown candidates are blanked. Skipped ranks are counted but left in place, so a ballot still ends at its first empty rank like in Voter.count_vote, unless compact_skipped is True.
+
+    :param codes: Candidate codes of shape (ballots, ranks), 0 for an empty rank
+    :type codes: np.ndarray
+    :param voter_ids: One voter ID per ballot
+    :type voter_ids: np.ndarray
+    :param timestamps: Submission times as datetime64 (optional); ballots without a time count as the oldest submission, and ties keep the later row
+    :type timestamps: np.ndarray or None
+    :param known_codes: Codes of the expected candidates (optional); if not given, no choice is treated as unknown
+    :type known_codes: list[int] or None
+    :param compact_skipped: If True, move the remaining choices up over skipped ranks; this changes which ballots exhaust and can change the result
+    :type compact_skipped: bool
+    :return: Row indexes of the kept ballots (in their original order), their cleaned codes and the report
+    :rtype: tuple[np.ndarray, np.ndarray, ValidationReport]
+    """
+    report = ValidationReport(len(codes))
+    voter_ids = np.asarray(voter_ids)
+    rows = np.arange(len(codes))
+
+    # latest submission per voter: sort by (id, time, row) and keep the last of each id
+    if timestamps is None:
+        order = np.lexsort((rows, voter_ids))
+    else:
+        # NaT is the smallest int64, so ballots without a time sort first
+        times = np.asarray(timestamps, dtype='datetime64[ns]').view(np.int64)
+        order = np.lexsort((rows, times, voter_ids))
+    last = np.ones(len(order), dtype=bool)
+    last[:-1] = voter_ids[order][1:] != voter_ids[order][:-1]
+    keep = np.sort(order[last])
+    report.superseded = len(codes) - len(keep)
+    report.ballots = len(keep)
+
+    codes = np.array(codes[keep], dtype=np.uint16)
+    n_ranks = codes.shape[1]
+
+    if known_codes is not None:
+        unknown = (codes != EMPTY) & ~np.isin(codes, np.asarray(list(known_codes), dtype=np.uint16))
+        if unknown.any():
+            found, counts = np.unique(codes[unknown], return_counts=True)
+            report.unknown_choices = {CANDIDATE_NAMES[code]: int(count) for code, count in zip(found.tolist(), counts.tolist())}
+            codes[unknown] = EMPTY
+
+    removed = np.zeros(codes.shape, dtype=bool)
+    for i in range(1, n_ranks):
+        removed[:, i] = (codes[:, :i] == codes[:, i:i+1]).any(axis=1) & (codes[:, i] != EMPTY)
+    repeated = removed.any(axis=1)
+    report.repeated_choices = int(repeated.sum())
+    if repeated.any():
+        # count_vote passes over a repeated (already eliminated) choice, so later choices move up into its place
+        codes[removed] = EMPTY
+        shift = np.argsort(removed[repeated], axis=1, kind='stable')
+        codes[repeated] = np.take_along_axis(codes[repeated], shift, axis=1)
+
+    filled = codes != EMPTY
+    # a gap is an empty rank followed by a filled one
+    gaps = (~filled[:, :-1] & filled[:, 1:]).any(axis=1) if n_ranks > 1 else np.zeros(len(codes), dtype=bool)
+    report.skipped_ranks = int(gaps.sum())
+    if compact_skipped and gaps.any():
+        shift = np.argsort(~filled[gaps], axis=1, kind='stable')
+        codes[gaps] = np.take_along_axis(codes[gaps], shift, axis=1)
+    report.empty_ballots = int((~filled.any(axis=1)).sum())
+
+    return keep, codes, report
+
+def validate_voters(voters: list, candidates: list[str] = None, compact_skipped: bool = False):
+    """
+    Validates a list of Voter objects (see validate_ballots). Voters whose choices change are updated in place.
+
+    :param voters: List of Voter objects
+    :type voters: list[Voter]
+    :param candidates: Expected candidates (optional); choices for other names are removed and reported
+    :type candidates: list[str] or None
+    :param compact_skipped: If True, move choices up over skipped ranks
+    :type compact_skipped: bool
+    :return: The voters that were kept and the validation report
+    :rtype: tuple[list[Voter], ValidationReport]
+    """
+    n_ranks = max((voter.n_candidates for voter in voters), default=0)
+    codes = np.zeros((len(voters), n_ranks), dtype=np.uint16)
+    for row, voter in enumerate(voters):
+        codes[row, :voter.n_candidates] = voter.choices
+    voter_ids = np.array([voter.voter_id for voter in voters])
+    timestamps = np.array([np.datetime64(voter.timestamp, 'ns') if voter.timestamp is not None else np.datetime64('NaT', 'ns') for voter in voters], dtype='datetime64[ns]')
+    # a candidate without a code is on no ballot, so it does not need one here
+    known_codes = None if candidates is None else [CANDIDATE_CODES[candidate] for candidate in candidates if candidate in CANDIDATE_CODES]
+
+    keep, cleaned, report = validate_ballots(codes, voter_ids, timestamps, known_codes, compact_skipped)
+    kept = []
+    for row, new_codes in zip(keep.tolist(), cleaned):
+        voter = voters[row]
+        if not np.array_equal(codes[row], new_codes):
+            voter.set_choices(new_codes[:voter.n_candidates])
+        kept.append(voter)
+    return kept, report